@@ -0,0 +1,4 @@
+"""benchmarks of ParityServer's lifecycle and JSON-RPC throughput
+
+Run with `python -m benchmarks --help`.
+"""
@@ -0,0 +1,75 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+from testing.common.database import get_path_of
+from testing.parity import get_parity_version
+from testing.parity.metrics import Aggregator
+
+from benchmarks import fakeparity
+from benchmarks.scenarios import SCENARIOS
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--parity', help="parity binary (default: parity in PATH, or the fake one if there is none)")
+    parser.add_argument('--fake', action='store_true', help="run against the fake parity in benchmarks/fakeparity.py")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run, may be repeated (default: all)")
+    parser.add_argument('--runs', type=int, default=5, help="boots per start/stop scenario")
+    parser.add_argument('--calls', type=int, default=1000, help="calls per RPC scenario")
+    parser.add_argument('--batch-size', type=int, default=100, help="calls per JSON-RPC batch")
+    parser.add_argument('--transactions', type=int, default=500, help="transactions to submit")
+    parser.add_argument('--rate', type=float, help="transactions per second the load scenario aims for "
+                                                   "(default: as fast as possible)")
+    parser.add_argument('--processes', type=int, help="processes signing transactions (default: one per CPU)")
+    parser.add_argument('--output', help="file to write the JSON results to (default: stdout)")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        binary = options.parity
+        if binary is None and not options.fake:
+            binary = get_path_of('parity')
+        fake = binary is None
+        if fake:
+            binary = fakeparity.install(tmpdir)
+
+        results = {
+            'parity_server': 'fake' if fake else os.path.realpath(binary),
+            'parity_version': '.'.join(str(i) for i in get_parity_version(binary, use_disk_cache=False)),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'started_at': datetime.datetime.utcnow().isoformat() + 'Z',
+            'options': {'runs': options.runs, 'calls': options.calls, 'batch_size': options.batch_size,
+                        'transactions': options.transactions, 'rate': options.rate,
+                        'processes': options.processes},
+            'scenarios': {},
+        }
+        metrics = Aggregator()
+        settings = {'parity_server': binary, 'metrics': metrics}
+        for name in options.scenario or sorted(SCENARIOS):
+            results['scenarios'][name] = SCENARIOS[name](settings, options)
+        # lifecycle steps and JSON-RPC calls across all scenarios
+        results['metrics'] = metrics.as_dict()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
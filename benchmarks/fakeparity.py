@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""a stand-in for the parity binary, for running the benchmarks without a real node
+
+It accepts the command line ParityServer builds, answers `-v`, and serves
+the JSON-RPC methods testing.parity uses over HTTP. Transactions are
+checked (signature, nonce, balance) and each one is mined into its own
+block, like parity's instantSeal engine. There is no EVM: a created
+contract's code is its init code. There is no p2p networking either, every
+node given as `--bootnodes` is reported as a peer. Its state is written to the data
+directory on SIGTERM, so `copy_data_from` works as well. `export blocks`
+and `import` use stdout and stdin, in a format of their own.
+
+Environment variables:
+
+FAKE_PARITY_VERSION     version reported by `-v` (default 2.5.8)
+FAKE_PARITY_BOOT_DELAY  seconds to wait before serving (default 0)
+"""
+import json
+import os
+import signal
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from testing.parity.crypto import keccak256
+from testing.parity.transactions import _decode, decode_transaction, rlp_encode
+
+DEFAULT_VERSION = '2.5.8'
+GAS_USED = 21000
+
+
+def install(directory):
+    """writes an executable `parity` into `directory` that runs this fake with the current python"""
+    path = os.path.join(directory, 'parity')
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\nexec "{}" "{}" "$@"\n'.format(sys.executable, os.path.abspath(__file__)))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _hex(value):
+    return hex(value)
+
+
+def _data(value):
+    return '0x' + value.hex()
+
+
+def _parse(value):
+    value = value[2:] if value.startswith('0x') else value
+    return bytes.fromhex(value)
+
+
+def _word(value):
+    return '0x{:064x}'.format(int(value, 16))
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super(RPCError, self).__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Chain(object):
+    def __init__(self, spec, state_file):
+        self.lock = threading.Lock()
+        self.state_file = state_file
+        self.network_id = int(spec['params']['networkID'], 16)
+        self.accounts = {}
+        for address, account in spec['accounts'].items():
+            self.accounts[address.lower()] = {'balance': int(account.get('balance', '0'), 0),
+                                              'nonce': int(account.get('nonce', '0'), 0),
+                                              'code': account.get('code', '0x'),
+                                              'storage': {_word(key): _word(value) for key, value
+                                                          in account.get('storage', {}).items()}}
+        self.peers = 0
+        self.start_nonce = int(spec['params'].get('accountStartNonce', '0x0'), 16)
+        self.blocks = [self._block(0, [])]
+        self.transactions = {}
+        self.state_diffs = {}
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                state = json.load(f)
+            self.accounts = state['accounts']
+            self.blocks = state['blocks']
+            self.transactions = state['transactions']
+            self.state_diffs = state['state_diffs']
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, 'w') as f:
+                json.dump({'accounts': self.accounts, 'blocks': self.blocks,
+                           'transactions': self.transactions, 'state_diffs': self.state_diffs}, f)
+
+    def _block(self, number, transactions):
+        parent = self.blocks[-1]['hash'] if number else '0x' + '00' * 32
+        block_hash = _data(keccak256(json.dumps([number, parent, transactions]).encode('ascii')))
+        return {'number': _hex(number), 'hash': block_hash, 'parentHash': parent,
+                'timestamp': _hex(int(time.time())), 'gasLimit': '0x7a1200',
+                'gasUsed': _hex(GAS_USED * len(transactions)), 'transactions': transactions}
+
+    def _account(self, address):
+        return self.accounts.setdefault(address, {'balance': 0, 'nonce': self.start_nonce, 'code': '0x',
+                                                  'storage': {}})
+
+    def get_block(self, number):
+        if number == 'latest' or number == 'pending':
+            return self.blocks[-1]
+        if number == 'earliest':
+            return self.blocks[0]
+        number = int(number, 16)
+        return self.blocks[number] if number < len(self.blocks) else None
+
+    def send_raw_transaction(self, raw_tx):
+        try:
+            tx = decode_transaction(_parse(raw_tx))
+        except ValueError as exc:
+            raise RPCError(-32602, "Invalid RLP data: {}".format(exc))
+        if tx['network_id'] is not None and tx['network_id'] != self.network_id:
+            raise RPCError(-32010, "Invalid chain id.")
+        with self.lock:
+            sender = self._account(tx['sender'].hex())
+            if tx['nonce'] < sender['nonce']:
+                raise RPCError(-32010, "Transaction nonce is too low. Try incrementing the nonce.")
+            if tx['nonce'] > sender['nonce']:
+                raise RPCError(-32010, "Transaction nonce is too high.")
+            cost = tx['value'] + tx['gasprice'] * GAS_USED
+            if cost > sender['balance']:
+                raise RPCError(-32010, "Insufficient funds.")
+            state_diff = {_data(tx['sender']): {
+                'balance': {'*': {'from': _hex(sender['balance']), 'to': _hex(sender['balance'] - cost)}},
+                'nonce': {'*': {'from': _hex(sender['nonce']), 'to': _hex(sender['nonce'] + 1)}},
+                'code': '=', 'storage': {}}}
+            sender['nonce'] += 1
+            sender['balance'] -= cost
+            contract_address = None
+            if tx['to'] is not None:
+                self._account(tx['to'].hex())['balance'] += tx['value']
+            else:
+                contract_address = keccak256(rlp_encode([tx['sender'], tx['nonce']]))[12:]
+                self.accounts[contract_address.hex()] = {'balance': tx['value'], 'nonce': self.start_nonce,
+                                                         'code': _data(tx['data']), 'storage': {}}
+                state_diff[_data(contract_address)] = {
+                    'balance': {'+': _hex(tx['value'])}, 'nonce': {'+': _hex(self.start_nonce)},
+                    'code': {'+': _data(tx['data'])}, 'storage': {}}
+            tx_hash = _data(tx['hash'])
+            self.state_diffs[tx_hash] = state_diff
+            block = self._block(len(self.blocks), [tx_hash])
+            self.blocks.append(block)
+            self.transactions[tx_hash] = {
+                'hash': tx_hash, 'nonce': _hex(tx['nonce']), 'from': _data(tx['sender']),
+                'to': _data(tx['to']) if tx['to'] is not None else None, 'value': _hex(tx['value']),
+                'gas': _hex(tx['startgas']), 'gasPrice': _hex(tx['gasprice']), 'input': _data(tx['data']),
+                'blockNumber': block['number'], 'blockHash': block['hash'], 'transactionIndex': '0x0',
+                'contractAddress': _data(contract_address) if contract_address is not None else None,
+                'raw': raw_tx}
+            return tx_hash
+
+    def receipt(self, tx_hash):
+        tx = self.transactions.get(tx_hash.lower())
+        if tx is None:
+            return None
+        return {'transactionHash': tx['hash'], 'blockNumber': tx['blockNumber'], 'blockHash': tx['blockHash'],
+                'transactionIndex': '0x0', 'from': tx['from'], 'to': tx['to'], 'status': '0x1',
+                'gasUsed': _hex(GAS_USED), 'cumulativeGasUsed': _hex(GAS_USED),
+                'contractAddress': tx['contractAddress'],
+                'logs': []}
+
+    def call(self, method, params):
+        if method == 'net_version':
+            return str(self.network_id)
+        if method == 'eth_chainId':
+            return _hex(self.network_id)
+        if method == 'net_peerCount':
+            return _hex(self.peers)
+        if method == 'web3_clientVersion':
+            return 'Parity-Ethereum//v{}-fake'.format(os.environ.get('FAKE_PARITY_VERSION', DEFAULT_VERSION))
+        if method == 'eth_blockNumber':
+            return _hex(len(self.blocks) - 1)
+        if method == 'eth_gasPrice':
+            return _hex(20000000000)
+        if method == 'eth_getBalance':
+            return _hex(self.accounts.get(params[0][2:].lower(), {}).get('balance', 0))
+        if method == 'eth_getTransactionCount':
+            return _hex(self.accounts.get(params[0][2:].lower(), {}).get('nonce', self.start_nonce))
+        if method == 'eth_getCode':
+            return self.accounts.get(params[0][2:].lower(), {}).get('code', '0x')
+        if method == 'eth_getStorageAt':
+            storage = self.accounts.get(params[0][2:].lower(), {}).get('storage', {})
+            return storage.get(_word(params[1]), '0x' + '00' * 32)
+        if method == 'eth_getBlockByNumber':
+            return self.get_block(params[0])
+        if method == 'eth_sendRawTransaction':
+            return self.send_raw_transaction(params[0])
+        if method == 'eth_getTransactionByHash':
+            return self.transactions.get(params[0].lower())
+        if method == 'eth_getTransactionReceipt':
+            return self.receipt(params[0])
+        if method == 'trace_replayTransaction':
+            if params[0].lower() not in self.state_diffs:
+                raise RPCError(-32000, "Transaction not found")
+            return {'output': '0x', 'trace': [], 'vmTrace': None,
+                    'stateDiff': self.state_diffs[params[0].lower()] if 'stateDiff' in params[1] else None}
+        if method == 'eth_call':
+            return '0x'
+        raise RPCError(-32601, "Method not found")
+
+
+def export_blocks(chain, args, stream):
+    """writes the blocks from `--from` to `--to` as RLP items of the block (as JSON) and its raw transactions"""
+    first = int(_option(args, '--from') or 1)
+    last = _option(args, '--to') or 'latest'
+    last = len(chain.blocks) - 1 if last == 'latest' else int(last)
+    for block in chain.blocks[first:last + 1]:
+        raw_txs = [_parse(chain.transactions[tx_hash]['raw']) for tx_hash in block['transactions']]
+        stream.write(rlp_encode([json.dumps(block).encode('utf-8'), raw_txs]))
+
+
+def import_blocks(chain, stream):
+    """mines the transactions of the exported blocks that are not in the chain yet"""
+    data = stream.read()
+    position = 0
+    while position < len(data):
+        (block, raw_txs), position = _decode(data, position)
+        if int(json.loads(block.decode('utf-8'))['number'], 16) < len(chain.blocks):
+            continue
+        for raw_tx in raw_txs:
+            chain.send_raw_transaction(_data(raw_tx))
+
+
+def _handle(chain, request):
+    response = {"jsonrpc": "2.0", "id": request.get('id')}
+    try:
+        response['result'] = chain.call(request['method'], request.get('params', []))
+    except RPCError as exc:
+        response['error'] = {"code": exc.code, "message": exc.message}
+    except Exception as exc:
+        response['error'] = {"code": -32602, "message": "Invalid params: {}".format(exc)}
+    return response
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        if isinstance(request, list):
+            response = [_handle(self.server.chain, r) for r in request]
+        else:
+            response = _handle(self.server.chain, request)
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _option(args, *names):
+    for name in names:
+        if name in args:
+            return args[args.index(name) + 1]
+    return None
+
+
+def main(args):
+    command = None
+    if args and args[0] in ('export', 'import'):
+        command, args = args[0], args[1:]
+        if args and args[0] == 'blocks':
+            args = args[1:]
+    if '-v' in args or '--version' in args:
+        sys.stderr.write("Parity Ethereum\n  version Parity-Ethereum/v{}-stable-fake/x86_64-linux-gnu/rustc1.37.0\n"
+                         .format(os.environ.get('FAKE_PARITY_VERSION', DEFAULT_VERSION)))
+        return 0
+
+    with open(_option(args, '--chain')) as f:
+        spec = json.load(f)
+    data_dir = _option(args, '--base-path', '--datadir')
+    chain = Chain(spec, os.path.join(data_dir, 'chains', 'fake', 'state.json'))
+    if command == 'export':
+        export_blocks(chain, args, sys.stdout.buffer)
+        return 0
+    if command == 'import':
+        import_blocks(chain, sys.stdin.buffer)
+        chain.save()
+        return 0
+    time.sleep(float(os.environ.get('FAKE_PARITY_BOOT_DELAY', '0')))
+
+    server = Server(('127.0.0.1', int(_option(args, '--jsonrpc-port', '--rpcport'))), Handler)
+    server.chain = chain
+    bootnodes = _option(args, '--bootnodes')
+    chain.peers = len(bootnodes.split(',')) if bootnodes else 0
+
+    def shutdown(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    sys.stderr.write("Public node URL: enode://{}@127.0.0.1:{}\n".format('00' * 64, _option(args, '--port')))
+    sys.stderr.flush()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        chain.save()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+"""measures how long `import testing.parity` takes in a fresh interpreter
+
+Usage: python benchmarks/import_time.py [runs]
+
+Prints the median cumulative import time (in ms) of testing.parity, and of
+the packages it used to import at module level (py_ecc and ethereum) where
+those are installed, as JSON.
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ['testing.parity', 'py_ecc.secp256k1', 'ethereum.utils']
+
+
+def import_time(module):
+    """returns the cumulative import time of `module` in ms, or None if it can't be imported"""
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if p.returncode != 0:
+        return None
+    for line in p.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    return None
+
+
+def main(runs=10):
+    results = {}
+    for module in MODULES:
+        samples = [import_time(module) for _ in range(runs)]
+        if None in samples:
+            results[module] = None
+        else:
+            results[module] = statistics.median(samples)
+    print(json.dumps({'runs': runs, 'import_ms': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,150 @@
+import time
+
+from testing.parity import DEFAULT_GASPRICE, DEFAULT_STARTGAS, ParityServer
+from testing.parity.crypto import privtoaddr
+from testing.parity.load import LoadGenerator
+from testing.parity.metrics import Histogram
+from testing.parity.transactions import sign_transaction
+
+__all__ = ['SCENARIOS']
+
+# accounts the load scenario sends from
+LOAD_SENDERS = 4
+
+
+def _rate(count, elapsed):
+    return count / elapsed if elapsed > 0 else None
+
+
+def cold_start(settings, options):
+    """boots a new node from an empty data directory"""
+    boot = Histogram()
+    phases = {}
+    for _ in range(options.runs):
+        started_at = time.time()
+        server = ParityServer(**settings)
+        boot.record(time.time() - started_at)
+        for phase, elapsed in server.boot_timings.items():
+            phases.setdefault(phase, Histogram()).record(elapsed)
+        server.stop()
+    return {'boot': boot.as_dict(),
+            'boot_timings': {phase: histogram.as_dict() for phase, histogram in phases.items()}}
+
+
+def warm_start(settings, options):
+    """boots a new node from a copy of an initialized data directory (`copy_data_from`)"""
+    template = ParityServer(**settings)
+    try:
+        template.pause()
+        boot = Histogram()
+        for _ in range(options.runs):
+            started_at = time.time()
+            server = ParityServer(copy_data_from=template.get_data_directory(), **settings)
+            boot.record(time.time() - started_at)
+            server.stop()
+    finally:
+        template.stop()
+    return {'boot': boot.as_dict()}
+
+
+def stop(settings, options):
+    """stops a running node and removes its data"""
+    latency = Histogram()
+    for _ in range(options.runs):
+        server = ParityServer(**settings)
+        started_at = time.time()
+        server.stop()
+        latency.record(time.time() - started_at)
+    return {'stop': latency.as_dict()}
+
+
+def rpc_sequential(settings, options):
+    """calls eth_blockNumber one request at a time"""
+    with ParityServer(**settings) as server:
+        client = server.client()
+        latency = Histogram()
+        started_at = time.time()
+        for _ in range(options.calls):
+            call_started_at = time.time()
+            client.block_number()
+            latency.record(time.time() - call_started_at)
+        elapsed = time.time() - started_at
+    return {'calls': options.calls, 'seconds': elapsed, 'calls_per_second': _rate(options.calls, elapsed),
+            'latency': latency.as_dict()}
+
+
+def rpc_batched(settings, options):
+    """calls eth_blockNumber in JSON-RPC batches of `batch_size`"""
+    with ParityServer(**settings) as server:
+        client = server.client()
+        latency = Histogram()
+        started_at = time.time()
+        remaining = options.calls
+        while remaining:
+            size = min(options.batch_size, remaining)
+            batch_started_at = time.time()
+            with client.batch() as batch:
+                futures = [batch.block_number() for _ in range(size)]
+            for future in futures:
+                future.result()
+            latency.record(time.time() - batch_started_at)
+            remaining -= size
+        elapsed = time.time() - started_at
+    return {'calls': options.calls, 'batch_size': options.batch_size, 'seconds': elapsed,
+            'calls_per_second': _rate(options.calls, elapsed), 'batch_latency': latency.as_dict()}
+
+
+def send_raw_transactions(settings, options):
+    """submits pre-signed value transfers one at a time under instantSeal, then waits for them to be mined"""
+    settings = dict(settings, instant_seal=True, ethash=False)
+    with ParityServer(**settings) as server:
+        client = server.client()
+        key = server.get_faucet_private_key()
+        sender = '0x' + privtoaddr(key).hex()
+        nonce = client.get_transaction_count(sender)
+
+        started_at = time.time()
+        raw_txs = [sign_transaction(key, nonce + i, DEFAULT_GASPRICE, DEFAULT_STARTGAS, b'\x01' * 20, 1,
+                                    network_id=server.network_id)
+                   for i in range(options.transactions)]
+        signing = time.time() - started_at
+
+        latency = Histogram()
+        tx_hashes = []
+        started_at = time.time()
+        for raw_tx in raw_txs:
+            call_started_at = time.time()
+            tx_hashes.append(client.send_raw_transaction(raw_tx))
+            latency.record(time.time() - call_started_at)
+        submitted = time.time() - started_at
+        server.wait_for_receipts(tx_hashes, timeout=max(30.0, options.transactions * 0.1))
+        mined = time.time() - started_at
+    return {'transactions': options.transactions, 'signing_seconds': signing,
+            'submit_seconds': submitted, 'submitted_per_second': _rate(options.transactions, submitted),
+            'mined_seconds': mined, 'mined_per_second': _rate(options.transactions, mined),
+            'submit_latency': latency.as_dict()}
+
+
+def load(settings, options):
+    """signs transfers from several accounts in worker processes and submits them in batches at `rate`"""
+    settings = dict(settings, instant_seal=True, ethash=False, prefunded_accounts=LOAD_SENDERS)
+    with ParityServer(**settings) as server:
+        generator = LoadGenerator(server, server.get_prefunded_private_keys())
+        started_at = time.time()
+        raw_txs = generator.sign(options.transactions, processes=options.processes)
+        signing = time.time() - started_at
+        report = generator.run(raw_txs, rate=options.rate, batch_size=options.batch_size,
+                               timeout=max(30.0, options.transactions * 0.1))
+    report['signing_seconds'] = signing
+    return report
+
+
+SCENARIOS = {
+    'cold_start': cold_start,
+    'warm_start': warm_start,
+    'stop': stop,
+    'rpc_sequential': rpc_sequential,
+    'rpc_batched': rpc_batched,
+    'send_raw_transactions': send_raw_transactions,
+    'load': load,
+}
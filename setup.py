@@ -6,22 +6,25 @@ classifiers = [
     "Intended Audience :: Developers",
     "License :: OSI Approved :: Apache Software License",
     "Programming Language :: Python",
-    "Programming Language :: Python :: 2.6",
-    "Programming Language :: Python :: 2.7",
-    "Programming Language :: Python :: 3.2",
-    "Programming Language :: Python :: 3.3",
-    "Programming Language :: Python :: 3.4",
-    "Programming Language :: Python :: 3.5",
+    "Programming Language :: Python :: 3",
+    "Programming Language :: Python :: 3 :: Only",
+    "Programming Language :: Python :: 3.7",
+    "Programming Language :: Python :: 3.8",
+    "Programming Language :: Python :: 3.9",
+    "Programming Language :: Python :: 3.10",
+    "Programming Language :: Python :: 3.11",
     "Topic :: Database",
     "Topic :: Software Development",
     "Topic :: Software Development :: Testing",
 ]
 
 install_requires = [
-    'testing.common.database >= 1.1.0',
-    'py_ecc',
-    'ethereum'
+    'testing.common.database >= 1.1.0'
 ]
+extras_require = {
+    # a C implementation of keccak, for deriving many prefunded accounts
+    'fast': ['pycryptodome']
+}
 tests_require = [
     'nose'
 ]
@@ -37,9 +40,11 @@ setup(
     author_email='mail@tristan.sh',
     url='https://github.com/tristan/testing.parity',
     license='Apache License 2.0',
-    packages=['testing'],
+    python_requires='>=3.7',
+    packages=['testing', 'testing.parity'],
     include_package_data=True,
     install_requires=install_requires,
+    extras_require=extras_require,
     tests_require=tests_require,
     test_suite='nose.collector',
     namespace_packages=['testing']
@@ -0,0 +1,25 @@
+import importlib
+
+from testing.parity.server import (
+    ParityServer, ParityServerFactory, get_parity_version, clear_version_cache,
+    DEFAULT_STARTGAS, DEFAULT_GASPRICE
+)
+from testing.parity.rpc import JSONRPCClient, JSONRPCError
+
+__all__ = ['ParityServer', 'ParityServerFactory', 'ParityServerPool', 'ParityNetwork',
+           'JSONRPCClient', 'JSONRPCError', 'AsyncParityServer', 'AsyncJSONRPCClient',
+           'get_parity_version', 'clear_version_cache', 'DEFAULT_STARTGAS', 'DEFAULT_GASPRICE']
+
+# imported on first use, so that `import testing.parity` stays cheap
+_lazy = {
+    'ParityServerPool': 'testing.parity.pool',
+    'ParityNetwork': 'testing.parity.network',
+    'AsyncParityServer': 'testing.parity.aio',
+    'AsyncJSONRPCClient': 'testing.parity.aio',
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        return getattr(importlib.import_module(_lazy[name]), name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
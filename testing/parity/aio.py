@@ -0,0 +1,224 @@
+import asyncio
+import functools
+import itertools
+import json
+import signal
+import time
+import urllib.parse
+
+from testing.parity.metrics import Histogram, get_metrics_sink
+from testing.parity.rpc import JSONRPCError, _Methods
+from testing.parity.server import ParityServer
+
+__all__ = ['AsyncParityServer', 'AsyncJSONRPCClient']
+
+
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncJSONRPCClient(_Methods):
+    """asyncio JSON-RPC client over persistent HTTP/1.1 connections
+
+    Has the same helpers as `JSONRPCClient`, as coroutines.
+    """
+
+    def __init__(self, url, timeout=30.0, max_connections=8, metrics=None):
+        parsed = urllib.parse.urlsplit(url)
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = parsed.path or '/'
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.metrics = metrics
+        self.latencies = {}
+
+        self._ids = itertools.count(1)
+        self._idle = []
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return _Connection(reader, writer)
+
+    async def _roundtrip(self, connection, body):
+        connection.writer.write(
+            "POST {} HTTP/1.1\r\n"
+            "Host: {}:{}\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {}\r\n"
+            "\r\n".format(self.path, self.host, self.port, len(body)).encode('latin-1') + body)
+        await connection.writer.drain()
+
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        headers = {}
+        while True:
+            line = await connection.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await connection.reader.readline()).split(b';')[0], 16)
+                chunk = await connection.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                data += chunk[:-2]
+        elif 'content-length' in headers:
+            data = await connection.reader.readexactly(int(headers['content-length']))
+        else:
+            data = await connection.reader.read()
+            headers['connection'] = 'close'
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return int(status), reason, data, keep_alive
+
+    async def _post(self, body):
+        reused = bool(self._idle)
+        connection = self._idle.pop() if reused else await self._connect()
+        try:
+            try:
+                status, reason, data, keep_alive = await self._roundtrip(connection, body)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                connection.close()
+                connection = await self._connect()
+                status, reason, data, keep_alive = await self._roundtrip(connection, body)
+        except BaseException:
+            connection.close()
+            raise
+        if keep_alive and len(self._idle) < self.max_connections:
+            self._idle.append(connection)
+        else:
+            connection.close()
+        if status != 200:
+            raise IOError("HTTP {} {}: {}".format(status, reason, data.decode('utf-8', 'replace')))
+        return json.loads(data.decode('utf-8'))
+
+    async def _call(self, method, params, convert=None):
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+        started_at = time.time()
+        response = await asyncio.wait_for(self._post(json.dumps(payload).encode('utf-8')), self.timeout)
+        elapsed = time.time() - started_at
+        self.latencies.setdefault(method, Histogram()).record(elapsed)
+        (self.metrics or get_metrics_sink()).timing('rpc.' + method, elapsed)
+        if response.get('error') is not None:
+            raise JSONRPCError(response['error'])
+        result = response.get('result')
+        return result if convert is None else convert(result)
+
+    def latency_stats(self):
+        return {method: histogram.as_dict() for method, histogram in self.latencies.items()}
+
+    def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+class AsyncParityServer(object):
+    """asyncio counterpart of ParityServer
+
+    Takes the same settings. The node is a `ParityServer` created with
+    `auto_start=0` (available as `server`), whose blocking steps (probing
+    the parity version, setting up directories, booting with its port
+    retries, stopping) run in the event loop's default executor, so that
+    many nodes can boot concurrently::
+
+        nodes = [AsyncParityServer() for _ in range(4)]
+        await asyncio.gather(*(node.start() for node in nodes))
+
+    `terminate()` keeps the data directory for the next `start()`; after
+    `stop()` removed it, `start()` sets up a fresh node with a new `server`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['auto_start'] = 0
+        self.settings = kwargs
+        self.server = None
+        self._client = None
+        self._cleaned_up = False
+
+    def _run(self, func, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def start(self):
+        if self.server is None or self._cleaned_up:
+            server = await self._run(ParityServer, **self.settings)
+            try:
+                await self._run(server.setup)
+            except BaseException:
+                await self._run(server.cleanup)
+                raise
+            self.server = server
+            self._cleaned_up = False
+            self._client = None
+        await self._run(self.server.start)
+
+    async def terminate(self, _signal=signal.SIGTERM):
+        """stops the parity process, without removing its data"""
+        if self._client is not None:
+            self._client.close()
+        if self.server is not None:
+            await self._run(self.server.terminate, _signal)
+
+    async def stop(self, _signal=signal.SIGTERM):
+        if self._client is not None:
+            self._client.close()
+        if self.server is not None and not self._cleaned_up:
+            await self._run(self.server.stop, _signal)
+            self._cleaned_up = True
+
+    @property
+    def boot_timings(self):
+        return self.server.boot_timings if self.server is not None else {}
+
+    def is_alive(self):
+        return self.server is not None and self.server.is_alive()
+
+    @property
+    def server_pid(self):
+        return self.server.server_pid if self.server is not None else None
+
+    def client(self):
+        """returns an AsyncJSONRPCClient for this node, shared by all callers"""
+        if self._client is None:
+            self._client = AsyncJSONRPCClient(self.url(), metrics=self.server.settings['metrics'])
+        return self._client
+
+    def url(self):
+        return self.server.url()
+
+    def ws_url(self):
+        return self.server.ws_url()
+
+    def dsn(self, **kwargs):
+        return self.server.dsn(**kwargs)
+
+    def get_faucet_private_key(self):
+        return self.server.get_faucet_private_key()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
@@ -0,0 +1,259 @@
+"""building parity chain specs
+
+The tables below are shared and never modified: a spec is assembled with
+`merge`, which only copies the dicts along the paths it changes. Specs are
+memoized, serialized, per version bucket, engine, genesis parameters,
+faucet, accounts and overrides.
+"""
+import functools
+import hashlib
+import json
+import os
+import tempfile
+
+__all__ = ['build_chain_spec', 'merge', 'ChainSpecFile']
+
+FAUCET_BALANCE = "1606938044258990275541962092341162602522202993782792835301376"
+ACCOUNT_NONCE = "1048576"
+
+# https://wiki.parity.io/Chain-specification
+ethash_engine = {
+    "Ethash": {
+        "params": {
+            "minimumDifficulty": "$difficulty",
+            "difficultyBoundDivisor": "0x0800",
+            "durationLimit": "0x0a",
+            "homesteadTransition": "0x0"
+        }
+    }
+}
+ethash_genesis = {
+    "seal": {
+        "ethereum": {
+            "nonce": "0x00006d6f7264656e",
+            "mixHash": "0x00000000000000000000000000000000000000647572616c65787365646c6578"
+        }
+    },
+    "author": "0x0000000000000000000000000000000000000000",
+    "timestamp": "0x00",
+    "parentHash": "0x0000000000000000000000000000000000000000000000000000000000000000",
+    "extraData": "0x",
+    "gasLimit": "0x2fefd8"
+}
+instant_engine = {
+    "instantSeal": {
+        "params": {}
+    }
+}
+instant_genesis = {
+    "seal": {
+        "generic": "0x0"
+    },
+    "difficulty": "0x20000",
+    "author": "0x0000000000000000000000000000000000000000",
+    "timestamp": "0x00",
+    "parentHash": "0x0000000000000000000000000000000000000000000000000000000000000000",
+    "extraData": "0x",
+    "gasLimit": "0x7A1200"
+}
+chain_json_params_2_5_7 = {
+    "gasLimitBoundDivisor": "0x0400",
+    "accountStartNonce": "0x0100000",
+    "maximumExtraDataSize": "0x20",
+    "minGasLimit": "0x1388",
+    "eip150Transition": "0x0",
+    "eip160Transition": "0x0",
+    "eip161abcTransition": "0x0",
+    "eip161dTransition": "0x0",
+    "eip155Transition": "0x0",
+    "eip140Transition": "0x0",
+    "eip211Transition": "0x0",
+    "eip214Transition": "0x0",
+    "eip658Transition": "0x0",
+    "eip145Transition": "0x0",
+    "eip1014Transition": "0x0",
+    "eip1052Transition": "0x0",
+    "wasmActivationTransition": "0x0"
+}
+chain_json_params_2_5_8 = {
+    "gasLimitBoundDivisor": "0x0400",
+    "accountStartNonce": "0x0100000",
+    "maximumExtraDataSize": "0x20",
+    "minGasLimit": "0x1388",
+    "eip150Transition": "0x0",
+    "eip160Transition": "0x0",
+    "eip161abcTransition": "0x0",
+    "eip161dTransition": "0x0",
+    "eip155Transition": "0x0",
+    "eip98Transition": "0x7fffffffffffff",
+    "maxCodeSize": 24576,
+    "maxCodeSizeTransition": "0x0",
+    "eip140Transition": "0x0",
+    "eip211Transition": "0x0",
+    "eip214Transition": "0x0",
+    "eip658Transition": "0x0",
+    "eip145Transition": "0x0",
+    "eip1014Transition": "0x0",
+    "eip1052Transition": "0x0",
+    "wasmActivationTransition": "0x0"
+}
+
+chain_json_accounts_2_5_7 = {
+    "0000000000000000000000000000000000000001": {"balance": "1", "builtin": {"name": "ecrecover", "pricing": {"linear": {"base": 3000, "word": 0}}}},
+    "0000000000000000000000000000000000000002": {"balance": "1", "builtin": {"name": "sha256", "pricing": {"linear": {"base": 60, "word": 12}}}},
+    "0000000000000000000000000000000000000003": {"balance": "1", "builtin": {"name": "ripemd160", "pricing": {"linear": {"base": 600, "word": 120}}}},
+    "0000000000000000000000000000000000000004": {"balance": "1", "builtin": {"name": "identity", "pricing": {"linear": {"base": 15, "word": 3}}}},
+    "0000000000000000000000000000000000000005": {"builtin": {"name": "modexp", "activate_at": "0x0", "pricing": {"modexp": {"divisor": 2}}}},
+    "0000000000000000000000000000000000000006": {"builtin": {"name": "alt_bn128_add", "activate_at": "0x0", "pricing": {"linear": {"base": 500, "word": 0}}}},
+    "0000000000000000000000000000000000000007": {"builtin": {"name": "alt_bn128_mul", "activate_at": "0x0", "pricing": {"linear": {"base": 40000, "word": 0}}}},
+    "0000000000000000000000000000000000000008": {"builtin": {"name": "alt_bn128_pairing", "activate_at": "0x0", "pricing": {"alt_bn128_pairing": {"base": 100000, "pair": 80000}}}}
+}
+
+chain_json_accounts_2_5_8 = {
+    "0000000000000000000000000000000000000001": {"balance": "1", "builtin": {"name": "ecrecover", "pricing": {"linear": {"base": 3000, "word": 0}}}},
+    "0000000000000000000000000000000000000002": {"balance": "1", "builtin": {"name": "sha256", "pricing": {"linear": {"base": 60, "word": 12}}}},
+    "0000000000000000000000000000000000000003": {"balance": "1", "builtin": {"name": "ripemd160", "pricing": {"linear": {"base": 600, "word": 120}}}},
+    "0000000000000000000000000000000000000004": {"balance": "1", "builtin": {"name": "identity", "pricing": {"linear": {"base": 15, "word": 3}}}},
+    "0000000000000000000000000000000000000005": {"balance": "1", "builtin": {"name": "modexp", "activate_at": 0, "pricing": {"modexp": {"divisor": 20}}}},
+    "0000000000000000000000000000000000000006": {
+        "balance": "1",
+        "builtin": {
+            "name": "alt_bn128_add",
+            "activate_at": 0,
+            "eip1108_transition": "0x7fffffffffffff",
+            "pricing": {
+                "alt_bn128_const_operations": {
+                    "price": 500,
+                    "eip1108_transition_price": 150
+                }
+            }
+        }
+    },
+    "0000000000000000000000000000000000000007": {
+        "balance": "1",
+        "builtin": {
+            "name": "alt_bn128_mul",
+            "activate_at": 0,
+            "eip1108_transition": "0x7fffffffffffff",
+            "pricing": {
+                "alt_bn128_const_operations": {
+                    "price": 40000,
+                    "eip1108_transition_price": 6000
+                }
+            }
+        }
+    },
+    "0000000000000000000000000000000000000008": {
+        "balance": "1",
+        "builtin": {
+            "name": "alt_bn128_pairing",
+            "activate_at": 0,
+            "eip1108_transition": "0x7fffffffffffff",
+            "pricing": {
+                "alt_bn128_pairing": {
+                    "base": 100000,
+                    "pair": 80000,
+                    "eip1108_transition_base": 45000,
+                    "eip1108_transition_pair": 34000
+                }
+            }
+        }
+    }
+}
+
+
+def version_bucket(version):
+    """returns the oldest parity version whose chain spec format `version` uses"""
+    if version >= (2, 5, 8):
+        return (2, 5, 8)
+    return (2, 5, 7)
+
+
+def merge(base, overrides):
+    """returns `base` with `overrides` merged in recursively, sharing everything not overridden"""
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@functools.lru_cache(maxsize=32)
+def _build_chain_spec(bucket, engine, difficulty, author, network_id, faucet, accounts, overrides):
+    if bucket >= (2, 5, 8):
+        params, builtins = chain_json_params_2_5_8, chain_json_accounts_2_5_8
+    else:
+        params, builtins = chain_json_params_2_5_7, chain_json_accounts_2_5_7
+    if engine == 'ethash':
+        engine_spec = {"Ethash": merge(ethash_engine["Ethash"], {"difficulty": difficulty})}
+        genesis = ethash_genesis
+    elif engine == 'instant_seal':
+        engine_spec = instant_engine
+        genesis = instant_genesis
+    else:
+        raise Exception("No selected engine")
+
+    chain_accounts = dict(builtins)
+    chain_accounts[faucet] = {"balance": FAUCET_BALANCE, "nonce": ACCOUNT_NONCE}
+    for address, balance in accounts:
+        chain_accounts[address] = {"balance": str(balance), "nonce": ACCOUNT_NONCE}
+
+    chain = {
+        "name": "testing.parity.dev",
+        "params": merge(params, {"networkID": hex(network_id)}),
+        "accounts": chain_accounts,
+        "engine": engine_spec,
+        "genesis": merge(genesis, {"author": author, "difficulty": difficulty})
+    }
+    if overrides is not None:
+        chain = merge(chain, json.loads(overrides))
+    return json.dumps(chain).encode('utf-8')
+
+
+def build_chain_spec(version, engine, difficulty, author, network_id, faucet, accounts=(), overrides=None):
+    """returns the serialized chain spec
+
+    `engine` is 'instant_seal' or 'ethash', `faucet` the hex address funded
+    with (practically) unlimited ether, `accounts` a sequence of (hex address,
+    balance) to fund and `overrides` a dict merged into the spec. Returns the
+    same bytes object for the same arguments without building it again.
+    """
+    if author.startswith("0x"):
+        author = author[2:]
+    if overrides:
+        overrides = json.dumps(overrides, sort_keys=True)
+    else:
+        overrides = None
+    return _build_chain_spec(version_bucket(version), engine, difficulty, "0x" + author,
+                             network_id, faucet, tuple(accounts), overrides)
+
+
+class ChainSpecFile(object):
+    """a chain spec on disk that is only rewritten when its content changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.digest = None
+
+    def _current_digest(self):
+        if self.digest is None:
+            try:
+                with open(self.path, 'rb') as f:
+                    self.digest = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                return None
+        return self.digest
+
+    def write(self, spec):
+        """writes `spec` unless the file holds it already, returns whether it was written"""
+        digest = hashlib.sha1(spec).hexdigest()
+        if digest == self._current_digest() and os.path.exists(self.path):
+            return False
+        fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(spec)
+        os.replace(tmpname, self.path)
+        self.digest = digest
+        return True
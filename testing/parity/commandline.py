@@ -0,0 +1,137 @@
+"""the parity command line, as a table of flags per setting and version range
+
+Each `Flag` says which arguments a setting turns into, for which parity
+versions and under which condition. `compile_flags` picks the flags of
+one version once and returns a `CommandLineBuilder` for it, so supporting
+another version (or client) only takes new table entries.
+"""
+import functools
+
+__all__ = ['Flag', 'FLAGS', 'CommandLineBuilder', 'compile_flags', 'INSTANCE_OPTIONS']
+
+# conditions on the value of a flag's setting
+ALWAYS = 'always'
+IS_SET = 'set'          # not None
+IS_UNSET = 'unset'      # None
+IS_TRUE = 'true'        # truthy
+
+
+class Flag(object):
+    """the arguments `args` for `setting`, formatted with its value
+
+    Applies to parity versions from `since` (inclusive) up to `until`
+    (exclusive). A setting of None is replaced by `default` first. `when`
+    is one of the conditions above, or a function of all the values.
+    `instance` marks options whose values differ between nodes without
+    changing what parity writes to its database.
+    """
+
+    def __init__(self, setting, args, since=None, until=None, default=None, when=IS_SET, instance=False):
+        self.setting = setting
+        self.args = tuple(args)
+        self.since = since
+        self.until = until
+        self.default = default
+        self.when = ALWAYS if setting is None and when == IS_SET else when
+        self.instance = instance
+
+    def supports(self, version):
+        return ((self.since is None or version >= self.since) and
+                (self.until is None or version < self.until))
+
+
+FLAGS = (
+    Flag('port', ['--port', '{}'], instance=True),
+    Flag(None, ['--no-color']),
+    Flag('chain', ['--chain', '{}'], instance=True),
+    Flag('author', ['--author', '{}']),
+    Flag(None, ['--tracing', 'on']),
+    Flag('node_key', ['--node-key', '{}'], instance=True),
+
+    # block production: seal a block for every transaction right away
+    Flag('reseal_max_period', ['--reseal-max-period', '{}'], since=(2, 5, 8), default=0),
+    Flag('reseal_max_period', ['--reseal-max-period', '{}'], until=(2, 5, 8)),
+    Flag('reseal_min_period', ['--reseal-min-period', '{}'], since=(2, 5, 8), default=0),
+    Flag('reseal_min_period', ['--reseal-min-period', '{}'], until=(2, 5, 8)),
+    Flag('gas_limit', ['--gas-floor-target', '{}', '--gas-cap', '{}']),
+
+    Flag('tx_queue_size', ['--tx-queue-size', '{}']),
+    Flag('tx_queue_per_sender', ['--tx-queue-per-sender', '{}'], since=(1, 11, 0)),
+    Flag('tx_queue_mem_limit', ['--tx-queue-mem-limit', '{}'], since=(1, 11, 0)),
+
+    Flag('data_dir', ['--base-path', '{}'], since=(2, 2, 0), instance=True),
+    Flag('data_dir', ['--datadir', '{}', '--no-ui'], until=(2, 2, 0), instance=True),
+
+    Flag('jsonrpc_port', ['--jsonrpc-port', '{}', '--jsonrpc-hosts', 'all'], since=(1, 7, 0), instance=True),
+    Flag('jsonrpc_threads', ['--jsonrpc-threads', '{}'], since=(1, 7, 0)),
+    Flag('jsonrpc_server_threads', ['--jsonrpc-server-threads', '{}'], since=(1, 9, 0)),
+    Flag('ws_port', ['--no-ws'], since=(1, 7, 0), when=IS_UNSET),
+    Flag('ws_port', ['--ws-interface', 'local', '--ws-port', '{}', '--ws-origins', 'all', '--ws-hosts', 'all'],
+         since=(1, 7, 0), instance=True),
+    Flag('jsonrpc_port', ['--rpcport', '{}'], until=(1, 7, 0), instance=True),
+
+    Flag('no_dapps', ['--no-dapps'], when=IS_TRUE),
+    Flag('dapps_port', ['--dapps-port', '{}'], until=(1, 7, 0), when=lambda values: not values['no_dapps'],
+         instance=True),
+
+    Flag('min_gas_price', ['--min-gas-price', '{}'], since=(2, 2, 0), when=IS_TRUE),
+    Flag('min_gas_price', ['--gasprice', '{}'], until=(2, 2, 0), when=IS_TRUE),
+
+    Flag('bootnodes', ['--bootnodes', '{}'], instance=True),
+)
+
+# command line options whose values differ between instances without
+# affecting what parity writes to its database
+INSTANCE_OPTIONS = frozenset(arg for flag in FLAGS if flag.instance
+                             for arg, value in zip(flag.args, flag.args[1:]) if value == '{}')
+
+
+class CommandLineBuilder(object):
+    """builds the command line for one parity version from the flags that apply to it"""
+
+    def __init__(self, version, flags=FLAGS):
+        self.version = version
+        self.flags = tuple(flag for flag in flags if flag.supports(version))
+        supported = set(flag.setting for flag in self.flags)
+        # settings with flags for other versions only
+        self.unsupported = frozenset(flag.setting for flag in flags if flag.setting not in supported)
+
+    def validate(self, settings):
+        """raises a ValueError for settings that were given but aren't supported by this version"""
+        for setting in sorted(self.unsupported):
+            value = settings.get(setting)
+            if value is not None and value is not False:
+                raise ValueError("{} is not supported by parity {}".format(
+                    setting, '.'.join(str(i) for i in self.version)))
+
+    def build(self, values):
+        """returns the arguments for the given setting values"""
+        cmd = []
+        for flag in self.flags:
+            if flag.setting is None:
+                cmd.extend(flag.args)
+                continue
+            value = values.get(flag.setting)
+            if value is None:
+                value = flag.default
+            when = flag.when
+            if when == IS_SET:
+                if value is None:
+                    continue
+            elif when == IS_TRUE:
+                if not value:
+                    continue
+            elif when == IS_UNSET:
+                if value is not None:
+                    continue
+            elif when != ALWAYS and (value is None or not when(values)):
+                continue
+            value = str(value)
+            cmd.extend(arg.format(value) for arg in flag.args)
+        return cmd
+
+
+@functools.lru_cache(maxsize=None)
+def compile_flags(version):
+    """returns the (cached) CommandLineBuilder for the given parity version"""
+    return CommandLineBuilder(version)
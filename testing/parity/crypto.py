@@ -0,0 +1,319 @@
+"""secp256k1 keys, signatures and keccak addresses without external dependencies
+
+Keccak-256 is taken from pycryptodome or pysha3 when one of them is
+installed, otherwise a pure python implementation is used. The backend is
+only looked up when the first hash is computed.
+"""
+import binascii
+import functools
+import hashlib
+import hmac
+
+__all__ = ['privtopub', 'privtoaddr', 'pubtoaddr', 'keccak256', 'sign', 'recover',
+           'derive_private_keys', 'derive_accounts']
+
+# secp256k1 domain parameters
+P = 2 ** 256 - 2 ** 32 - 977
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+     0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+
+def encode_int32(value):
+    return value.to_bytes(32, 'big')
+
+
+def decode_hex(value):
+    if value.startswith(('0x', '0X')):
+        value = value[2:]
+    return binascii.a2b_hex(value)
+
+
+def _inv(value):
+    return pow(value, P - 2, P)
+
+
+def _double(point):
+    x, y, z = point
+    if y == 0:
+        return (0, 0, 0)
+    ysq = y * y % P
+    s = 4 * x * ysq % P
+    m = 3 * x * x % P
+    nx = (m * m - 2 * s) % P
+    ny = (m * (s - nx) - 8 * ysq * ysq) % P
+    nz = 2 * y * z % P
+    return (nx, ny, nz)
+
+
+def _add(p, q):
+    x1, y1, z1 = p
+    x2, y2, z2 = q
+    if z1 == 0:
+        return q
+    if z2 == 0:
+        return p
+    z1z1 = z1 * z1 % P
+    z2z2 = z2 * z2 % P
+    u1 = x1 * z2z2 % P
+    u2 = x2 * z1z1 % P
+    s1 = y1 * z2 * z2z2 % P
+    s2 = y2 * z1 * z1z1 % P
+    if u1 == u2:
+        if s1 != s2:
+            return (0, 0, 0)
+        return _double(p)
+    h = u2 - u1
+    r = s2 - s1
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    ny = (r * (v - nx) - s1 * hhh) % P
+    nz = h * z1 * z2 % P
+    return (nx, ny, nz)
+
+
+def _multiply(scalar, point=G):
+    result = (0, 0, 0)
+    addend = (point[0], point[1], 1)
+    while scalar:
+        if scalar & 1:
+            result = _add(result, addend)
+        addend = _double(addend)
+        scalar >>= 1
+    return result
+
+
+def _affine(point):
+    x, y, z = point
+    z_inv = _inv(z)
+    z_inv2 = z_inv * z_inv % P
+    return (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+
+
+def privtopub(private_key):
+    """returns the public key point (x, y) of the given private key (as bytes)"""
+    scalar = int.from_bytes(private_key, 'big')
+    if not 0 < scalar < N:
+        raise ValueError("invalid private key")
+    return _affine(_multiply(scalar))
+
+
+def _inv_n(value):
+    return pow(value, N - 2, N)
+
+
+def _deterministic_k(msg_hash, private_key):
+    """RFC 6979 nonce for signing `msg_hash` with `private_key`"""
+    h = encode_int32(int.from_bytes(msg_hash, 'big') % N)
+    v = b'\x01' * 32
+    k = b'\x00' * 32
+    k = hmac.new(k, v + b'\x00' + private_key + h, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    k = hmac.new(k, v + b'\x01' + private_key + h, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    while True:
+        v = hmac.new(k, v, hashlib.sha256).digest()
+        candidate = int.from_bytes(v, 'big')
+        if 0 < candidate < N:
+            return candidate
+        k = hmac.new(k, v + b'\x00', hashlib.sha256).digest()
+        v = hmac.new(k, v, hashlib.sha256).digest()
+
+
+def sign(msg_hash, private_key):
+    """returns (recovery id, r, s) of the ECDSA signature of the 32 byte `msg_hash`
+
+    Signatures are deterministic (RFC 6979) and have a low s, as required
+    for ethereum transactions.
+    """
+    d = int.from_bytes(private_key, 'big')
+    if not 0 < d < N:
+        raise ValueError("invalid private key")
+    z = int.from_bytes(msg_hash, 'big')
+    k = _deterministic_k(msg_hash, private_key)
+    x, y = _affine(_multiply(k))
+    r = x % N
+    s = _inv_n(k) * (z + r * d) % N
+    recovery_id = (y & 1) | (2 if x >= N else 0)
+    if s > N // 2:
+        s = N - s
+        recovery_id ^= 1
+    return recovery_id, r, s
+
+
+def recover(msg_hash, recovery_id, r, s):
+    """returns the public key point (x, y) that made the given signature of `msg_hash`"""
+    if not (0 < r < N and 0 < s < N and 0 <= recovery_id < 4):
+        raise ValueError("invalid signature")
+    x = r + (recovery_id >> 1) * N
+    alpha = (x * x * x + 7) % P
+    beta = pow(alpha, (P + 1) // 4, P)
+    if beta * beta % P != alpha:
+        raise ValueError("invalid signature")
+    y = beta if beta & 1 == recovery_id & 1 else P - beta
+    z = int.from_bytes(msg_hash, 'big')
+    r_inv = _inv_n(r)
+    point = _add(_multiply(s * r_inv % N, (x, y)), _multiply((N - z) * r_inv % N))
+    if point[2] == 0:
+        raise ValueError("invalid signature")
+    return _affine(point)
+
+
+# keccak-f[1600], with lanes as 64 bit integers indexed by x + 5 * y
+_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008)
+_ROTATIONS = ((0, 36, 3, 41, 18), (1, 44, 10, 45, 2), (62, 6, 43, 15, 61),
+              (28, 55, 25, 21, 56), (27, 20, 39, 8, 14))
+# (source lane, destination lane, rotation) of the combined rho and pi steps
+_RHO_PI = tuple((x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), _ROTATIONS[x][y])
+                for x in range(5) for y in range(5))
+_MASK = 2 ** 64 - 1
+_RATE = 136
+
+
+def _keccak_f(lanes):
+    for rc in _ROUND_CONSTANTS:
+        c = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK) for x in range(5)]
+        b = [0] * 25
+        for src, dst, rot in _RHO_PI:
+            lane = lanes[src] ^ d[src % 5]
+            b[dst] = ((lane << rot) | (lane >> (64 - rot))) & _MASK if rot else lane
+        lanes = [b[i] ^ (~b[(i + 1) % 5 + i - i % 5] & b[(i + 2) % 5 + i - i % 5]) for i in range(25)]
+        lanes[0] ^= rc
+    return lanes
+
+
+def _keccak256_python(data):
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b'\0' * (-len(padded) % _RATE))
+    padded[-1] |= 0x80
+    lanes = [0] * 25
+    for offset in range(0, len(padded), _RATE):
+        block = padded[offset:offset + _RATE]
+        for i in range(_RATE // 8):
+            lanes[i] ^= int.from_bytes(block[i * 8:i * 8 + 8], 'little')
+        lanes = _keccak_f(lanes)
+    return b''.join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+
+def _find_keccak256():
+    try:
+        from Crypto.Hash import keccak
+        return lambda data: keccak.new(digest_bits=256, data=data).digest()
+    except ImportError:
+        pass
+    try:
+        import sha3
+        return lambda data: sha3.keccak_256(data).digest()
+    except ImportError:
+        pass
+    return _keccak256_python
+
+
+_keccak256 = None
+
+
+def keccak256(data):
+    global _keccak256
+    if _keccak256 is None:
+        _keccak256 = _find_keccak256()
+    return _keccak256(data)
+
+
+def pubtoaddr(public_key):
+    """returns the address (as bytes) of the given public key point"""
+    x, y = public_key
+    return keccak256(encode_int32(x) + encode_int32(y))[12:]
+
+
+@functools.lru_cache(maxsize=4096)
+def privtoaddr(private_key):
+    """returns the address (as bytes) of the given private key (as bytes)"""
+    return pubtoaddr(privtopub(private_key))
+
+
+def _first_key(seed):
+    key = int.from_bytes(hashlib.sha256(seed).digest(), 'big') % N
+    return key or 1
+
+
+def derive_private_keys(count, seed=b'testing.parity'):
+    """returns `count` private keys derived deterministically from `seed`
+
+    The keys are consecutive integers starting from a hash of the seed. That
+    makes them useless for anything but tests, but means their public keys
+    can be computed by adding the generator point to the previous one.
+    """
+    first = _first_key(seed)
+    return [encode_int32((first + i) % N or 1) for i in range(count)]
+
+
+def _to_affine(points):
+    """converts jacobian points to affine with a single modular inversion (Montgomery's trick)"""
+    products = []
+    acc = 1
+    for _, _, z in points:
+        acc = acc * z % P
+        products.append(acc)
+    inv = _inv(acc)
+    result = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        x, y, z = points[i]
+        z_inv = inv * products[i - 1] % P if i else inv
+        inv = inv * z % P
+        z_inv2 = z_inv * z_inv % P
+        result[i] = (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+    return result
+
+
+def _sequential_public_keys(first, count):
+    """public keys of first, first + 1, ..., in jacobian coordinates"""
+    gx, gy = G
+    x, y = privtopub(encode_int32(first))
+    z = 1
+    points = [(x, y, z)]
+    for _ in range(count - 1):
+        # mixed addition of the affine generator, madd-2007-bl
+        zz = z * z % P
+        h = (gx * zz - x) % P
+        s = (gy * z * zz - y) % P
+        if h == 0:
+            # only possible around the order of the curve: start over from scratch
+            x, y = privtopub(encode_int32((first + len(points)) % N or 1))
+            z = 1
+            points.append((x, y, z))
+            continue
+        hh = h * h % P
+        i = 4 * hh % P
+        j = h * i % P
+        r = 2 * s % P
+        v = x * i % P
+        x3 = (r * r - j - 2 * v) % P
+        y3 = (r * (v - x3) - 2 * y * j) % P
+        z = ((z + h) * (z + h) - zz - hh) % P
+        x, y = x3, y3
+        points.append((x, y, z))
+    return _to_affine(points)
+
+
+@functools.lru_cache(maxsize=16)
+def derive_accounts(count, seed=b'testing.parity'):
+    """returns `count` (private key, address) pairs derived from `seed`, see `derive_private_keys`"""
+    if count <= 0:
+        return ()
+    keys = derive_private_keys(count, seed)
+    first = _first_key(seed)
+    if first + count > N:
+        # too close to the order of the curve for the sequential shortcut
+        return tuple((key, privtoaddr(key)) for key in keys)
+    public_keys = _sequential_public_keys(first, count)
+    return tuple((key, pubtoaddr(public_key)) for key, public_key in zip(keys, public_keys))
@@ -0,0 +1,206 @@
+"""contracts in the genesis block, see the `genesis_contracts` setting
+
+Contracts are given either as their accounts (address -> code, storage,
+balance and nonce), or as init code. Init code is deployed once into a
+reference chain from the `DEPLOYER_KEY` account; the accounts the
+deployments created or changed are read back with parity's
+`trace_replayTransaction` and cached, keyed by everything that could
+change them, in memory and on disk.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from testing.parity.crypto import decode_hex, derive_private_keys, keccak256, privtoaddr
+from testing.parity.transactions import rlp_encode, sign_transaction
+
+__all__ = ['DEPLOYER_KEY', 'contract_address', 'genesis_accounts', 'apply_state_diff', 'deploy',
+           'cache_key', 'load_cached', 'store_cached', 'cache_lock']
+
+# init code is deployed from this account, which therefore owns the contracts
+DEPLOYER_KEY = derive_private_keys(1, b'testing.parity-genesis')[0]
+
+_cache = {}
+_cache_lock = threading.Lock()
+_key_locks = {}
+
+
+def _bytes(value):
+    return decode_hex(value) if isinstance(value, str) else bytes(value)
+
+
+def _word(value):
+    """a storage key or value as the 32 byte hex string parity's chain spec uses"""
+    if isinstance(value, int):
+        return '0x{:064x}'.format(value)
+    return '0x' + _bytes(value).rjust(32, b'\0').hex()
+
+
+def contract_address(sender, nonce):
+    """returns the address (as bytes) of the contract created by `sender` with `nonce`"""
+    return keccak256(rlp_encode([_bytes(sender), nonce]))[12:]
+
+
+def genesis_accounts(contracts, nonce):
+    """returns the chain spec accounts of `contracts`, a dict of address -> dict
+
+    Each dict may have 'code' and 'balance', 'nonce' (by default `nonce`)
+    and 'storage' (a dict of key -> value). Addresses, code and storage
+    keys and values are bytes or hex strings, storage also ints.
+    """
+    accounts = {}
+    for address, contract in contracts.items():
+        account = {"balance": str(contract.get('balance', 0)), "nonce": str(contract.get('nonce', nonce))}
+        if contract.get('code'):
+            account["code"] = '0x' + _bytes(contract['code']).hex()
+        if contract.get('storage'):
+            account["storage"] = {_word(key): _word(value) for key, value in contract['storage'].items()}
+        accounts[_bytes(address).hex()] = account
+    return accounts
+
+
+def _after(diff):
+    """the value a field of a parity state diff has after the transaction, or None if unchanged or removed"""
+    if not isinstance(diff, dict):
+        return None  # "="
+    if '+' in diff:
+        return diff['+']
+    if '*' in diff:
+        return diff['*']['to']
+    return None
+
+
+def apply_state_diff(accounts, state_diff, exclude=()):
+    """updates chain spec `accounts` with a `stateDiff` from parity's trace_replayTransaction
+
+    Accounts the transaction created and those already in `accounts` are
+    recorded, other changes (like the fees paid to the block's author) and
+    anything in `exclude` are ignored.
+    """
+    for address, diff in state_diff.items():
+        address = address[2:].lower() if address.startswith('0x') else address.lower()
+        if address in exclude:
+            continue
+        created = any(isinstance(diff.get(field), dict) and '+' in diff[field]
+                      for field in ('balance', 'nonce', 'code'))
+        if address not in accounts and not created:
+            continue
+        account = accounts.setdefault(address, {"balance": "0", "nonce": "0"})
+        for field in ('balance', 'nonce'):
+            value = _after(diff.get(field))
+            if value is not None:
+                account[field] = str(int(value, 16))
+        code = _after(diff.get('code'))
+        if code is not None:
+            if code == '0x':
+                account.pop("code", None)
+            else:
+                account["code"] = code
+        storage = account.get("storage", {})
+        for key, value in diff.get('storage', {}).items():
+            value = _after(value)
+            if value is None or int(value, 16) == 0:
+                storage.pop(_word(int(key, 16)), None)
+            else:
+                storage[_word(int(key, 16))] = _word(int(value, 16))
+        if storage:
+            account["storage"] = storage
+        else:
+            account.pop("storage", None)
+
+
+def deploy(server, init_codes, gasprice):
+    """deploys `init_codes` on a running ParityServer whose faucet is DEPLOYER_KEY
+
+    Returns the addresses of the contracts (as bytes) and the chain spec
+    accounts of everything the deployments created or changed, including
+    the deployer.
+    """
+    client = server.client()
+    deployer = privtoaddr(DEPLOYER_KEY)
+    nonce = client.get_transaction_count(deployer)
+    startgas = int(client.get_block()['gasLimit'], 16)
+    tx_hashes = [client.send_raw_transaction(sign_transaction(DEPLOYER_KEY, nonce + i, gasprice, startgas, None,
+                                                              data=_bytes(code), network_id=server.network_id))
+                 for i, code in enumerate(init_codes)]
+    receipts = server.wait_for_receipts(tx_hashes)
+
+    exclude = {server.author[2:].lower() if server.author.startswith('0x') else server.author.lower()}
+    addresses = []
+    # the deployer's balance and nonce change with every deployment
+    accounts = {deployer.hex(): {"balance": "0", "nonce": "0"}}
+    for i, (tx_hash, receipt) in enumerate(zip(tx_hashes, receipts)):
+        if receipt.get('status') == '0x0' or not receipt.get('contractAddress'):
+            raise RuntimeError("*** genesis contract {} failed to deploy (tx {}) ***".format(i, tx_hash))
+        addresses.append(_bytes(receipt['contractAddress']))
+        trace = client.request('trace_replayTransaction', tx_hash, ['stateDiff'])
+        apply_state_diff(accounts, trace['stateDiff'], exclude)
+    return addresses, accounts
+
+
+def _cache_path(directory, key):
+    return os.path.join(directory, 'genesis', key + '.json')
+
+
+@contextlib.contextmanager
+def cache_lock(directory, key):
+    """holds the lock on `key`, for filling the cache without deploying twice
+
+    Threads of this process are serialized with a lock per key, other
+    processes with an flock on `<directory>/genesis/<key>.lock` (where
+    fcntl is available).
+    """
+    with _cache_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        path = os.path.join(directory, 'genesis', key + '.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+
+def cache_key(*args):
+    """returns the cache key of deployments depending on `args` (anything JSON serializable)"""
+    return hashlib.sha256(json.dumps(args, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_cached(directory, key):
+    """returns the (addresses, accounts) stored under `key`, or None"""
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+    try:
+        with open(_cache_path(directory, key)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    result = [bytes.fromhex(address) for address in data['addresses']], data['accounts']
+    with _cache_lock:
+        _cache[key] = result
+    return result
+
+
+def store_cached(directory, key, addresses, accounts):
+    path = _cache_path(directory, key)
+    with _cache_lock:
+        _cache[key] = (addresses, accounts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'addresses': [address.hex() for address in addresses], 'accounts': accounts}, f)
+    os.replace(tmpname, path)
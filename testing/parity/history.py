@@ -0,0 +1,127 @@
+"""chain history fixtures
+
+A fixture is the gzip compressed output of `parity export blocks --format
+binary`, a sequence of RLP encoded blocks. It is streamed into `parity
+import`, which runs without the RPC server, before the node starts.
+"""
+import gzip
+import os
+import subprocess
+import tempfile
+
+__all__ = ['export_blocks', 'import_blocks', 'BlockCounter']
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _subcommand(version, name):
+    if name == 'export' and version >= (1, 5, 0):
+        # `export` became `export blocks` when `export state` was added
+        return ['export', 'blocks']
+    return [name]
+
+
+class BlockCounter(object):
+    """counts the RLP items in a stream that is fed to it in pieces"""
+
+    def __init__(self):
+        self.count = 0
+        self._header = b''
+        self._skip = 0
+
+    @staticmethod
+    def _payload_length(header):
+        """the payload length of the item starting with `header`, None if the header is incomplete"""
+        first = header[0]
+        if first < 0x80:
+            return 0  # the byte itself
+        if first <= 0xb7:
+            return first - 0x80
+        if 0xc0 <= first <= 0xf7:
+            return first - 0xc0
+        length_of_length = first - (0xb7 if first < 0xc0 else 0xf7)
+        if len(header) < 1 + length_of_length:
+            return None
+        return int.from_bytes(header[1:], 'big')
+
+    def feed(self, data):
+        position = 0
+        while position < len(data):
+            if self._skip:
+                skipped = min(self._skip, len(data) - position)
+                self._skip -= skipped
+                position += skipped
+                continue
+            self._header += data[position:position + 1]
+            position += 1
+            length = self._payload_length(self._header)
+            if length is not None:
+                self.count += 1
+                self._header = b''
+                self._skip = length
+
+
+def _command(commandline, version, name, *args):
+    """`commandline` of a node, turned into the given subcommand on the same chain and data directory"""
+    return [commandline[0]] + _subcommand(version, name) + list(args) + ['--format', 'binary'] + commandline[1:]
+
+
+def _failed(action, log_path, returncode):
+    with open(log_path) as f:
+        output = f.read()[-4096:]
+    return RuntimeError("*** failed to {} (exit code {}) ***\n{}".format(action, returncode, output))
+
+
+def export_blocks(commandline, version, path, first_block=1, last_block=None, log_path=os.devnull):
+    """writes the blocks of the (stopped) node run by `commandline` to the fixture `path`
+
+    Returns the number of blocks written. Parity's output goes to `log_path`.
+    """
+    args = ['--from', str(first_block), '--to', str(last_block if last_block is not None else 'latest')]
+    counter = BlockCounter()
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with open(log_path, 'ab') as log, os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            process = subprocess.Popen(_command(commandline, version, 'export', *args),
+                                       stdout=subprocess.PIPE, stderr=log)
+            with process.stdout:
+                for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b''):
+                    counter.feed(chunk)
+                    f.write(chunk)
+            returncode = process.wait()
+        if returncode != 0:
+            raise _failed("export blocks", log_path, returncode)
+        os.replace(tmpname, path)
+    except BaseException:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+    return counter.count
+
+
+def import_blocks(commandline, version, path, log_path=os.devnull):
+    """imports the fixture `path` into the (stopped) node run by `commandline`
+
+    Returns the number of blocks in the fixture. Parity's output goes to
+    `log_path`.
+    """
+    counter = BlockCounter()
+    with open(log_path, 'ab') as log:
+        process = subprocess.Popen(_command(commandline, version, 'import'),
+                                   stdin=subprocess.PIPE, stdout=log, stderr=log)
+        try:
+            with gzip.open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    counter.feed(chunk)
+                    process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # parity exited, see its exit code
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = process.wait()
+    if returncode != 0:
+        raise _failed("import blocks", log_path, returncode)
+    return counter.count
@@ -0,0 +1,218 @@
+"""transaction load for a ParityServer
+
+A LoadGenerator keeps the nonces of its sender accounts itself, signs
+transactions ahead of time in a pool of processes (signing in python is
+much slower than parity accepting them) and submits them in JSON-RPC
+batches at a target rate, while a background thread polls for their
+receipts.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from testing.parity.crypto import privtoaddr
+from testing.parity.metrics import Histogram
+from testing.parity.receipts import fetch_receipts
+from testing.parity.rpc import JSONRPCError
+from testing.parity.server import DEFAULT_GASPRICE
+from testing.parity.transactions import sign_transaction
+
+__all__ = ['LoadGenerator']
+
+TRANSFER_GAS = 21000
+# value transfers go here unless another recipient is given
+BURN_ADDRESS = b'\x00' * 19 + b'\xff'
+# fewer transactions than this are signed in this process
+MIN_PARALLEL_SIGNING = 64
+
+
+def _sign_chunk(private_key, first_nonce, count, gasprice, startgas, to, value, data, network_id):
+    return [sign_transaction(private_key, nonce, gasprice, startgas, to, value, data, network_id)
+            for nonce in range(first_nonce, first_nonce + count)]
+
+
+class LoadGenerator(object):
+    """sends transactions from `private_keys` (by default the faucet's) to `server`
+
+    Nonces are read from the node once and counted up locally by `sign`;
+    call `sync_nonces` after transactions were rejected.
+    """
+
+    def __init__(self, server, private_keys=None, client=None):
+        self.server = server
+        self.client = client or server.client()
+        if private_keys is None:
+            private_keys = [server.get_faucet_private_key()]
+        self.private_keys = list(private_keys)
+        self.addresses = ['0x' + privtoaddr(key).hex() for key in self.private_keys]
+        self.nonces = {}
+        self.sync_nonces()
+
+    def sync_nonces(self):
+        """reads the next nonce of every sender from the node"""
+        with self.client.batch() as batch:
+            futures = [batch.get_transaction_count(address, 'pending') for address in self.addresses]
+        self.nonces = {address: future.result() for address, future in zip(self.addresses, futures)}
+
+    def sign(self, count, to=BURN_ADDRESS, value=1, gasprice=DEFAULT_GASPRICE, startgas=TRANSFER_GAS, data=b'',
+             processes=None):
+        """returns `count` signed raw transactions, taking turns between the senders
+
+        They are signed by `processes` worker processes (by default one per
+        CPU), each given a run of consecutive nonces of one sender.
+        `processes=0` signs in this process.
+        """
+        if processes is None:
+            processes = os.cpu_count() or 1
+        senders = len(self.private_keys)
+        per_sender = [count // senders + (1 if i < count % senders else 0) for i in range(senders)]
+        chunk_size = max(1, -(-count // (max(processes, 1) * 4)))
+        chunks = []
+        chunk_senders = []
+        for i, (key, address, n) in enumerate(zip(self.private_keys, self.addresses, per_sender)):
+            nonce = self.nonces[address]
+            for offset in range(0, n, chunk_size):
+                chunks.append((key, nonce + offset, min(chunk_size, n - offset), gasprice, startgas, to, value, data,
+                               self.server.network_id))
+                chunk_senders.append(i)
+            self.nonces[address] = nonce + n
+
+        if processes and count >= MIN_PARALLEL_SIGNING:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                signed = list(executor.map(_sign_chunk, *zip(*chunks)))
+        else:
+            signed = [_sign_chunk(*chunk) for chunk in chunks]
+
+        streams = [[] for _ in range(senders)]
+        for sender, raw_txs in zip(chunk_senders, signed):
+            streams[sender].extend(raw_txs)
+        # round robin, so that every sender's nonces stay in order
+        return [stream[j] for j in range(max(per_sender)) for stream in streams if j < len(stream)]
+
+    def run(self, raw_txs, rate=None, batch_size=100, concurrency=1, poll_interval=0.05, timeout=60.0):
+        """submits `raw_txs` and waits until all accepted ones are mined, returns a report
+
+        Transactions are sent in batches of `batch_size`, spaced to reach
+        `rate` transactions per second (as fast as possible by default), by
+        `concurrency` threads. More than one thread can deliver a sender's
+        transactions out of order, which parity queues but doesn't mine until
+        the gap is filled. Receipts are polled for every `poll_interval`
+        seconds, which bounds the precision of the inclusion latency. The
+        report is a dict with:
+
+        submitted, rejected   transactions accepted and refused (with a JSON-RPC error) by the node
+        rejections            the number of rejections per error message
+        included              accepted transactions that were mined within `timeout`
+        submit_seconds        how long submitting took
+        seconds               from the first submission until the last inclusion
+        submitted_tps         transactions submitted per second
+        tps                   transactions included per second
+        inclusion_latency     from submission to the receipt being seen, see `Histogram`
+
+        Any other error submitting transactions (e.g. the node is unreachable)
+        or polling for receipts stops the run and is raised.
+        """
+        batches = [raw_txs[i:i + batch_size] for i in range(0, len(raw_txs), batch_size)]
+        submitted_at = {}
+        # accepted transactions the poller doesn't know about yet
+        new = []
+        rejections = {}
+        inclusion = Histogram()
+        lock = threading.Lock()
+        done = threading.Event()
+        deadline = [None]
+        last_included = [None]
+        poll_error = [None]
+        # set when submitting failed for another reason than the node refusing a transaction
+        submit_failed = threading.Event()
+
+        def submit(batch):
+            if submit_failed.is_set():
+                return
+            try:
+                send(batch)
+            except Exception:
+                submit_failed.set()
+                raise
+
+        def send(batch):
+            sent_at = time.time()
+            with self.client.batch() as rpc_batch:
+                futures = [rpc_batch.send_raw_transaction(raw_tx) for raw_tx in batch]
+            for future in futures:
+                try:
+                    tx_hash = future.result().lower()
+                except JSONRPCError as exc:
+                    message = exc.message or str(exc)
+                    with lock:
+                        rejections[message] = rejections.get(message, 0) + 1
+                else:
+                    with lock:
+                        submitted_at[tx_hash] = sent_at
+                        new.append(tx_hash)
+
+        def poll():
+            try:
+                poll_receipts()
+            except Exception as exc:
+                poll_error[0] = exc
+
+        def poll_receipts():
+            pending = set()
+            while True:
+                finished = done.is_set()
+                with lock:
+                    pending.update(new)
+                    del new[:]
+                if pending:
+                    found = fetch_receipts(self.client, list(pending))
+                    now = time.time()
+                    for tx_hash in found:
+                        inclusion.record(now - submitted_at[tx_hash])
+                        last_included[0] = now
+                    pending.difference_update(found)
+                if finished and (not pending or time.time() > deadline[0]):
+                    return
+                time.sleep(poll_interval)
+
+        poller = threading.Thread(target=poll, name='parity-load-receipts', daemon=True)
+        started_at = time.time()
+        poller.start()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = []
+                for i, batch in enumerate(batches):
+                    if poll_error[0] is not None or submit_failed.is_set():
+                        break
+                    if rate:
+                        delay = started_at + i * batch_size / float(rate) - time.time()
+                        if delay > 0:
+                            time.sleep(delay)
+                    futures.append(executor.submit(submit, batch))
+                for future in futures:
+                    future.result()
+            submit_seconds = time.time() - started_at
+            deadline[0] = time.time() + timeout
+        finally:
+            if deadline[0] is None:
+                # submitting failed, don't wait for receipts
+                deadline[0] = time.time()
+            done.set()
+            poller.join()
+        if poll_error[0] is not None:
+            raise poll_error[0]
+
+        seconds = (last_included[0] or time.time()) - started_at
+        submitted = len(submitted_at)
+        return {'transactions': len(raw_txs),
+                'submitted': submitted,
+                'rejected': sum(rejections.values()),
+                'rejections': rejections,
+                'included': inclusion.count,
+                'submit_seconds': submit_seconds,
+                'seconds': seconds,
+                'submitted_tps': submitted / submit_seconds if submit_seconds > 0 else None,
+                'tps': inclusion.count / seconds if inclusion.count and seconds > 0 else None,
+                'target_rate': rate,
+                'inclusion_latency': inclusion.as_dict()}
@@ -0,0 +1,171 @@
+import collections
+import os
+import re
+import threading
+import time
+
+__all__ = ['LogCapture']
+
+DEFAULT_MAX_LINES = 10000
+# longer lines are split
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class _BufferWatcher(object):
+    """LogWatcher for a LogCapture: looks for `pattern` in the lines captured from `position` on"""
+
+    def __init__(self, capture, pattern, position=0):
+        self.capture = capture
+        self.pattern = re.compile(pattern)
+        self.position = position
+        self.match = None
+
+    def poll(self):
+        if self.match is None:
+            self.match, self.position = self.capture._search(self.pattern, self.position)
+        return self.match is not None
+
+
+class LogCapture(object):
+    """reads a process' output in a background thread, keeping the last `max_lines` lines
+
+    With `path`, every line is appended to that file as well. Once it would
+    grow past `max_bytes` it is renamed to `path`.1 (and older files to .2
+    and so on, keeping `backup_count` of them) and a new file is started.
+
+    Every line has a position, counting from 0 for the first line read.
+    """
+
+    def __init__(self, stream, max_lines=DEFAULT_MAX_LINES, path=None, max_bytes=None, backup_count=1):
+        self.stream = stream
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lines = collections.deque(maxlen=max_lines)
+        self.closed = False
+        # position of the next line
+        self.position = 0
+        self._file = None
+        self._size = 0
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self.path is not None:
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+        self._thread = threading.Thread(target=self._run, name='parity-log', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while True:
+                data = self.stream.readline(MAX_LINE_LENGTH)
+                if not data:
+                    break
+                if self._file is not None:
+                    self._write(data)
+                line = data.decode('utf-8', 'replace').rstrip('\r\n')
+                with self._changed:
+                    self.lines.append(line)
+                    self.position += 1
+                    self._changed.notify_all()
+        finally:
+            if self._file is not None:
+                self._file.close()
+            with self._changed:
+                self.closed = True
+                self._changed.notify_all()
+
+    def _write(self, data):
+        if self.max_bytes is not None and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists('{}.{}'.format(self.path, i)):
+                os.replace('{}.{}'.format(self.path, i), '{}.{}'.format(self.path, i + 1))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path + '.1')
+        self._file = open(self.path, 'wb')
+        self._size = 0
+
+    def _lines_from(self, position):
+        """returns the buffered lines from `position` on, and the position following them"""
+        first = self.position - len(self.lines)
+        lines = list(self.lines)[max(position - first, 0):]
+        return lines, self.position
+
+    def _search(self, pattern, position):
+        with self._changed:
+            lines, end = self._lines_from(position)
+        for line in lines:
+            m = pattern.search(line)
+            if m:
+                return m, end
+        return None, end
+
+    def tail(self, n=None):
+        """returns the last `n` (by default all buffered) lines"""
+        with self._changed:
+            lines = list(self.lines)
+        if n is None:
+            return lines
+        return lines[-n:] if n > 0 else []
+
+    def text(self):
+        return '\n'.join(self.tail())
+
+    def iter_log(self, position=0, follow=False, timeout=None):
+        """yields the buffered lines from `position` on
+
+        Lines that dropped out of the buffer are skipped. With `follow` new
+        lines are waited for until the process closes its output, or no line
+        arrived for `timeout` seconds.
+        """
+        while True:
+            with self._changed:
+                if follow and position >= self.position and not self.closed:
+                    self._changed.wait(timeout)
+                lines, end = self._lines_from(position)
+                closed = self.closed
+            for line in lines:
+                yield line
+            if not follow or (not lines and (closed or timeout is not None)):
+                return
+            position = end
+
+    def watcher(self, pattern, position=0):
+        """returns an object like `readiness.LogWatcher` that looks for `pattern` in the captured lines"""
+        return _BufferWatcher(self, pattern, position)
+
+    def wait_for(self, pattern, timeout=30.0, position=0):
+        """waits until a line from `position` on matches the regular expression `pattern`
+
+        Returns the match. Raises TimeoutError after `timeout` seconds, or
+        when the process closed its output without printing such a line.
+        """
+        pattern = re.compile(pattern)
+        deadline = time.time() + timeout
+        while True:
+            m, position = self._search(pattern, position)
+            if m is not None:
+                return m
+            with self._changed:
+                if self.position == position:
+                    if self.closed:
+                        raise TimeoutError("output closed before a line matched {!r}".format(pattern.pattern))
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("timeout waiting for a line matching {!r}".format(pattern.pattern))
+                    self._changed.wait(remaining)
+
+    def close(self, timeout=None):
+        """waits until the reader thread has read everything the process wrote"""
+        if self._thread is not None:
+            self._thread.join(timeout)
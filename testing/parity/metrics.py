@@ -0,0 +1,133 @@
+import json
+import threading
+
+__all__ = ['Histogram', 'MetricsSink', 'CallbackSink', 'Aggregator', 'get_metrics_sink', 'set_metrics_sink']
+
+# upper bounds of the histogram buckets in seconds: 100µs, 200µs, ... ~52s
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(20))
+
+
+class Histogram(object):
+    """thread safe latency histogram with logarithmic buckets"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            self.counts[i] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        """returns an upper bound of the `q`th percentile (0 < q <= 100)"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100.0 * self.count
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    if i == len(self.buckets):
+                        return self.max
+                    return min(self.buckets[i], self.max)
+            return self.max
+
+    def as_dict(self):
+        return {'count': self.count,
+                'mean': self.total / self.count if self.count else None,
+                'min': self.min,
+                'max': self.max,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99)}
+
+
+class MetricsSink(object):
+    """receives how long lifecycle steps and JSON-RPC calls took
+
+    Names are 'parity.<step>' for the steps of ParityServer (initialize,
+    version, prestart, chain_spec, spawn, ready, start, stop) and
+    'rpc.<method>' for JSON-RPC calls. This base class ignores everything.
+    """
+
+    def timing(self, name, seconds):
+        pass
+
+    def __deepcopy__(self, memo):
+        # shared by everything it is passed to, also when settings are copied
+        return self
+
+
+class CallbackSink(MetricsSink):
+    """calls `callback(name, seconds)` for every timing"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def timing(self, name, seconds):
+        self.callback(name, seconds)
+
+
+class Aggregator(MetricsSink):
+    """collects the timings in a Histogram per name"""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def timing(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        histogram.record(seconds)
+
+    def as_dict(self):
+        """returns count, mean, min, max and percentiles (in seconds) per name"""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+        return {name: histogram.as_dict() for name, histogram in histograms}
+
+    def dump(self, path=None):
+        """returns the aggregated timings as JSON, writing them to `path` if given"""
+        data = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(data + '\n')
+        return data
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+
+_sink = MetricsSink()
+
+
+def get_metrics_sink():
+    """returns the sink used by everything not given one with the `metrics` setting"""
+    return _sink
+
+
+def set_metrics_sink(sink):
+    """sets the default sink (None disables it again) and returns the previous one"""
+    global _sink
+    previous, _sink = _sink, sink or MetricsSink()
+    return previous
@@ -0,0 +1,121 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from testing.common.database import get_unused_port
+from testing.parity.ports import get_port_allocator
+from testing.parity.server import ParityServer, generate_node_key, get_node_public_key
+from testing.parity.teardown import stop_all
+
+__all__ = ['ParityNetwork']
+
+
+class ParityNetwork(object):
+    """a private network of `n` ParityServers on this machine
+
+    Node keys and p2p ports are chosen before launch, so that every node can
+    be given the enode urls of all the others as bootnodes and all of them
+    can boot in parallel. All keyword arguments are passed on to every
+    ParityServer; a shared `faucet_private_key` is generated if none is
+    given, so that all nodes write the same chain spec.
+    """
+
+    def __init__(self, n=2, peer_timeout=30.0, **kwargs):
+        if n < 1:
+            raise ValueError("a network needs at least one node")
+        if kwargs.get('faucet_private_key') is None:
+            kwargs['faucet_private_key'] = os.urandom(32)
+        for key in ('port', 'jsonrpc_port', 'ws_port', 'port_block', 'node_key', 'bootnodes', 'base_dir'):
+            if kwargs.get(key) is not None:
+                raise ValueError("{} is chosen per node by ParityNetwork".format(key))
+
+        self.n = n
+        self.settings = kwargs
+        self.nodes = []
+
+        node_keys = [generate_node_key() for _ in range(n)]
+        allocator = kwargs.get('port_allocator')
+        if allocator is None:
+            allocator = get_port_allocator()
+        if not allocator:
+            self.port_blocks = [None] * n
+            ports = [get_unused_port() for _ in range(n)]
+        else:
+            # every node's ports are reserved up front, its p2p port is the first
+            self.port_blocks = [allocator.reserve() for _ in range(n)]
+            ports = [block.ports[0] for block in self.port_blocks]
+        self.enodes = ['enode://{}@127.0.0.1:{}'.format(get_node_public_key(key), port)
+                       for key, port in zip(node_keys, ports)]
+
+        node_settings = []
+        for i in range(n):
+            settings = dict(kwargs)
+            settings.update(node_key=node_keys[i],
+                            port=ports[i],
+                            port_block=self.port_blocks[i],
+                            bootnodes=[enode for j, enode in enumerate(self.enodes) if j != i] or None)
+            node_settings.append(settings)
+
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            futures = [executor.submit(ParityServer, **settings) for settings in node_settings]
+        errors = []
+        for future in futures:
+            try:
+                self.nodes.append(future.result())
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            self.stop()
+            raise errors[0]
+
+        if n > 1:
+            try:
+                self.wait_for_peers(timeout=peer_timeout)
+            except Exception:
+                self.stop()
+                raise
+
+    def wait_for_peers(self, peers=None, timeout=30.0):
+        """waits until every node is connected to `peers` (by default all other) nodes"""
+        if peers is None:
+            peers = self.n - 1
+        started_at = time.time()
+        waiting = list(self.nodes)
+        while waiting:
+            waiting = [node for node in waiting if node.client().peer_count() < peers]
+            if not waiting:
+                break
+            if time.time() - started_at > timeout:
+                raise RuntimeError("*** {} of {} nodes didn't reach {} peers (timeout) ***".format(
+                    len(waiting), self.n, peers))
+            time.sleep(0.1)
+
+    def dsns(self):
+        """returns the dsn of every node"""
+        return [node.dsn() for node in self.nodes]
+
+    def stop(self):
+        """stops all nodes at once, see `stop_all`"""
+        nodes, self.nodes = self.nodes, []
+        try:
+            stop_all(nodes)
+        finally:
+            # also those of nodes that failed to start
+            for block in self.port_blocks:
+                if block is not None:
+                    block.release()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        return self.nodes[index]
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from testing.parity.metrics import Histogram
+from testing.parity.server import ParityServerFactory
+from testing.parity.teardown import stop_all
+
+__all__ = ['ParityServerPool', 'RESET_RESPAWN', 'RESET_SNAPSHOT', 'RESET_REUSE']
+
+# stop the returned node and boot a fresh one in its place
+RESET_RESPAWN = 'respawn'
+# roll the returned node back to a checkpoint taken right after boot
+RESET_SNAPSHOT = 'snapshot'
+# hand the returned node out again as it is
+RESET_REUSE = 'reuse'
+
+RESET_STRATEGIES = (RESET_RESPAWN, RESET_SNAPSHOT, RESET_REUSE)
+
+# the name of the checkpoint RESET_SNAPSHOT rolls back to
+SNAPSHOT_CHECKPOINT = 'pool'
+
+
+class ParityServerPool(object):
+    """keeps `size` ParityServers booted in the background
+
+    `checkout()` hands out an already running node and schedules a
+    replacement; `checkin()` returns a node to the pool, resetting it
+    according to `reset` (one of `RESET_STRATEGIES`). Unless nodes are
+    respawned, checked out nodes still count towards `size`: a checkout
+    only boots a replacement when more than `size` nodes are in use, and
+    nodes returned to a full pool are stopped. Nodes that fail to boot are counted in `stats()` and
+    the last error is kept in `last_error`. All other keyword
+    arguments are passed on to the `ParityServerFactory` used to create
+    the nodes.
+    """
+
+    def __init__(self, size=2, reset=RESET_RESPAWN, factory=None, **kwargs):
+        if reset not in RESET_STRATEGIES:
+            raise ValueError("reset must be one of {}".format(', '.join(RESET_STRATEGIES)))
+        if factory is None:
+            factory = ParityServerFactory(**kwargs)
+        elif kwargs:
+            raise TypeError("settings cannot be given together with a factory")
+
+        self.size = size
+        self.reset = reset
+        self.factory = factory
+
+        self._idle = deque()
+        self._lock = threading.Lock()
+        # notified whenever a node became idle or failed to boot
+        self._ready = threading.Condition(self._lock)
+        self._pending = 0
+        # nodes checked out and not returned yet
+        self._out = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max(size, 1))
+
+        self._hits = 0
+        self._misses = 0
+        self._failures = 0
+        self.last_error = None
+        self._resets = 0
+        self._spawn_latency = Histogram()
+        self._checkout_latency = Histogram()
+        self._reset_latency = Histogram()
+
+        self._fill()
+
+    def _fill(self):
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - len(self._idle) - self._pending
+            if self.reset != RESET_RESPAWN:
+                missing -= self._out
+            for _ in range(max(missing, 0)):
+                self._pending += 1
+                self._executor.submit(self._spawn)
+
+    def _submit(self, fn):
+        """runs `fn` in the background, or right here once the pool is closed"""
+        try:
+            self._executor.submit(fn)
+        except RuntimeError:
+            # the executor was shut down by close()
+            fn()
+
+    def _put(self, server):
+        """makes `server` available, stops it if the pool is closed or full"""
+        with self._lock:
+            keep = not self._closed and len(self._idle) + self._pending + self._out < self.size
+            if keep:
+                self._idle.append(server)
+                self._ready.notify()
+        if not keep:
+            server.stop()
+
+    def _spawn(self):
+        try:
+            started_at = time.time()
+            server = self.factory()
+            if self.reset == RESET_SNAPSHOT:
+                server.checkpoint(SNAPSHOT_CHECKPOINT)
+            elapsed = time.time() - started_at
+        except Exception as exc:
+            with self._lock:
+                self._pending -= 1
+                self._failures += 1
+                self.last_error = exc
+                self._ready.notify_all()
+            return
+
+        with self._lock:
+            self._pending -= 1
+            self._spawn_latency.record(elapsed)
+            closed = self._closed
+            if not closed:
+                self._idle.append(server)
+                self._ready.notify()
+        if closed:
+            server.stop()
+
+    def checkout(self, timeout=None):
+        """returns a running ParityServer, waiting up to `timeout` seconds if none is ready
+
+        Raises RuntimeError if no node is ready in time, or if all nodes
+        that were booting failed to.
+        """
+        started_at = time.time()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("pool is closed")
+            failures = self._failures
+            hit = bool(self._idle)
+            boot_here = not hit and self._pending == 0
+            if boot_here:
+                self._pending += 1
+        if boot_here:
+            # nothing on its way (e.g. size=0): boot one right here
+            self._spawn()
+
+        with self._lock:
+            while not self._idle:
+                if self._closed:
+                    raise RuntimeError("pool is closed")
+                if self._pending == 0 and self._failures > failures:
+                    raise RuntimeError("*** failed to boot a node for the pool: {} ***".format(
+                        self.last_error)) from self.last_error
+                remaining = None if timeout is None else started_at + timeout - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise RuntimeError("*** no node ready within {} seconds ***".format(timeout))
+                self._ready.wait(remaining)
+            server = self._idle.popleft()
+            self._out += 1
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            self._checkout_latency.record(time.time() - started_at)
+        self._fill()
+        return server
+
+    def checkin(self, server):
+        """gives a node back to the pool"""
+        with self._lock:
+            self._out -= 1
+        if self._closed:
+            server.stop()
+            return
+        if self.reset == RESET_RESPAWN or not server.is_alive():
+            self._submit(server.stop)
+            if self.reset != RESET_RESPAWN:
+                # checkout didn't replace it
+                self._fill()
+            return
+
+        def reset():
+            started_at = time.time()
+            try:
+                if self.reset == RESET_SNAPSHOT:
+                    server.rollback(SNAPSHOT_CHECKPOINT)
+            except Exception as exc:
+                server.stop()
+                with self._lock:
+                    self._failures += 1
+                    self.last_error = exc
+                # boot a node in its place
+                self._fill()
+                return
+            with self._lock:
+                self._resets += 1
+                self._reset_latency.record(time.time() - started_at)
+            self._put(server)
+
+        self._submit(reset)
+
+    @contextmanager
+    def node(self, timeout=None):
+        """checks out a node for the duration of a with block"""
+        server = self.checkout(timeout=timeout)
+        try:
+            yield server
+        finally:
+            self.checkin(server)
+
+    def stats(self):
+        """returns hit/miss counters and latency histograms (in seconds, see `Histogram.as_dict`)"""
+        with self._lock:
+            return {'size': self.size,
+                    'idle': len(self._idle),
+                    'pending': self._pending,
+                    'hits': self._hits,
+                    'misses': self._misses,
+                    'failures': self._failures,
+                    'resets': self._resets,
+                    'spawn_latency': self._spawn_latency.as_dict(),
+                    'checkout_latency': self._checkout_latency.as_dict(),
+                    'reset_latency': self._reset_latency.as_dict()}
+
+    def close(self):
+        """stops all idle nodes; nodes still checked out are stopped on checkin"""
+        with self._lock:
+            self._closed = True
+            self._ready.notify_all()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            servers = list(self._idle)
+            self._idle.clear()
+        stop_all(servers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,151 @@
+"""blocks of consecutive ports, reserved across processes
+
+`get_unused_port` binds a port and releases it again, so two processes
+starting nodes at the same time can be given the same port. A
+PortAllocator instead splits a range of ports into blocks with one lock
+file each in a shared directory. A block belongs to whoever holds the
+`flock` on its file, until it is released or that process exits, and is
+probed with `bind` before it is handed out. Where there is no `flock`
+(windows) there is no default allocator, and ports are chosen with
+`get_unused_port` as before.
+"""
+import os
+import random
+import re
+import socket
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = ['PortAllocator', 'PortBlock', 'get_port_allocator', 'set_port_allocator', 'PORT_IN_USE']
+
+# below linux' ephemeral range, where get_unused_port and outgoing
+# connections take their ports from
+DEFAULT_FIRST_PORT = 20000
+DEFAULT_LAST_PORT = 32767
+# p2p, JSON-RPC, websockets and dapps port of a node
+DEFAULT_BLOCK_SIZE = 4
+
+# how parity reports that one of its ports is taken
+PORT_IN_USE = re.compile(r"[Aa]ddress already in use|os error 98|error 48\b")
+
+
+def is_port_free(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(('127.0.0.1', port))
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class PortBlock(object):
+    """`ports`, reserved by a PortAllocator until `release` is called"""
+
+    def __init__(self, ports, fd):
+        self.ports = ports
+        self._fd = fd
+
+    @property
+    def released(self):
+        return self._fd is None
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def __del__(self):
+        self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def __repr__(self):
+        return '<PortBlock {}-{}{}>'.format(self.ports[0], self.ports[-1], ' released' if self.released else '')
+
+
+class PortAllocator(object):
+    """hands out blocks of `block_size` consecutive ports between `first_port` and `last_port`
+
+    Processes using the same `directory` (by default one in the system's
+    temporary directory) never get the same block at the same time.
+    """
+
+    def __init__(self, directory=None, first_port=DEFAULT_FIRST_PORT, last_port=DEFAULT_LAST_PORT,
+                 block_size=DEFAULT_BLOCK_SIZE):
+        if fcntl is None:
+            raise RuntimeError("*** PortAllocator requires fcntl.flock, which this platform lacks ***")
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), 'testing.parity-ports')
+        self.directory = directory
+        self.first_port = first_port
+        self.block_size = block_size
+        self.block_count = (last_port - first_port + 1) // block_size
+        if self.block_count < 1:
+            raise ValueError("no block of {} ports between {} and {}".format(block_size, first_port, last_port))
+
+    def _lock(self, first):
+        """returns the descriptor of the locked lock file of the block starting at `first`, or None"""
+        fd = os.open(os.path.join(self.directory, '{}.lock'.format(first)), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def reserve(self):
+        """reserves a free block, returns its PortBlock
+
+        Blocks are tried from a random one on, so that processes starting
+        at the same time rarely compete for the same lock.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        offset = random.randrange(self.block_count)
+        for i in range(self.block_count):
+            first = self.first_port + (offset + i) % self.block_count * self.block_size
+            fd = self._lock(first)
+            if fd is None:
+                continue
+            ports = tuple(range(first, first + self.block_size))
+            if not all(is_port_free(port) for port in ports):
+                os.close(fd)
+                continue
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode('ascii'))
+            return PortBlock(ports, fd)
+        raise RuntimeError("*** no free block of {} ports in {} ***".format(self.block_size, self.directory))
+
+    def __deepcopy__(self, memo):
+        # shared by everything it is passed to, also when settings are copied
+        return self
+
+
+_allocator = None
+
+
+def get_port_allocator():
+    """returns the allocator used by everything not given one with the `port_allocator` setting
+
+    Returns None where `flock` isn't available.
+    """
+    global _allocator
+    if _allocator is None and fcntl is not None:
+        _allocator = PortAllocator()
+    return _allocator
+
+
+def set_port_allocator(allocator):
+    """sets the default allocator (None for a new one with the default range) and returns the previous one"""
+    global _allocator
+    previous, _allocator = _allocator, allocator
+    return previous
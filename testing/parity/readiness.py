@@ -0,0 +1,91 @@
+import json
+import re
+import socket
+import urllib.request
+
+__all__ = ['Backoff', 'LogWatcher', 'is_port_open', 'rpc_ping']
+
+# parity doesn't announce its RPC server in every version, but once the node
+# URL is printed the servers are about to come up
+DEFAULT_LOG_PATTERN = r"RPC listening|Public node URL"
+
+
+class Backoff(object):
+    """exponentially growing delays, from `initial` up to `maximum` seconds"""
+
+    def __init__(self, initial=0.01, maximum=0.5, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.reset()
+
+    def reset(self):
+        self.delay = self.initial
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        delay = self.delay
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+
+
+class LogWatcher(object):
+    """looks for `pattern` in the lines appended to a log file"""
+
+    def __init__(self, path, pattern=DEFAULT_LOG_PATTERN):
+        self.path = path
+        self.pattern = re.compile(pattern)
+        self.offset = 0
+        self.partial = b''
+        self.match = None
+
+    def poll(self):
+        """reads what was written since the last call, returns True once the pattern was seen"""
+        if self.match is not None:
+            return True
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return False
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            m = self.pattern.search(line.decode('utf-8', 'replace'))
+            if m:
+                self.match = m
+                return True
+        return False
+
+
+def is_port_open(port, host='127.0.0.1', timeout=0.1):
+    """returns True if something accepts TCP connections on the given port"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def rpc_ping(url, timeout=1.0):
+    """sends a cheap JSON-RPC request, returns None if it was answered or the error otherwise"""
+    try:
+        with urllib.request.urlopen(
+                urllib.request.Request(
+                    url,
+                    headers={'Content-Type': "application/json"},
+                    data=json.dumps({
+                        "jsonrpc": "2.0",
+                        "id": "1234",
+                        "method": "net_version",
+                        "params": []
+                    }).encode('utf-8')
+                ), timeout=timeout) as response:
+            json.load(response)
+        return None
+    except Exception as e:
+        return e
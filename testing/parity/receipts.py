@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from testing.parity.readiness import Backoff
+from testing.parity.ws import WebSocket
+
+__all__ = ['ReceiptWatcher', 'poll_receipts', 'fetch_receipts']
+
+
+def fetch_receipts(client, tx_hashes):
+    """returns the receipts of the given transactions that are mined already
+
+    Fetched in one JSON-RPC batch, as a dict of tx hash -> receipt.
+    """
+    with client.batch() as batch:
+        futures = [(tx_hash, batch.get_receipt(tx_hash)) for tx_hash in tx_hashes]
+    receipts = {}
+    for tx_hash, future in futures:
+        receipt = future.result()
+        if receipt is not None and receipt.get('blockNumber') is not None:
+            receipts[tx_hash] = receipt
+    return receipts
+
+
+def _normalize(tx_hashes):
+    return [tx_hash.lower() if tx_hash.startswith('0x') else '0x' + tx_hash.lower()
+            for tx_hash in tx_hashes]
+
+
+def poll_receipts(client, tx_hashes, timeout=30.0, initial=0.01, maximum=0.5):
+    """waits for the receipts of all given transactions by polling with backoff
+
+    All pending receipts are fetched in one batch per round. Returns the
+    receipts in the order of `tx_hashes`.
+    """
+    tx_hashes = _normalize(tx_hashes)
+    deadline = time.time() + timeout
+    backoff = Backoff(initial, maximum)
+    receipts = {}
+    while True:
+        pending = [tx_hash for tx_hash in set(tx_hashes) if tx_hash not in receipts]
+        found = fetch_receipts(client, pending)
+        if found:
+            receipts.update(found)
+            backoff.reset()
+        if len(receipts) == len(set(tx_hashes)):
+            return [receipts[tx_hash] for tx_hash in tx_hashes]
+        if time.time() > deadline:
+            raise TimeoutError("timeout waiting for receipts of {}".format(
+                ', '.join(tx_hash for tx_hash in tx_hashes if tx_hash not in receipts)))
+        time.sleep(min(next(backoff), max(deadline - time.time(), 0)))
+
+
+class ReceiptWatcher(object):
+    """resolves pending transactions from a single newHeads subscription
+
+    A background thread reads new block headers from parity's websocket
+    server. For every new block the transactions of all waiting callers that
+    it includes are looked up in one batch over `client`.
+    """
+
+    def __init__(self, client, ws_url):
+        self.client = client
+        self.ws_url = ws_url
+        self._pending = {}
+        # tx hash -> number of `wait` calls waiting for it
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread = None
+        self._error = None
+
+    def _subscribe(self):
+        ws = WebSocket(self.ws_url)
+        try:
+            ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+            while True:
+                message = ws.recv()
+                if message is None:
+                    raise ConnectionError("websocket closed while subscribing")
+                response = json.loads(message)
+                if response.get('id') == 1:
+                    break
+            if response.get('error') is not None:
+                raise ConnectionError("eth_subscribe failed: {}".format(response['error']))
+            ws.settimeout(None)
+        except Exception:
+            ws.close()
+            raise
+        return ws
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ws = self._subscribe()
+            self._error = None
+            self._thread = threading.Thread(target=self._run, args=(self._ws,),
+                                            name='receipt-watcher', daemon=True)
+            self._thread.start()
+
+    def _run(self, ws):
+        try:
+            while True:
+                message = ws.recv()
+                if message is None:
+                    break
+                notification = json.loads(message)
+                if notification.get('method') != 'eth_subscription':
+                    continue
+                self._on_head(notification['params']['result'])
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self._fail_pending()
+
+    def _on_head(self, header):
+        with self._lock:
+            if not self._pending:
+                return
+        block = self.client.get_block(header['number'])
+        if block is None:
+            return
+        with self._lock:
+            included = [tx_hash for tx_hash in block.get('transactions', []) if tx_hash.lower() in self._pending]
+        if included:
+            self._resolve(fetch_receipts(self.client, _normalize(included)))
+
+    def _resolve(self, receipts):
+        with self._lock:
+            for tx_hash, receipt in receipts.items():
+                future = self._pending.pop(tx_hash, None)
+                if future is not None:
+                    future.set_result(receipt)
+
+    def _fail_pending(self):
+        # the subscription is gone: wake everyone up so they fall back to polling
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("newHeads subscription closed"))
+
+    def wait(self, tx_hashes, timeout=30.0):
+        """waits for the receipts of all given transactions, returning them in order"""
+        tx_hashes = _normalize(tx_hashes)
+        deadline = time.time() + timeout
+        try:
+            self._ensure_running()
+        except Exception:
+            return poll_receipts(self.client, tx_hashes, timeout)
+
+        with self._lock:
+            futures = {tx_hash: self._pending.setdefault(tx_hash, Future()) for tx_hash in tx_hashes}
+            for tx_hash in futures:
+                self._waiters[tx_hash] = self._waiters.get(tx_hash, 0) + 1
+        try:
+            # the subscription is active: anything mined from now on is seen by
+            # the watcher, anything mined before is found here
+            self._resolve(fetch_receipts(self.client, list(futures)))
+
+            receipts = {}
+            for tx_hash, future in futures.items():
+                try:
+                    receipts[tx_hash] = future.result(timeout=max(deadline - time.time(), 0))
+                except ConnectionError:
+                    return poll_receipts(self.client, tx_hashes, max(deadline - time.time(), 0))
+                except FutureTimeoutError:
+                    pending = [h for h in futures if not futures[h].done()]
+                    raise TimeoutError("timeout waiting for receipts of {}".format(', '.join(pending)))
+            return [receipts[tx_hash] for tx_hash in tx_hashes]
+        finally:
+            self._release(futures)
+
+    def _release(self, futures):
+        """forgets the unresolved `futures` nobody else is waiting for"""
+        with self._lock:
+            for tx_hash, future in futures.items():
+                waiters = self._waiters.pop(tx_hash) - 1
+                if waiters:
+                    self._waiters[tx_hash] = waiters
+                elif self._pending.get(tx_hash) is future:
+                    del self._pending[tx_hash]
+
+    def close(self):
+        with self._lock:
+            ws, self._ws = self._ws, None
+            thread, self._thread = self._thread, None
+        if ws is not None:
+            ws.close()
+        if thread is not None:
+            thread.join()
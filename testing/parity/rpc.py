@@ -0,0 +1,370 @@
+import abc
+import binascii
+import http.client
+import itertools
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from testing.parity.metrics import Histogram, get_metrics_sink
+
+__all__ = ['JSONRPCClient', 'JSONRPCError', 'Batch']
+
+# errors raised when the server closed an idle keep-alive connection
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                           ConnectionResetError, BrokenPipeError)
+
+# parity rejects requests larger than --jsonrpc-max-payload (5 MiB by default)
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+
+class JSONRPCError(Exception):
+    def __init__(self, error):
+        self.code = error.get('code')
+        self.message = error.get('message')
+        self.data = error.get('data')
+        super(JSONRPCError, self).__init__("{}: {}".format(self.code, self.message))
+
+
+def _hex(value):
+    if isinstance(value, bytes):
+        return "0x" + binascii.b2a_hex(value).decode('ascii')
+    if isinstance(value, int):
+        return hex(value)
+    return value
+
+
+def _int(value):
+    return None if value is None else int(value, 16)
+
+
+class _Call(object):
+    __slots__ = ('method', 'payload', 'body', 'convert', 'future', 'started_at')
+
+    def __init__(self, method, payload, convert):
+        self.method = method
+        self.payload = payload
+        # encoded here, so that unserializable params fail in the caller
+        self.body = json.dumps(payload).encode('utf-8')
+        self.convert = convert
+        self.future = Future()
+        self.started_at = time.time()
+
+
+class _Methods(object, metaclass=abc.ABCMeta):
+    """the calls available on clients and batches"""
+
+    @abc.abstractmethod
+    def _call(self, method, params, convert=None):
+        """calls `method` with the sequence `params`, passing its result through `convert` (if given)
+
+        What is returned is up to the subclass: `JSONRPCClient` returns the
+        converted result, `Batch` a Future that gets it once the batch is
+        sent, and `aio.AsyncJSONRPCClient` defines it as a coroutine. Errors the server
+        returns are raised (or set on the Future) as JSONRPCError.
+        """
+
+    def request(self, method, *params):
+        """calls `method` with the given params, raising JSONRPCError on errors"""
+        return self._call(method, params)
+
+    def net_version(self):
+        return self._call('net_version', ())
+
+    def peer_count(self):
+        return self._call('net_peerCount', (), _int)
+
+    def block_number(self):
+        return self._call('eth_blockNumber', (), _int)
+
+    def get_balance(self, address, block='latest'):
+        return self._call('eth_getBalance', (_hex(address), _hex(block)), _int)
+
+    def get_code(self, address, block='latest'):
+        return self._call('eth_getCode', (_hex(address), _hex(block)))
+
+    def get_storage_at(self, address, position, block='latest'):
+        return self._call('eth_getStorageAt', (_hex(address), _hex(position), _hex(block)))
+
+    def get_transaction_count(self, address, block='latest'):
+        return self._call('eth_getTransactionCount', (_hex(address), _hex(block)), _int)
+
+    def get_block(self, block='latest', full_transactions=False):
+        return self._call('eth_getBlockByNumber', (_hex(block), full_transactions))
+
+    def send_raw_transaction(self, raw_tx):
+        return self._call('eth_sendRawTransaction', (_hex(raw_tx),))
+
+    def get_transaction(self, tx_hash):
+        return self._call('eth_getTransactionByHash', (_hex(tx_hash),))
+
+    def get_receipt(self, tx_hash):
+        return self._call('eth_getTransactionReceipt', (_hex(tx_hash),))
+
+    def call(self, transaction, block='latest'):
+        return self._call('eth_call', (transaction, _hex(block)))
+
+
+class Batch(_Methods):
+    """collects calls and sends them as JSON-RPC batches
+
+    Every call returns a `concurrent.futures.Future` that is resolved by
+    `send()`, which is also called when leaving the with block.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def _call(self, method, params, convert=None):
+        call = self.client._new_call(method, params, convert)
+        self.calls.append(call)
+        return call.future
+
+    def send(self):
+        calls, self.calls = self.calls, []
+        self.client._send_batch(calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.send()
+        else:
+            for call in self.calls:
+                call.future.cancel()
+
+
+class _Coalescer(object):
+    """merges calls made within `window` seconds of each other into one batch"""
+
+    def __init__(self, client, window):
+        self.client = client
+        self.window = window
+        self.queue = queue.Queue()
+        self.closed = False
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=client.max_connections)
+        self.thread = threading.Thread(target=self.run, name='jsonrpc-coalescer', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            call = self.queue.get()
+            if call is None:
+                break
+            calls = [call]
+            deadline = time.time() + self.window
+            while len(calls) < self.client.max_batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    call = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if call is None:
+                    self.queue.put(None)
+                    break
+                calls.append(call)
+            self.executor.submit(self.client._send_batch, calls)
+
+    def put(self, call):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("*** JSON-RPC client is closed ***")
+            self.queue.put(call)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self.queue.put(None)
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+        # nothing should be left, but never leave a caller waiting
+        while True:
+            try:
+                call = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if call is not None:
+                call.future.set_exception(RuntimeError("*** JSON-RPC client is closed ***"))
+
+
+class JSONRPCClient(_Methods):
+    """JSON-RPC client over persistent HTTP/1.1 connections
+
+    Idle connections are kept in a pool of up to `max_connections` and
+    shared between threads. The latency of every call is recorded per method,
+    see `latencies`, and passed to `metrics` (a `MetricsSink`, by default
+    the one from `get_metrics_sink`).
+
+    `batch()` groups calls explicitly. With `coalesce_window` set, calls
+    made from different threads within that many seconds of each other
+    are sent together as a single batch request. Batches are split to stay
+    within `max_batch_size` calls and `max_batch_bytes`.
+    """
+
+    def __init__(self, url, timeout=30.0, max_connections=8, coalesce_window=None,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES, metrics=None):
+        parsed = urllib.parse.urlsplit(url)
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = parsed.path or '/'
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.metrics = metrics
+        self.latencies = {}
+
+        self._ids = itertools.count(1)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._coalescer = None
+        if coalesce_window is not None:
+            self._coalescer = _Coalescer(self, coalesce_window)
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _checkin(self, connection):
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _post(self, body):
+        connection, reused = self._checkout()
+        try:
+            try:
+                response = self._send(connection, body)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                response = self._send(connection, body)
+            data = response.read()
+        except Exception:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(connection)
+        if response.status != 200:
+            raise http.client.HTTPException("HTTP {} {}: {}".format(
+                response.status, response.reason, data.decode('utf-8', 'replace')))
+        return json.loads(data.decode('utf-8'))
+
+    def _send(self, connection, body):
+        connection.request('POST', self.path, body=body,
+                           headers={'Content-Type': "application/json"})
+        return connection.getresponse()
+
+    def _record(self, method, elapsed):
+        histogram = self.latencies.get(method)
+        if histogram is None:
+            histogram = self.latencies.setdefault(method, Histogram())
+        histogram.record(elapsed)
+        (self.metrics or get_metrics_sink()).timing('rpc.' + method, elapsed)
+
+    def _payload(self, method, params):
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+
+    def _new_call(self, method, params, convert):
+        return _Call(method, self._payload(method, params), convert)
+
+    def _call(self, method, params, convert=None):
+        coalescer = self._coalescer
+        if coalescer is not None:
+            call = self._new_call(method, params, convert)
+            coalescer.put(call)
+            # every request of the batch may take up to `timeout`
+            return call.future.result(timeout=coalescer.window + 2 * self.timeout)
+
+        started_at = time.time()
+        response = self._post(json.dumps(self._payload(method, params)).encode('utf-8'))
+        self._record(method, time.time() - started_at)
+        if response.get('error') is not None:
+            raise JSONRPCError(response['error'])
+        result = response.get('result')
+        return result if convert is None else convert(result)
+
+    def _chunks(self, calls):
+        chunk, size = [], 2
+        for call in calls:
+            if chunk and (len(chunk) >= self.max_batch_size or
+                          size + len(call.body) + 1 > self.max_batch_bytes):
+                yield chunk
+                chunk, size = [], 2
+            chunk.append(call)
+            size += len(call.body) + 1
+        if chunk:
+            yield chunk
+
+    def _send_batch(self, calls):
+        for chunk in self._chunks(calls):
+            try:
+                responses = self._post(b'[' + b','.join(call.body for call in chunk) + b']')
+            except Exception as exc:
+                for call in chunk:
+                    call.future.set_exception(exc)
+                continue
+            if isinstance(responses, dict):
+                # the whole batch was rejected
+                responses = [dict(responses, id=call.payload['id']) for call in chunk]
+            by_id = {response.get('id'): response for response in responses}
+            finished_at = time.time()
+            for call in chunk:
+                self._record(call.method, finished_at - call.started_at)
+                response = by_id.get(call.payload['id'])
+                if response is None:
+                    call.future.set_exception(JSONRPCError({'message': "missing response in batch"}))
+                elif response.get('error') is not None:
+                    call.future.set_exception(JSONRPCError(response['error']))
+                else:
+                    try:
+                        result = response.get('result')
+                        call.future.set_result(result if call.convert is None else call.convert(result))
+                    except Exception as exc:
+                        call.future.set_exception(exc)
+
+    def batch(self):
+        """returns a `Batch` for sending several calls in one request"""
+        return Batch(self)
+
+    def latency_stats(self):
+        """returns count, mean, min, max and percentiles of the call latency (in seconds) per method"""
+        return {method: histogram.as_dict() for method, histogram in list(self.latencies.items())}
+
+    def close_idle(self):
+        """closes all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def close(self):
+        """closes all idle connections and stops coalescing calls"""
+        if self._coalescer is not None:
+            self._coalescer.close()
+            self._coalescer = None
+        self.close_idle()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,857 @@
+import binascii
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import json
+import re
+import shutil
+import weakref
+
+from testing.common.database import (
+    Database, DatabaseFactory, get_path_of, get_unused_port
+)
+from testing.parity import genesis, history
+from testing.parity.chain import ACCOUNT_NONCE, ChainSpecFile, build_chain_spec, merge
+from testing.parity.commandline import compile_flags, INSTANCE_OPTIONS
+from testing.parity.crypto import privtopub, privtoaddr, derive_accounts, encode_int32, decode_hex
+from testing.parity.logs import LogCapture, DEFAULT_MAX_LINES
+from testing.parity.metrics import get_metrics_sink
+from testing.parity.ports import PORT_IN_USE, get_port_allocator
+from testing.parity.snapshot import SnapshotCache, clone_tree, DEFAULT_MAX_SIZE
+from testing.parity.rpc import JSONRPCClient
+from testing.parity.teardown import stop_all
+from testing.parity.receipts import ReceiptWatcher, poll_receipts
+from testing.parity.readiness import Backoff, LogWatcher, DEFAULT_LOG_PATTERN, is_port_open, rpc_ping
+
+__all__ = ['ParityServer', 'ParityServerFactory', 'get_parity_version', 'clear_version_cache']
+
+DEFAULT_STARTGAS = 21000
+DEFAULT_GASPRICE = 20000000000
+DEFAULT_PREFUNDED_BALANCE = 10 ** 24
+
+
+def get_cache_directory():
+    """returns the directory used for caches shared between processes"""
+    cache_dir = os.environ.get('TESTING_PARITY_CACHE_DIR')
+    if not cache_dir:
+        cache_dir = os.path.join(tempfile.gettempdir(), 'testing.parity')
+    return cache_dir
+
+
+# realpath -> (mtime, size, version)
+_version_cache = {}
+_version_cache_lock = threading.Lock()
+
+
+def _version_cache_file():
+    return os.path.join(get_cache_directory(), 'versions.json')
+
+
+def _read_version_cache_file():
+    try:
+        with open(_version_cache_file()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_version_cache_file(path, mtime, size, version):
+    entries = _read_version_cache_file()
+    entries[path] = {"mtime": mtime, "size": size, "version": list(version)}
+    filename = _version_cache_file()
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(filename))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmpname, filename)
+    except OSError:
+        # the on-disk cache is only an optimisation
+        pass
+
+
+def _probe_parity_version(parity_server):
+    p = subprocess.Popen([parity_server, '-v'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    outs, errs = p.communicate(timeout=15)
+
+    for line in errs.split(b'\n') + outs.split(b'\n'):
+        m = re.match(r"^\s+version\sParity(?:-Ethereum)?\/v([0-9.]+).*$", line.decode('utf-8'))
+        if m:
+            return tuple(int(i) for i in m.group(1).split('.'))
+    raise Exception("Unable to figure out Parity version")
+
+
+def get_parity_version(parity_server=None, use_disk_cache=True):
+    """returns the version of the given parity binary as a tuple
+
+    The result of running `parity -v` is cached both in this process and on
+    disk (see `get_cache_directory`), keyed by the binary's realpath, mtime
+    and size, so replacing the binary invalidates the cached entry. Calling
+    this once per test session pre-warms the cache for all `ParityServer`s.
+    """
+    if parity_server is None:
+        parity_server = get_path_of('parity')
+        if parity_server is None:
+            raise Exception("Unable to find parity in PATH")
+
+    path = os.path.realpath(parity_server)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+
+    with _version_cache_lock:
+        cached = _version_cache.get(path)
+        if cached is not None and cached[:2] == key:
+            return cached[2]
+
+        version = None
+        if use_disk_cache:
+            entry = _read_version_cache_file().get(path)
+            if entry and (entry.get('mtime'), entry.get('size')) == key:
+                version = tuple(entry['version'])
+        if version is None:
+            version = _probe_parity_version(path)
+            if use_disk_cache:
+                _write_version_cache_file(path, key[0], key[1], version)
+
+        _version_cache[path] = key + (version,)
+        return version
+
+
+def clear_version_cache(disk=True):
+    """forgets all cached parity versions"""
+    with _version_cache_lock:
+        _version_cache.clear()
+        if disk:
+            try:
+                os.remove(_version_cache_file())
+            except OSError:
+                pass
+
+
+def generate_node_key():
+    """returns a random node key, as accepted by the `node_key` setting"""
+    return "{:0>64}".format(binascii.b2a_hex(os.urandom(32)).decode('ascii'))
+
+
+def get_node_public_key(node_key):
+    """returns the public key used in the enode url of a node with the given (hex) node key"""
+    pub_x, pub_y = privtopub(binascii.a2b_hex(node_key))
+    pub = encode_int32(pub_x) + encode_int32(pub_y)
+    return "{:0>128}".format(binascii.b2a_hex(pub).decode('ascii'))
+
+
+# the ports a node takes from its PortBlock, in order
+PORT_SETTINGS = ('port', 'jsonrpc_port', 'ws_port', 'dapps_port')
+
+
+class ParityServer(Database):
+
+    DEFAULT_SETTINGS = dict(auto_start=2,
+                            base_dir=None,
+                            parity_server=None,
+                            instant_seal=True,
+                            ethash=False,
+                            author="0x0102030405060708090001020304050607080900",
+                            faucet_private_key=None,
+                            prefunded_accounts=None,
+                            prefunded_balance=DEFAULT_PREFUNDED_BALANCE,
+                            prefunded_seed=None,
+                            port=None,
+                            jsonrpc_port=None,
+                            enable_ws=False,
+                            ws_port=None,
+                            bootnodes=None,
+                            node_key=None,
+                            no_dapps=False,
+                            dapps_port=None,
+                            port_allocator=None,
+                            port_block=None,
+                            port_retries=2,
+                            difficulty=None,
+                            network_id=66,
+                            min_gas_price=None,
+                            gas_limit=None,
+                            reseal_min_period=None,
+                            reseal_max_period=None,
+                            tx_queue_size=None,
+                            tx_queue_per_sender=None,
+                            tx_queue_mem_limit=None,
+                            jsonrpc_threads=None,
+                            jsonrpc_server_threads=None,
+                            copy_data_from=None,
+                            chain_overrides=None,
+                            genesis_contracts=None,
+                            history_fixture=None,
+                            snapshot_cache=None,
+                            snapshot_cache_size=DEFAULT_MAX_SIZE,
+                            boot_poll_interval=0.01,
+                            boot_poll_max_interval=0.5,
+                            boot_rpc_timeout=1.0,
+                            boot_log_pattern=None,
+                            log_capture=True,
+                            log_buffer_lines=DEFAULT_MAX_LINES,
+                            log_max_bytes=None,
+                            log_backup_count=1,
+                            metrics=None)
+
+    # settings used by Database that have no default
+    EXTRA_SETTINGS = {'boot_timeout'}
+
+    subdirectories = ['data', 'tmp']
+
+    _client = None
+    _receipt_watcher = None
+    # LogCapture of the parity process' output, see `log_capture`
+    log = None
+    # PortBlock the ports not given as settings were taken from
+    port_block = None
+    _assigned_ports = ()
+
+    def initialize(self):
+        started_at = time.time()
+        self.parity_server = self.settings.get('parity_server')
+        if self.parity_server is None:
+            self.parity_server = get_path_of('parity')
+
+        self.version = get_parity_version(self.parity_server)
+        self.metrics.timing('parity.version', time.time() - started_at)
+
+        unknown = set(self.settings) - set(self.DEFAULT_SETTINGS) - self.EXTRA_SETTINGS
+        if unknown:
+            raise ValueError("unknown settings: {}".format(', '.join(sorted(unknown))))
+        self.commandline_builder = compile_flags(self.version)
+        self.commandline_builder.validate(self.settings)
+        self.port_block = self.settings['port_block']
+        self._assigned_ports = []
+        self.chainfile = os.path.join(self.base_dir, 'chain.json')
+        self.chain_spec_file = ChainSpecFile(self.chainfile)
+        self.faucet_private_key = self.settings.get('faucet_private_key')
+        if self.faucet_private_key is None:
+            self.faucet_private_key = os.urandom(32)
+        elif isinstance(self.faucet_private_key, str):
+            self.faucet_private_key = decode_hex(self.faucet_private_key)
+
+        self.prefunded_accounts = self._get_prefunded_accounts()
+        self._genesis_accounts = tuple((address.hex(), balance) for _, address, balance in self.prefunded_accounts)
+
+        self.author = self.settings.get('author')
+
+        difficulty = self.settings.get('difficulty')
+        if difficulty is None:
+            difficulty = "0x400"
+        elif isinstance(difficulty, int):
+            difficulty = hex(difficulty)
+        elif isinstance(difficulty, str):
+            if not difficulty.startswith("0x"):
+                difficulty = "0x{}".format(difficulty)
+        self.difficulty = difficulty
+
+        network_id = self.settings.get('network_id')
+        if not isinstance(network_id, int):
+            try:
+                network_id = int(network_id, 16)
+            except ValueError:
+                raise Exception("Network ID must be an integer or hex string")
+        self.network_id = network_id
+
+        snapshot_cache = self.settings.get('snapshot_cache')
+        if snapshot_cache is True:
+            snapshot_cache = os.path.join(get_cache_directory(), 'snapshots')
+        if isinstance(snapshot_cache, str):
+            snapshot_cache = SnapshotCache(snapshot_cache, self.settings['snapshot_cache_size'])
+        self.snapshot_cache = snapshot_cache or None
+        self.boot_timings = {}
+        self.checkpoint_timings = {}
+        self._checkpoints = []
+        self._next_checkpoint = 0
+        self.history_timings = {}
+        self._history_imported = False
+        self.genesis_contract_addresses, self._genesis_contracts = self._get_genesis_contracts()
+        self.metrics.timing('parity.initialize', time.time() - started_at)
+
+    def _get_genesis_contracts(self):
+        """returns the addresses and chain spec accounts of the `genesis_contracts`
+
+        `genesis_contracts` is either a dict of address -> account (see
+        `genesis.genesis_accounts`), or a list of init code. Init code is
+        deployed into a reference chain from `genesis.DEPLOYER_KEY` the first
+        time, and the accounts that resulted are cached.
+        """
+        contracts = self.settings['genesis_contracts']
+        if not contracts:
+            return [], None
+        if isinstance(contracts, dict):
+            accounts = genesis.genesis_accounts(contracts, ACCOUNT_NONCE)
+            return [decode_hex(address) for address in accounts], accounts
+
+        init_codes = ['0x' + (decode_hex(code) if isinstance(code, str) else code).hex() for code in contracts]
+        key = genesis.cache_key(self.version, self.network_id, self.author, self.settings['gas_limit'],
+                                self.settings['chain_overrides'], init_codes)
+        cached = genesis.load_cached(get_cache_directory(), key)
+        if cached is not None:
+            return cached
+        with genesis.cache_lock(get_cache_directory(), key):
+            # another thread or process may have deployed them while we waited
+            cached = genesis.load_cached(get_cache_directory(), key)
+            if cached is not None:
+                return cached
+            return self._deploy_genesis_contracts(init_codes, key)
+
+    def _deploy_genesis_contracts(self, init_codes, key):
+        started_at = time.time()
+        reference = ParityServer(parity_server=self.parity_server,
+                                 faucet_private_key=genesis.DEPLOYER_KEY,
+                                 author=self.author,
+                                 network_id=self.network_id,
+                                 gas_limit=self.settings['gas_limit'],
+                                 chain_overrides=self.settings['chain_overrides'],
+                                 port_allocator=self.settings['port_allocator'],
+                                 metrics=self.settings['metrics'])
+        try:
+            addresses, accounts = genesis.deploy(reference, init_codes, DEFAULT_GASPRICE)
+        finally:
+            reference.stop()
+        genesis.store_cached(get_cache_directory(), key, addresses, accounts)
+        self.metrics.timing('parity.genesis_contracts', time.time() - started_at)
+        return addresses, accounts
+
+    @property
+    def metrics(self):
+        """the `MetricsSink` given as the `metrics` setting, or the default one"""
+        return self.settings.get('metrics') or get_metrics_sink()
+
+    def dsn(self, **kwargs):
+        dsn = {'node': 'enode://{}@127.0.0.1:{}'.format(self.node_public_key, self.settings['port']),
+               'url': self.url(),
+               'network_id': self.network_id}
+        ws_url = self.ws_url()
+        if ws_url:
+            dsn['ws_url'] = ws_url
+        return dsn
+
+    def url(self):
+        return "http://localhost:{}".format(self.settings['jsonrpc_port'])
+
+    def ws_url(self):
+        if self.settings['ws_port']:
+            return "ws://localhost:{}".format(self.settings['ws_port'])
+        return None
+
+    def client(self, **kwargs):
+        """returns a JSON-RPC client for this node
+
+        Without arguments the same client, and so its keep-alive connections,
+        is shared by all callers. Arguments (see `JSONRPCClient`, e.g.
+        `coalesce_window`) create a new client which the caller has to close.
+        """
+        if kwargs:
+            kwargs.setdefault('metrics', self.settings['metrics'])
+            return JSONRPCClient(self.url(), **kwargs)
+        if self._client is None:
+            self._client = JSONRPCClient(self.url(), metrics=self.settings['metrics'])
+        return self._client
+
+    def wait_for_receipts(self, tx_hashes, timeout=30.0):
+        """waits until all the given transactions are mined and returns their receipts
+
+        With `enable_ws` the node's new blocks are followed over a websocket
+        subscription shared by all callers, otherwise the receipts are polled
+        for with an increasing interval.
+        """
+        if self.ws_url() is None:
+            return poll_receipts(self.client(), tx_hashes, timeout)
+        if self._receipt_watcher is None:
+            self._receipt_watcher = ReceiptWatcher(self.client(), self.ws_url())
+        return self._receipt_watcher.wait(tx_hashes, timeout)
+
+    def wait_for_receipt(self, tx_hash, timeout=30.0):
+        """waits until the given transaction is mined and returns its receipt"""
+        return self.wait_for_receipts([tx_hash], timeout)[0]
+
+    def get_faucet_private_key(self):
+        return self.faucet_private_key
+
+    def _get_prefunded_accounts(self):
+        """returns (private key, address, balance) for every account from `prefunded_accounts`
+
+        `prefunded_accounts` is either a number of accounts to derive from
+        `prefunded_seed`, a list of private keys or (private key, balance)
+        tuples, or a dict of private keys to balances.
+        """
+        accounts = self.settings.get('prefunded_accounts')
+        balance = self.settings['prefunded_balance']
+        if not accounts:
+            return []
+        if isinstance(accounts, int):
+            seed = self.settings.get('prefunded_seed') or b'testing.parity'
+            if isinstance(seed, str):
+                seed = seed.encode('utf-8')
+            return [(key, address, balance) for key, address in derive_accounts(accounts, seed)]
+
+        if isinstance(accounts, dict):
+            accounts = accounts.items()
+        result = []
+        for account in accounts:
+            if isinstance(account, (tuple, list)):
+                key, account_balance = account
+            else:
+                key, account_balance = account, balance
+            if isinstance(key, str):
+                key = decode_hex(key)
+            result.append((key, privtoaddr(key), account_balance))
+        return result
+
+    def get_prefunded_accounts(self):
+        """returns (private key, address) of every prefunded account"""
+        return [(key, "0x" + address.hex()) for key, address, _ in self.prefunded_accounts]
+
+    def get_prefunded_private_keys(self):
+        return [key for key, _, _ in self.prefunded_accounts]
+
+    def get_data_directory(self):
+        return os.path.join(self.base_dir, 'data')
+
+    def prestart(self):
+        started_at = time.time()
+        self._assign_ports()
+        super(ParityServer, self).prestart()
+
+        if self.settings['node_key'] is None:
+            self.settings['node_key'] = generate_node_key()
+
+        self.node_public_key = get_node_public_key(self.settings['node_key'])
+
+        chain_spec_started_at = time.time()
+        self.chain_spec_file.write(self.chain_spec())
+        self.metrics.timing('parity.chain_spec', time.time() - chain_spec_started_at)
+
+        data_dir = self.get_data_directory()
+        if (self.snapshot_cache is not None and not self.settings['copy_data_from']
+                and not (os.path.isdir(data_dir) and os.listdir(data_dir))):
+            key = self.snapshot_key()
+            if not self.snapshot_cache.restore(key, data_dir):
+                self.boot_pristine()
+                self.snapshot_cache.store(key, data_dir)
+
+        if self.settings['history_fixture'] and not self._history_imported:
+            self.import_history(self.settings['history_fixture'])
+            self._history_imported = True
+        self.metrics.timing('parity.prestart', time.time() - started_at)
+
+    def _assign_ports(self):
+        """sets the ports that aren't given, from `port_block` or a block reserved with the `port_allocator`
+
+        With `port_allocator=False`, or without a default allocator (see
+        `get_port_allocator`), every port is probed with get_unused_port
+        instead.
+        """
+        names = ['port', 'jsonrpc_port']
+        if self.settings['enable_ws']:
+            names.append('ws_port')
+        if self.version < (1, 7, 0) and not self.settings['no_dapps']:
+            names.append('dapps_port')
+        missing = [name for name in names if self.settings[name] is None]
+        if not missing:
+            return
+        allocator = self.settings['port_allocator']
+        if allocator is None:
+            allocator = get_port_allocator()
+        if self.port_block is None and not allocator:
+            for name in missing:
+                self.settings[name] = get_unused_port()
+            return
+        if self.port_block is None:
+            self.port_block = allocator.reserve()
+        ports = dict(zip(PORT_SETTINGS, self.port_block.ports))
+        for name in missing:
+            self.settings[name] = ports.get(name) or get_unused_port()
+            self._assigned_ports.append(name)
+
+    def release_ports(self):
+        """releases the `port_block`, the ports taken from it are chosen again on the next start"""
+        if self.port_block is not None:
+            self.port_block.release()
+            self.port_block = None
+        for name in self._assigned_ports:
+            self.settings[name] = None
+        self._assigned_ports = []
+
+    def _reassign_ports(self):
+        taken, self.port_block = self.port_block, None
+        self.release_ports()
+        try:
+            self._assign_ports()
+        finally:
+            # only now, so that the same block isn't reserved again
+            taken.release()
+
+    def _ports_taken(self, exc):
+        """whether parity failed to boot because a port of its own `port_block` is in use"""
+        return (self.port_block is not None and self.settings['port_block'] is None and
+                PORT_IN_USE.search(str(exc)) is not None)
+
+    def chain_spec(self):
+        """returns this node's chain spec, serialized"""
+        if self.settings.get('ethash'):
+            engine = 'ethash'
+        elif self.settings.get('instant_seal'):
+            engine = 'instant_seal'
+        else:
+            raise Exception("No selected engine")
+        overrides = {}
+        if self.settings['gas_limit'] is not None:
+            overrides["genesis"] = {"gasLimit": hex(self.settings['gas_limit'])}
+        if self._genesis_contracts:
+            overrides["accounts"] = self._genesis_contracts
+        if self.settings['chain_overrides']:
+            overrides = merge(overrides, self.settings['chain_overrides'])
+        return build_chain_spec(self.version, engine, self.difficulty, self.author, self.network_id,
+                                privtoaddr(self.faucet_private_key).hex(), self._genesis_accounts, overrides)
+
+    def snapshot_key(self):
+        """returns the key of this node's pristine data directory in the snapshot cache"""
+        flags = []
+        args = iter(self.get_server_commandline()[1:])
+        for arg in args:
+            if arg in INSTANCE_OPTIONS:
+                next(args, None)
+            else:
+                flags.append(arg)
+        return SnapshotCache.key(self.chain_spec(), self.version, flags)
+
+    def boot_pristine(self):
+        """boots parity once, so that it initializes the data directory, and stops it again"""
+        process = subprocess.Popen(self.get_server_commandline(),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self.wait_ready(process, time.time())
+        except RuntimeError as exc:
+            raise RuntimeError("*** failed to initialize %s data directory ***\n%s" % (self.name, exc))
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=self.DEFAULT_KILL_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def get_server_commandline(self):
+        author = self.author[2:] if self.author.startswith("0x") else self.author
+        bootnodes = self.settings['bootnodes']
+        if isinstance(bootnodes, list):
+            bootnodes = ','.join(bootnodes)
+        values = dict(self.settings, chain=self.chainfile, data_dir=self.get_data_directory(),
+                      author=author, bootnodes=bootnodes)
+        return [self.parity_server] + self.commandline_builder.build(values)
+
+    def start(self):
+        if self.child_process:
+            return  # already started
+
+        self._start_called_at = time.time()
+        self.boot_timings = {}
+        self.prestart()
+        retries = self.settings['port_retries']
+        while True:
+            self._spawn()
+            try:
+                self.wait_booting()
+                break
+            except RuntimeError as exc:
+                if retries <= 0 or not self._ports_taken(exc):
+                    self.stop()
+                    raise
+            # another process took one of the ports: try again on new ones
+            retries -= 1
+            self.terminate()
+            self._reassign_ports()
+            self._start_called_at = time.time()
+            self.boot_timings = {}
+        try:
+            self.poststart()
+        except Exception:
+            self.stop()
+            raise
+
+    def _spawn(self):
+        log_path = os.path.join(self.base_dir, '%s.log' % self.name)
+        try:
+            if self.settings['log_capture']:
+                self.child_process = subprocess.Popen(self.get_server_commandline(),
+                                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            else:
+                with open(log_path, 'wt') as logger:
+                    self.child_process = subprocess.Popen(self.get_server_commandline(),
+                                                          stdout=logger, stderr=logger)
+        except Exception as exc:
+            raise RuntimeError('failed to launch %s: %r' % (self.name, exc))
+        if self.settings['log_capture']:
+            self.log = LogCapture(self.child_process.stdout,
+                                  max_lines=self.settings['log_buffer_lines'],
+                                  path=log_path,
+                                  max_bytes=self.settings['log_max_bytes'],
+                                  backup_count=self.settings['log_backup_count']).start()
+
+    def wait_booting(self):
+        self.boot_timings['spawn'] = time.time() - self._start_called_at
+        pattern = self.settings['boot_log_pattern']
+        if pattern is True:
+            pattern = DEFAULT_LOG_PATTERN
+        log = self.log if self.settings['log_capture'] else os.path.join(self.base_dir, '%s.log' % self.name)
+        try:
+            self.boot_timings.update(self.wait_ready(self.child_process, self._start_called_at, log, pattern))
+        except RuntimeError as exc:
+            raise RuntimeError("%s\n%s" % (exc, self.read_bootlog()))
+        self._record_boot_timings(self.boot_timings)
+
+    def _record_boot_timings(self, boot_timings):
+        metrics = self.metrics
+        metrics.timing('parity.spawn', boot_timings['spawn'])
+        metrics.timing('parity.ready', boot_timings['rpc_live'] - boot_timings['spawn'])
+        metrics.timing('parity.start', boot_timings['rpc_live'])
+
+    def wait_ready(self, process, started_at, log=None, pattern=None):
+        """waits until the JSON-RPC server of the given parity process answers
+
+        Returns when each phase of the boot was reached, in seconds since
+        `started_at`: 'log_ready' when `pattern` showed up in `log`,
+        'socket_bound' when the JSON-RPC port accepted a connection and
+        'rpc_live' when the first request was answered. `log` is the path
+        of the log file or a LogCapture. Between checks it
+        sleeps for exponentially growing intervals, starting again from the
+        shortest whenever a phase is reached.
+        """
+        boot_timeout = self.settings.get('boot_timeout', self.DEFAULT_BOOT_TIMEOUT)
+        backoff = Backoff(self.settings['boot_poll_interval'], self.settings['boot_poll_max_interval'])
+        if not (log and pattern):
+            watcher = None
+        elif isinstance(log, LogCapture):
+            watcher = log.watcher(pattern)
+        else:
+            watcher = LogWatcher(log, pattern)
+        timings = {}
+        error = None
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("*** failed to launch %s ***" % self.name)
+
+            if watcher is not None and 'log_ready' not in timings and watcher.poll():
+                timings['log_ready'] = time.time() - started_at
+                backoff.reset()
+
+            if 'socket_bound' not in timings and is_port_open(self.settings['jsonrpc_port']):
+                timings['socket_bound'] = time.time() - started_at
+                backoff.reset()
+
+            if 'socket_bound' in timings:
+                error = rpc_ping(self.url(), timeout=self.settings['boot_rpc_timeout'])
+                if error is None:
+                    timings['rpc_live'] = time.time() - started_at
+                    return timings
+
+            if time.time() - started_at > boot_timeout:
+                raise RuntimeError("*** failed to launch %s (timeout) ***%s" %
+                                   (self.name, "\nlast error: %r" % error if error else ""))
+
+            time.sleep(next(backoff))
+
+    def is_server_available(self):
+        return (is_port_open(self.settings['jsonrpc_port']) and
+                rpc_ping(self.url(), timeout=self.settings['boot_rpc_timeout']) is None)
+
+    def read_bootlog(self):
+        if self.log is None:
+            return super(ParityServer, self).read_bootlog()
+        if self.child_process is None or self.child_process.poll() is not None:
+            # let the reader catch up with everything the process wrote
+            self.log.close(timeout=1.0)
+        return self.log.text()
+
+    def tail(self, n=50):
+        """returns the last `n` lines parity printed (requires `log_capture`)"""
+        return self.log.tail(n) if self.log is not None else []
+
+    def iter_log(self, follow=False, timeout=None):
+        """yields the lines parity printed, see `LogCapture.iter_log` (requires `log_capture`)"""
+        if self.log is None:
+            return iter(())
+        return self.log.iter_log(follow=follow, timeout=timeout)
+
+    def wait_for_log(self, pattern, timeout=30.0, new_only=False):
+        """waits until parity prints a line matching the regular expression `pattern`, returns the match
+
+        With `new_only` lines printed before the call are not considered.
+        """
+        if self.log is None:
+            raise RuntimeError("*** %s is not running with log_capture ***" % self.name)
+        return self.log.wait_for(pattern, timeout, self.log.position if new_only else 0)
+
+    def close_connections(self):
+        """closes the receipt subscription and idle JSON-RPC connections to the node"""
+        if self._receipt_watcher is not None:
+            self._receipt_watcher.close()
+        if self._client is not None:
+            self._client.close_idle()
+
+    def terminate(self, _signal=None):
+        self.close_connections()
+        super(ParityServer, self).terminate(_signal)
+        if self.log is not None:
+            self.log.close(timeout=1.0)
+
+    def cleanup(self):
+        super(ParityServer, self).cleanup()
+        if self.child_process is None:
+            self.release_ports()
+
+    def stop(self, _signal=signal.SIGTERM):
+        if self.child_process is None and not os.path.exists(self.base_dir):
+            return super(ParityServer, self).stop(_signal)  # stopped already
+        started_at = time.time()
+        try:
+            super(ParityServer, self).stop(_signal)
+        finally:
+            self.metrics.timing('parity.stop', time.time() - started_at)
+
+    def pause(self):
+        """stops service, without calling the cleanup"""
+        self.terminate(signal.SIGTERM)
+
+    def _checkpoint_directory(self, name):
+        return os.path.join(self.base_dir, 'checkpoints', name)
+
+    def _require_directory(self, path, action):
+        if not os.path.isdir(path):
+            raise RuntimeError("*** cannot {}: {} doesn't exist (the node was never set up or "
+                               "has been cleaned up) ***".format(action, path))
+
+    def checkpoint(self, name=None):
+        """captures the node's data directory, returns the name to pass to `rollback`
+
+        A running node is stopped while its data directory is cloned (see
+        `clone_tree`) and started again on the same ports and node key. How
+        long each step took is in `checkpoint_timings`.
+        """
+        self._require_directory(self.get_data_directory(), "take a checkpoint")
+        if name is None:
+            # the first unused number, also after checkpoints were removed
+            while True:
+                name = str(self._next_checkpoint)
+                self._next_checkpoint += 1
+                if not os.path.exists(self._checkpoint_directory(name)):
+                    break
+        path = self._checkpoint_directory(name)
+        if os.path.exists(path):
+            raise RuntimeError("*** checkpoint {} exists already ***".format(name))
+
+        timings = {}
+        running = self.child_process is not None
+        started_at = time.time()
+        if running:
+            self.pause()
+            timings['stop'] = time.time() - started_at
+        clone_tree(self.get_data_directory(), path)
+        timings['clone'] = time.time() - started_at - timings.get('stop', 0)
+        if running:
+            self.start()
+            timings['start'] = time.time() - started_at - timings['stop'] - timings['clone']
+        timings['total'] = time.time() - started_at
+        self.checkpoint_timings = timings
+        self._checkpoints.append(name)
+        return name
+
+    def rollback(self, name=None):
+        """restores the data directory captured by `checkpoint` (by default the latest one)
+
+        A running node is restarted on the same ports and node key. How long
+        each step took is in `checkpoint_timings`.
+        """
+        self._require_directory(self.base_dir, "roll back")
+        if name is None:
+            if not self._checkpoints:
+                raise RuntimeError("*** no checkpoint to roll back to ***")
+            name = self._checkpoints[-1]
+        path = self._checkpoint_directory(name)
+        if not os.path.isdir(path):
+            raise RuntimeError("*** unknown checkpoint {} ***".format(name))
+
+        timings = {}
+        running = self.child_process is not None
+        started_at = time.time()
+        if running:
+            self.pause()
+            timings['stop'] = time.time() - started_at
+        data_dir = self.get_data_directory()
+        if os.path.exists(data_dir):
+            shutil.rmtree(data_dir)
+        clone_tree(path, data_dir)
+        timings['restore'] = time.time() - started_at - timings.get('stop', 0)
+        if running:
+            self.start()
+            timings['start'] = time.time() - started_at - timings['stop'] - timings['restore']
+        timings['total'] = time.time() - started_at
+        self.checkpoint_timings = timings
+
+    def remove_checkpoint(self, name):
+        shutil.rmtree(self._checkpoint_directory(name))
+        self._checkpoints.remove(name)
+
+    def export_history(self, path, first_block=1, last_block=None):
+        """writes the node's blocks to `path`, a gzip compressed fixture for `history_fixture`
+
+        Returns the number of blocks written. A running node is stopped
+        while parity exports them and started again on the same ports and
+        node key.
+        """
+        running = self.child_process is not None
+        if running:
+            self.pause()
+        try:
+            return history.export_blocks(self.get_server_commandline(), self.version, path, first_block, last_block,
+                                         os.path.join(self.base_dir, 'history.log'))
+        finally:
+            if running:
+                self.start()
+
+    def import_history(self, path):
+        """imports the blocks of the fixture `path` into the data directory of the stopped node
+
+        Returns and keeps in `history_timings` the number of blocks, the
+        seconds it took and the blocks per second.
+        """
+        if self.child_process is not None:
+            raise RuntimeError("*** %s must be stopped to import blocks ***" % self.name)
+        started_at = time.time()
+        blocks = history.import_blocks(self.get_server_commandline(), self.version, path,
+                                       os.path.join(self.base_dir, 'history.log'))
+        seconds = time.time() - started_at
+        self.history_timings = {'blocks': blocks, 'seconds': seconds,
+                                'blocks_per_second': blocks / seconds if seconds > 0 else None}
+        self.metrics.timing('parity.import_history', seconds)
+        return self.history_timings
+
+
+class ParityServerFactory(DatabaseFactory):
+    target_class = ParityServer
+
+    def __init__(self, **kwargs):
+        # resolve the binary and its version once for all children
+        if kwargs.get('parity_server') is None:
+            kwargs['parity_server'] = get_path_of('parity')
+        if kwargs['parity_server'] is not None:
+            get_parity_version(kwargs['parity_server'])
+        self._servers = weakref.WeakSet()
+        super(ParityServerFactory, self).__init__(**kwargs)
+
+    def __call__(self):
+        server = super(ParityServerFactory, self).__call__()
+        self._servers.add(server)
+        return server
+
+    def stop_all(self, timeout=None):
+        """stops every node this factory created that is still around, see `stop_all`"""
+        servers, self._servers = list(self._servers), weakref.WeakSet()
+        stop_all(servers, timeout)
@@ -0,0 +1,189 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+__all__ = ['SnapshotCache', 'clone_tree']
+
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# files that parity's database never modifies in place, and so can be shared
+# between data directories with hardlinks
+IMMUTABLE_FILES = ('*.sst',)
+
+# things in a data directory that belong to a single running node
+EXCLUDED_FILES = ('*.ipc', 'network', 'LOCK')
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# touched whenever an entry is restored
+LAST_USED = '.last_used'
+
+
+def _reflink(src, dst):
+    """clones src into dst sharing the underlying blocks, where the filesystem supports it"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                ok = False
+            else:
+                ok = True
+    if ok:
+        shutil.copystat(src, dst)
+    else:
+        os.remove(dst)
+    return ok
+
+
+def _clone_file(src, dst, hardlink):
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    if not _reflink(src, dst):
+        shutil.copy2(src, dst)
+
+
+def _matches(name, patterns):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def clone_tree(src, dst, hardlink=IMMUTABLE_FILES, exclude=EXCLUDED_FILES):
+    """copies the directory tree `src` into `dst`
+
+    Files matching a pattern in `hardlink` are hardlinked, everything else is
+    reflinked when the filesystem supports it and copied otherwise. Sockets
+    and entries matching `exclude` are skipped.
+    """
+    os.makedirs(dst, exist_ok=True)
+    for name in os.listdir(src):
+        if _matches(name, exclude):
+            continue
+        s = os.path.join(src, name)
+        d = os.path.join(dst, name)
+        mode = os.lstat(s).st_mode
+        if stat.S_ISDIR(mode):
+            clone_tree(s, d, hardlink=hardlink, exclude=exclude)
+        elif stat.S_ISREG(mode):
+            _clone_file(s, d, _matches(name, hardlink))
+        elif stat.S_ISLNK(mode):
+            os.symlink(os.readlink(s), d)
+
+
+def _tree_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class SnapshotCache(object):
+    """content-addressed store of pristine parity data directories
+
+    Entries live in `directory`, one per key. Once the total size of all
+    entries exceeds `max_size` bytes, the least recently used ones are removed.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(chain_spec, version, flags):
+        """returns the cache key for a chain spec (bytes), parity version and list of command line flags"""
+        h = hashlib.sha256(chain_spec)
+        h.update(json.dumps([list(version), list(flags)]).encode('utf-8'))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self.path(key))
+
+    def restore(self, key, data_dir):
+        """fills `data_dir` from the cache, returns False if there is no entry for `key`"""
+        path = self.path(key)
+        if not os.path.isdir(path):
+            return False
+        try:
+            clone_tree(path, data_dir, exclude=EXCLUDED_FILES + (LAST_USED,))
+        except OSError:
+            # the entry was evicted while we were reading it
+            shutil.rmtree(data_dir, ignore_errors=True)
+            os.makedirs(data_dir, exist_ok=True)
+            return False
+        try:
+            os.utime(os.path.join(path, LAST_USED))
+        except OSError:
+            pass
+        return True
+
+    def store(self, key, data_dir):
+        """adds a copy of `data_dir` to the cache"""
+        if key in self:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+            try:
+                clone_tree(data_dir, tmp, hardlink=())
+                open(os.path.join(tmp, LAST_USED), 'w').close()
+                os.rename(tmp, self.path(key))
+            except OSError:
+                # another process stored the same key first
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+        except OSError:
+            return
+        self.evict()
+
+    def entries(self):
+        """returns (key, size, last used) for every entry, least recently used first"""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for name in names:
+            if name.startswith('.'):
+                continue
+            path = self.path(name)
+            try:
+                last_used = os.stat(os.path.join(path, LAST_USED)).st_mtime
+            except OSError:
+                last_used = 0
+            result.append((name, _tree_size(path), last_used))
+        result.sort(key=lambda entry: entry[2])
+        return result
+
+    def evict(self, max_size=None):
+        """removes least recently used entries until the cache fits in `max_size` bytes"""
+        if max_size is None:
+            max_size = self.max_size
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= max_size:
+                break
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.evict(max_size=0)
@@ -0,0 +1,135 @@
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from testing.parity.metrics import get_metrics_sink
+from testing.parity.readiness import Backoff
+
+__all__ = ['stop_all', 'remove_tree', 'wait_for_removals', 'ShutdownError']
+
+# how long to wait for a node to exit after SIGKILL
+KILL_WAIT_TIMEOUT = 5.0
+
+_remover = None
+_removals = set()
+_remover_lock = threading.Lock()
+
+
+class ShutdownError(RuntimeError):
+    """raised by `stop_all` when nodes had to be killed; `failed` holds (server, pid) of each"""
+
+    def __init__(self, message, failed):
+        super(ShutdownError, self).__init__(message)
+        self.failed = failed
+
+
+def remove_tree(path):
+    """removes the directory tree `path` in a background thread, returns a Future
+
+    Removals still pending when the interpreter exits are finished first.
+    """
+    global _remover
+    with _remover_lock:
+        if _remover is None:
+            _remover = ThreadPoolExecutor(max_workers=2, thread_name_prefix='testing.parity-remove')
+        future = _remover.submit(shutil.rmtree, path, True)
+        _removals.add(future)
+    future.add_done_callback(_removals.discard)
+    return future
+
+
+def wait_for_removals(timeout=None):
+    """waits until all directories passed to `remove_tree` are removed"""
+    with _remover_lock:
+        pending = list(_removals)
+    wait(pending, timeout)
+
+
+def _cleanup(server, background):
+    # the same as Database.cleanup, with the removal handed to remove_tree
+    if background and server.child_process is None and server._use_tmpdir:
+        server._use_tmpdir = False
+        if os.path.exists(server.base_dir):
+            remove_tree(server.base_dir)
+    server.cleanup()
+
+
+def stop_all(servers, timeout=None, _signal=signal.SIGTERM, background_cleanup=True):
+    """stops all `servers` at once and removes their data
+
+    Every running node is signalled first and then all of them are waited
+    for together. Nodes still running `timeout` seconds later (by default
+    their DEFAULT_KILL_TIMEOUT) are killed with SIGKILL. Once they exited,
+    each node's own `terminate` and `cleanup` run (closing its connections
+    and log capture, releasing its ports), and the time taken is recorded
+    as 'parity.stop_all' in every node's `metrics`. With
+    `background_cleanup` the temporary directories are removed by a
+    background thread, see `wait_for_removals`.
+
+    Raises a ShutdownError naming the nodes that had to be killed, after
+    every node has been stopped and cleaned up.
+    """
+    started_at = time.time()
+    servers = [server for server in servers if server is not None]
+    running = []
+    for server in servers:
+        process = server.child_process
+        if process is None or server._owner_pid != os.getpid():
+            continue
+        close_connections = getattr(server, 'close_connections', None)
+        if close_connections is not None:
+            close_connections()
+        try:
+            process.send_signal(_signal)
+        except OSError:
+            pass
+        running.append(server)
+
+    if timeout is None:
+        timeout = max([server.DEFAULT_KILL_TIMEOUT for server in running] or [0])
+    deadline = started_at + timeout
+    backoff = Backoff(0.005, 0.1)
+    pending = running
+    while pending:
+        pending = [server for server in pending if server.child_process.poll() is None]
+        if not pending or time.time() > deadline:
+            break
+        time.sleep(min(next(backoff), max(deadline - time.time(), 0)))
+
+    failed = []
+    for server in pending:
+        try:
+            server.child_process.kill()
+        except OSError:
+            pass
+    for server in pending:
+        try:
+            server.child_process.wait(KILL_WAIT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            pass
+        failed.append((server, server.child_process.pid))
+
+    for server in running:
+        if server.child_process.poll() is None:
+            # not even SIGKILL helped, give up on it
+            server.child_process = None
+        # the process exited, this only runs the server's own shutdown hooks
+        server.terminate()
+    for server in servers:
+        _cleanup(server, background_cleanup)
+    elapsed = time.time() - started_at
+    sinks = {}
+    for server in servers:
+        sink = getattr(server, 'metrics', None) or get_metrics_sink()
+        sinks[id(sink)] = sink
+    for sink in sinks.values():
+        sink.timing('parity.stop_all', elapsed)
+
+    if failed:
+        raise ShutdownError("*** failed to shutdown {} of {} nodes (timeout), killed {} ***".format(
+            len(failed), len(running), ', '.join('{} (pid {})'.format(server.name, pid) for server, pid in failed)),
+            failed)
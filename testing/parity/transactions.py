@@ -0,0 +1,120 @@
+"""RLP encoding and signing of (legacy, optionally EIP-155) transactions"""
+from testing.parity.crypto import decode_hex, keccak256, pubtoaddr, recover, sign
+
+__all__ = ['rlp_encode', 'rlp_decode', 'sign_transaction', 'decode_transaction']
+
+
+def _int_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'big')
+
+
+def _length_prefix(length, offset):
+    if length < 56:
+        return bytes([offset + length])
+    encoded = _int_bytes(length)
+    return bytes([offset + 55 + len(encoded)]) + encoded
+
+
+def rlp_encode(item):
+    """encodes bytes, non-negative ints and (nested) lists of them"""
+    if isinstance(item, int):
+        item = _int_bytes(item)
+    if isinstance(item, (bytes, bytearray)):
+        if len(item) == 1 and item[0] < 0x80:
+            return bytes(item)
+        return _length_prefix(len(item), 0x80) + bytes(item)
+    if isinstance(item, (list, tuple)):
+        payload = b''.join(rlp_encode(i) for i in item)
+        return _length_prefix(len(payload), 0xc0) + payload
+    raise TypeError("can't RLP encode {!r}".format(item))
+
+
+def _decode(data, offset):
+    """returns the item starting at `offset` and the offset following it"""
+    prefix = data[offset]
+    if prefix < 0x80:
+        return data[offset:offset + 1], offset + 1
+    if prefix < 0xb8:
+        start, length = offset + 1, prefix - 0x80
+    elif prefix < 0xc0:
+        size = prefix - 0xb7
+        start = offset + 1 + size
+        length = int.from_bytes(data[offset + 1:start], 'big')
+    else:
+        if prefix < 0xf8:
+            start, length = offset + 1, prefix - 0xc0
+        else:
+            size = prefix - 0xf7
+            start = offset + 1 + size
+            length = int.from_bytes(data[offset + 1:start], 'big')
+        end = start + length
+        if end > len(data):
+            raise ValueError("truncated RLP data")
+        items = []
+        while start < end:
+            item, start = _decode(data, start)
+            items.append(item)
+        return items, end
+    if start + length > len(data):
+        raise ValueError("truncated RLP data")
+    return data[start:start + length], start + length
+
+
+def rlp_decode(data):
+    """decodes RLP data into bytes and (nested) lists of bytes"""
+    data = bytes(data)
+    item, end = _decode(data, 0)
+    if end != len(data):
+        raise ValueError("trailing bytes after RLP item")
+    return item
+
+
+def _address(value):
+    if value is None:
+        return b''
+    if isinstance(value, str):
+        return decode_hex(value)
+    return value
+
+
+def sign_transaction(private_key, nonce, gasprice, startgas, to, value=0, data=b'', network_id=None):
+    """returns the signed raw transaction
+
+    `to` is an address (bytes or hex), or None to create a contract. With a
+    `network_id` the signature is replay protected as described by EIP-155.
+    """
+    if isinstance(private_key, str):
+        private_key = decode_hex(private_key)
+    if isinstance(data, str):
+        data = decode_hex(data)
+    fields = [nonce, gasprice, startgas, _address(to), value, data]
+    if network_id is None:
+        recovery_id, r, s = sign(keccak256(rlp_encode(fields)), private_key)
+        v = 27 + recovery_id
+    else:
+        recovery_id, r, s = sign(keccak256(rlp_encode(fields + [network_id, 0, 0])), private_key)
+        v = 35 + 2 * network_id + recovery_id
+    return rlp_encode(fields + [v, r, s])
+
+
+def decode_transaction(raw_tx):
+    """returns the fields, hash and sender of a signed raw transaction as a dict"""
+    items = rlp_decode(raw_tx)
+    if not isinstance(items, list) or len(items) != 9:
+        raise ValueError("not a transaction")
+    nonce, gasprice, startgas, to, value, data, v, r, s = items
+    nonce, gasprice, startgas, value, v, r, s = (
+        int.from_bytes(i, 'big') for i in (nonce, gasprice, startgas, value, v, r, s))
+    fields = items[:6]
+    if v in (27, 28):
+        network_id = None
+        recovery_id = v - 27
+        signed = rlp_encode(fields)
+    else:
+        network_id = (v - 35) // 2
+        recovery_id = v - 35 - 2 * network_id
+        signed = rlp_encode(fields + [network_id, 0, 0])
+    sender = pubtoaddr(recover(keccak256(signed), recovery_id, r, s))
+    return {'nonce': nonce, 'gasprice': gasprice, 'startgas': startgas, 'to': to or None,
+            'value': value, 'data': data, 'v': v, 'r': r, 's': s, 'network_id': network_id,
+            'sender': sender, 'hash': keccak256(bytes(raw_tx))}
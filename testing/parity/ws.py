@@ -0,0 +1,140 @@
+import base64
+import hashlib
+import os
+import socket
+import struct
+import urllib.parse
+
+__all__ = ['WebSocket', 'WebSocketError']
+
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    pass
+
+
+def _mask(data, mask):
+    if not data:
+        return data
+    repeated = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(data), 'big')
+
+
+class WebSocket(object):
+    """minimal RFC 6455 client, enough to talk JSON-RPC to parity's ws server"""
+
+    def __init__(self, url, timeout=30.0):
+        parsed = urllib.parse.urlsplit(url)
+        host = parsed.hostname
+        port = parsed.port or 80
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._buffer = b''
+        try:
+            self._handshake(host, port, parsed.path or '/')
+        except Exception:
+            self.sock.close()
+            raise
+
+    def _handshake(self, host, port, path):
+        key = base64.b64encode(os.urandom(16))
+        self.sock.sendall(
+            "GET {} HTTP/1.1\r\n"
+            "Host: {}:{}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            "Sec-WebSocket-Key: {}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            "\r\n".format(path, host, port, key.decode('ascii')).encode('latin-1'))
+        while b'\r\n\r\n' not in self._buffer:
+            data = self.sock.recv(4096)
+            if not data:
+                raise WebSocketError("connection closed during handshake")
+            self._buffer += data
+        head, self._buffer = self._buffer.split(b'\r\n\r\n', 1)
+        lines = head.decode('latin-1').split('\r\n')
+        if len(lines[0].split(' ')) < 2 or lines[0].split(' ')[1] != '101':
+            raise WebSocketError("handshake failed: {}".format(lines[0]))
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        expected = base64.b64encode(hashlib.sha1(key + GUID).digest()).decode('ascii')
+        if headers.get('sec-websocket-accept') != expected:
+            raise WebSocketError("handshake failed: invalid Sec-WebSocket-Accept")
+
+    def _read(self, n):
+        while len(self._buffer) < n:
+            data = self.sock.recv(max(4096, n - len(self._buffer)))
+            if not data:
+                raise WebSocketError("connection closed")
+            self._buffer += data
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack('>H', length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('>Q', length)
+        mask = os.urandom(4)
+        self.sock.sendall(header + mask + _mask(payload, mask))
+
+    def _recv_frame(self):
+        b1, b2 = self._read(2)
+        fin = bool(b1 & 0x80)
+        opcode = b1 & 0x0F
+        length = b2 & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', self._read(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', self._read(8))[0]
+        mask = self._read(4) if b2 & 0x80 else None
+        payload = self._read(length)
+        if mask:
+            payload = _mask(payload, mask)
+        return fin, opcode, payload
+
+    def send(self, text):
+        self._send_frame(OP_TEXT, text.encode('utf-8'))
+
+    def recv(self):
+        """returns the next text message, or None once the server closed the connection"""
+        message = b''
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                return None
+            message += payload
+            if fin:
+                return message.decode('utf-8')
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def close(self):
+        try:
+            self._send_frame(OP_CLOSE, struct.pack('>H', 1000))
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
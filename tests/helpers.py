@@ -0,0 +1,42 @@
+"""stand-ins for the parity binary and its ports, shared by the tests
+
+For tests that need a node that actually runs, see `benchmarks.fakeparity`.
+"""
+import os
+
+from testing.parity.ports import PortAllocator
+
+# only answers `parity -v`, enough for ParityServer(auto_start=0)
+VERSION_ONLY = """#!/bin/sh
+echo "  version Parity-Ethereum/v{version}-stable-0000000-20191001/x86_64-linux-gnu/rustc1.37.0" >&2
+"""
+
+
+def write_parity(directory, script=VERSION_ONLY, version='2.5.8', **kwargs):
+    """writes `script`, formatted with `version` and `kwargs`, as an executable `parity` into `directory`
+
+    Returns its path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'parity')
+    with open(path, 'w') as f:
+        f.write(script.format(version=version, **kwargs))
+    os.chmod(path, 0o755)
+    return path
+
+
+class TakenPortAllocator(PortAllocator):
+    """hands out the `index`th block with its JSON-RPC port `taken`, as if another program bound it meanwhile"""
+
+    def __init__(self, directory, taken, index=0):
+        super(TakenPortAllocator, self).__init__(directory)
+        self.taken = taken
+        self.index = index
+        self.blocks = []
+
+    def reserve(self):
+        block = super(TakenPortAllocator, self).reserve()
+        if len(self.blocks) == self.index:
+            block.ports = (block.ports[0], self.taken) + block.ports[2:]
+        self.blocks.append(block)
+        return block
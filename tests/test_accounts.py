@@ -0,0 +1,103 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+from testing.parity import crypto
+from testing.parity.crypto import derive_accounts, derive_private_keys, privtoaddr, privtopub
+from testing.parity.transactions import decode_transaction, rlp_decode, rlp_encode, sign_transaction
+
+from helpers import write_parity
+
+
+class TestCrypto(unittest.TestCase):
+    def test_keccak256(self):
+        empty = "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+        self.assertEqual(crypto._keccak256_python(b'').hex(), empty)
+        self.assertEqual(crypto.keccak256(b'').hex(), empty)
+        # longer than one block
+        data = bytes(range(256)) * 2
+        self.assertEqual(crypto._keccak256_python(data), crypto.keccak256(data))
+
+    def test_privtopub(self):
+        self.assertEqual(privtopub(b'\0' * 31 + b'\1'), crypto.G)
+        with self.assertRaises(ValueError):
+            privtopub(b'\0' * 32)
+
+    def test_privtoaddr(self):
+        self.assertEqual(privtoaddr(b'\0' * 31 + b'\1').hex(), "7e5f4552091a69125d5dfcb7b8c2659029395bdf")
+        self.assertEqual(privtoaddr(b'\0' * 31 + b'\2').hex(), "2b5ad5c4795c026514f8317c7a215e218dccd6cf")
+
+    def test_derive_accounts(self):
+        accounts = derive_accounts(20, b'seed')
+        self.assertEqual([key for key, _ in accounts], derive_private_keys(20, b'seed'))
+        self.assertEqual(len(set(key for key, _ in accounts)), 20)
+        for key, address in accounts:
+            self.assertEqual(address, privtoaddr(key))
+        self.assertNotEqual(derive_accounts(1, b'other'), accounts[:1])
+
+
+class TestTransactions(unittest.TestCase):
+    def test_rlp(self):
+        self.assertEqual(rlp_encode(b'dog'), b'\x83dog')
+        self.assertEqual(rlp_encode([b'cat', b'dog']), b'\xc8\x83cat\x83dog')
+        self.assertEqual(rlp_encode(0), b'\x80')
+        self.assertEqual(rlp_encode(1024), b'\x82\x04\x00')
+        self.assertEqual(rlp_encode(b'a' * 56), b'\xb8\x38' + b'a' * 56)
+        item = [b'', [b'\x01', [b'x' * 100]], b'\x7f']
+        self.assertEqual(rlp_decode(rlp_encode(item)), item)
+        with self.assertRaises(ValueError):
+            rlp_decode(b'\x83do')
+
+    def test_sign_transaction(self):
+        # the example from EIP-155
+        raw = sign_transaction(b'\x46' * 32, 9, 20 * 10 ** 9, 21000, '0x' + '35' * 20, 10 ** 18, network_id=1)
+        self.assertEqual(raw.hex(), "f86c098504a817c800825208943535353535353535353535353535353535353535880de0b6b3a7640000"
+                                    "8025a028ef61340bd939bc2195fe537567866003e1a15d3c71ff63e1590620aa636276a067cbe9d8997f"
+                                    "761aecb703304b3800ccf555c9f3dc64214b297fb1966a3b6d83")
+        tx = decode_transaction(raw)
+        self.assertEqual(tx['sender'].hex(), "9d8a62f656a8d1615c1294fd71e9cfb3e4855a4f")
+        self.assertEqual((tx['nonce'], tx['network_id'], tx['to']), (9, 1, b'\x35' * 20))
+
+        tx = decode_transaction(sign_transaction(b'\0' * 31 + b'\1', 0, 1, 53000, None, data='0x6000'))
+        self.assertEqual(tx['sender'].hex(), "7e5f4552091a69125d5dfcb7b8c2659029395bdf")
+        self.assertEqual((tx['to'], tx['data'], tx['network_id']), (None, b'\x60\x00', None))
+
+
+class TestPrefundedAccounts(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binary = write_parity(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def chain_accounts(self, parity):
+        parity.prestart()
+        with open(parity.chainfile) as f:
+            return json.load(f)['accounts']
+
+    def test_count(self):
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0,
+                                             prefunded_accounts=5, prefunded_balance=1000)
+        try:
+            keys = parity.get_prefunded_private_keys()
+            self.assertEqual(keys, derive_private_keys(5))
+            accounts = self.chain_accounts(parity)
+            for key, address in parity.get_prefunded_accounts():
+                self.assertEqual(accounts[address[2:]]['balance'], "1000")
+        finally:
+            parity.stop()
+
+    def test_explicit_keys(self):
+        key = "0x" + "00" * 31 + "01"
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0,
+                                             prefunded_accounts={key: 42})
+        try:
+            self.assertEqual(parity.get_prefunded_accounts(),
+                             [(b'\0' * 31 + b'\1', "0x7e5f4552091a69125d5dfcb7b8c2659029395bdf")])
+            accounts = self.chain_accounts(parity)
+            self.assertEqual(accounts["7e5f4552091a69125d5dfcb7b8c2659029395bdf"]['balance'], "42")
+        finally:
+            parity.stop()
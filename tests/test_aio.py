@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import fakeparity
+from testing.parity.aio import AsyncJSONRPCClient, AsyncParityServer
+
+from helpers import TakenPortAllocator
+from testing.parity.rpc import JSONRPCError
+
+
+class JSONRPCHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        response = {"jsonrpc": "2.0", "id": request['id']}
+        if request['method'] == 'eth_blockNumber':
+            response['result'] = "0x2a"
+        else:
+            response['error'] = {"code": -32601, "message": "Method not found"}
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncJSONRPCClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+        self.server.connections = set()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_requests(self):
+        async def run():
+            async with AsyncJSONRPCClient(self.url) as client:
+                numbers = [await client.block_number() for _ in range(5)]
+                numbers += await asyncio.gather(*(client.block_number() for _ in range(3)))
+                with self.assertRaises(JSONRPCError):
+                    await client.request('eth_unknown')
+                return numbers, client.latency_stats()
+
+        numbers, stats = asyncio.run(run())
+        self.assertEqual(numbers, [42] * 8)
+        self.assertEqual(stats['eth_blockNumber']['count'], 8)
+        self.assertLessEqual(len(self.server.connections), 3)
+
+
+class TestAsyncParityServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity_server = fakeparity.install(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_start_stop(self):
+        async def run():
+            node = AsyncParityServer(parity_server=self.parity_server)
+            await node.start()
+            try:
+                self.assertTrue(node.is_alive())
+                self.assertIn('rpc_live', node.boot_timings)
+                self.assertEqual(await node.client().block_number(), 0)
+                base_dir = node.server.base_dir
+            finally:
+                await node.stop()
+            self.assertFalse(node.is_alive())
+            self.assertFalse(os.path.exists(base_dir))
+
+            # started again as a fresh node
+            await node.start()
+            try:
+                self.assertNotEqual(node.server.base_dir, base_dir)
+                self.assertEqual(await node.client().block_number(), 0)
+
+                # terminate() keeps the data for the next start
+                await node.terminate()
+                self.assertTrue(os.path.exists(node.server.base_dir))
+                await node.start()
+                self.assertTrue(node.is_alive())
+            finally:
+                await node.stop()
+            await node.stop()
+
+        asyncio.run(run())
+
+    def test_context_manager(self):
+        async def run():
+            nodes = [AsyncParityServer(parity_server=self.parity_server) for _ in range(2)]
+            async with nodes[0] as first, nodes[1] as second:
+                self.assertNotEqual(first.url(), second.url())
+                numbers = await asyncio.gather(first.client().block_number(), second.client().block_number())
+                self.assertEqual(numbers, [0, 0])
+            return nodes
+
+        nodes = asyncio.run(run())
+        for node in nodes:
+            self.assertFalse(node.is_alive())
+            self.assertFalse(os.path.exists(node.server.base_dir))
+
+    def test_log_capture_and_port_retries(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen(1)
+        allocator = TakenPortAllocator(os.path.join(self.tmpdir, 'ports'), sock.getsockname()[1])
+
+        async def run():
+            async with AsyncParityServer(parity_server=self.parity_server, port_allocator=allocator) as node:
+                self.assertEqual(len(allocator.blocks), 2)
+                self.assertTrue(allocator.blocks[0].released)
+                self.assertEqual(node.server.settings['jsonrpc_port'], allocator.blocks[1].ports[1])
+                self.assertIsNotNone(node.server.wait_for_log(r"Public node URL", timeout=5))
+                self.assertEqual(await node.client().block_number(), 0)
+
+        try:
+            asyncio.run(run())
+        finally:
+            sock.close()
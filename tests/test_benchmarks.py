@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_fake_parity(self):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks', '--fake', '--runs', '1', '--calls', '10', '--transactions', '3'],
+            cwd=ROOT, timeout=120)
+        results = json.loads(output.decode('utf-8'))
+        self.assertEqual(results['parity_server'], 'fake')
+        self.assertEqual(results['parity_version'], '2.5.8')
+        scenarios = results['scenarios']
+        self.assertEqual(sorted(scenarios), ['cold_start', 'load', 'rpc_batched', 'rpc_sequential',
+                                             'send_raw_transactions', 'stop', 'warm_start'])
+        self.assertEqual(scenarios['cold_start']['boot']['count'], 1)
+        self.assertIn('rpc_live', scenarios['cold_start']['boot_timings'])
+        self.assertEqual(scenarios['rpc_sequential']['latency']['count'], 10)
+        self.assertEqual(scenarios['send_raw_transactions']['submit_latency']['count'], 3)
+        self.assertEqual(scenarios['load']['included'], 3)
+        self.assertIn('parity.spawn', results['metrics'])
+        self.assertIn('rpc.eth_sendRawTransaction', results['metrics'])
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+from testing.parity import chain
+from testing.parity.chain import ChainSpecFile, build_chain_spec, merge
+from testing.parity.metrics import Aggregator
+
+from helpers import write_parity
+
+
+class TestChainSpec(unittest.TestCase):
+    def test_merge(self):
+        base = {"a": {"b": 1, "c": {"d": 2}}, "e": {"f": 3}}
+        merged = merge(base, {"a": {"c": {"d": 4}}, "g": 5})
+        self.assertEqual(merged, {"a": {"b": 1, "c": {"d": 4}}, "e": {"f": 3}, "g": 5})
+        self.assertEqual(base, {"a": {"b": 1, "c": {"d": 2}}, "e": {"f": 3}})
+        # untouched subtrees are shared, not copied
+        self.assertIs(merged["e"], base["e"])
+
+    def test_build(self):
+        spec = build_chain_spec((2, 5, 8), 'ethash', "0x400", "0x01", 66, "aa" * 20,
+                                [("bb" * 20, 10)], {"params": {"maxCodeSize": 1}})
+        self.assertIs(spec, build_chain_spec((2, 5, 9), 'ethash', "0x400", "01", 66, "aa" * 20,
+                                             (("bb" * 20, 10),), {"params": {"maxCodeSize": 1}}))
+        parsed = json.loads(spec.decode('utf-8'))
+        self.assertEqual(parsed["params"]["networkID"], "0x42")
+        self.assertEqual(parsed["params"]["maxCodeSize"], 1)
+        self.assertEqual(parsed["engine"]["Ethash"]["difficulty"], "0x400")
+        self.assertEqual(parsed["genesis"]["author"], "0x01")
+        self.assertEqual(parsed["accounts"]["bb" * 20]["balance"], "10")
+        self.assertIn("aa" * 20, parsed["accounts"])
+        # the static tables are left alone
+        self.assertNotIn("networkID", chain.chain_json_params_2_5_8)
+        self.assertNotIn("difficulty", chain.ethash_engine["Ethash"])
+        self.assertEqual(chain.chain_json_params_2_5_8["maxCodeSize"], 24576)
+
+        with self.assertRaises(Exception):
+            build_chain_spec((2, 5, 8), 'clique', "0x400", "0x01", 66, "aa" * 20)
+
+    def test_file(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'chain.json')
+            self.assertTrue(ChainSpecFile(path).write(b'{}'))
+            # a new instance compares against what's on disk
+            spec_file = ChainSpecFile(path)
+            self.assertFalse(spec_file.write(b'{}'))
+            self.assertTrue(spec_file.write(b'{"a": 1}'))
+            self.assertFalse(spec_file.write(b'{"a": 1}'))
+            os.remove(path)
+            self.assertTrue(spec_file.write(b'{"a": 1}'))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'{"a": 1}')
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestParityChainSpec(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binary = write_parity(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_written_once(self):
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0,
+                                             chain_overrides={"genesis": {"gasLimit": "0x1"}})
+        try:
+            parity.prestart()
+            mtime = os.stat(parity.chainfile).st_mtime_ns
+            os.utime(parity.chainfile, ns=(mtime - 10 ** 9, mtime - 10 ** 9))
+            parity.prestart()
+            self.assertEqual(os.stat(parity.chainfile).st_mtime_ns, mtime - 10 ** 9)
+            with open(parity.chainfile) as f:
+                self.assertEqual(json.load(f)["genesis"]["gasLimit"], "0x1")
+        finally:
+            parity.stop()
+
+    def test_metrics(self):
+        metrics = Aggregator()
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0, metrics=metrics)
+        parity.prestart()
+        parity.stop()
+        self.assertEqual(sorted(metrics.as_dict()), ['parity.chain_spec', 'parity.initialize', 'parity.prestart',
+                                                     'parity.stop', 'parity.version'])
+        parity.stop()
+        self.assertEqual(metrics.as_dict()['parity.stop']['count'], 1)
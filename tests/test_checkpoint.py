@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+
+from helpers import write_parity
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binary = write_parity(self.tmpdir)
+        self.parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0)
+        self.parity.setup()
+
+    def tearDown(self):
+        self.parity.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, content):
+        with open(os.path.join(self.parity.get_data_directory(), name), 'w') as f:
+            f.write(content)
+
+    def listdir(self):
+        return sorted(os.listdir(self.parity.get_data_directory()))
+
+    def test_rollback(self):
+        self.write('000001.sst', 'a')
+        self.write('CURRENT', 'a')
+        first = self.parity.checkpoint()
+        self.write('000002.sst', 'b')
+        second = self.parity.checkpoint('second')
+        self.assertEqual(second, 'second')
+        self.write('000003.sst', 'c')
+
+        self.parity.rollback()
+        self.assertEqual(self.listdir(), ['000001.sst', '000002.sst', 'CURRENT'])
+        self.parity.rollback(first)
+        self.assertEqual(self.listdir(), ['000001.sst', 'CURRENT'])
+        self.assertIn('restore', self.parity.checkpoint_timings)
+        self.assertNotIn('start', self.parity.checkpoint_timings)
+        # the checkpoint itself is left intact (*.sst files are never changed in place)
+        self.write('CURRENT', 'changed')
+        self.parity.rollback(first)
+        with open(os.path.join(self.parity.get_data_directory(), 'CURRENT')) as f:
+            self.assertEqual(f.read(), 'a')
+
+    def test_errors(self):
+        with self.assertRaises(RuntimeError):
+            self.parity.rollback()
+        with self.assertRaises(RuntimeError):
+            self.parity.rollback('missing')
+        self.parity.checkpoint('x')
+        with self.assertRaises(RuntimeError):
+            self.parity.checkpoint('x')
+        self.parity.remove_checkpoint('x')
+        with self.assertRaises(RuntimeError):
+            self.parity.rollback('x')
+
+    def test_names(self):
+        self.assertEqual(self.parity.checkpoint(), '0')
+        self.assertEqual(self.parity.checkpoint(), '1')
+        self.parity.remove_checkpoint('0')
+        self.assertEqual(self.parity.checkpoint(), '2')
+        self.parity.checkpoint('3')
+        self.assertEqual(self.parity.checkpoint(), '4')
+
+    def test_missing_data_directory(self):
+        self.parity.checkpoint('x')
+        shutil.rmtree(self.parity.get_data_directory())
+        with self.assertRaisesRegex(RuntimeError, "cannot take a checkpoint"):
+            self.parity.checkpoint()
+        self.parity.rollback('x')
+        self.assertEqual(os.listdir(self.parity.get_data_directory()), [])
+
+        self.parity.cleanup()
+        with self.assertRaisesRegex(RuntimeError, "cannot roll back"):
+            self.parity.rollback('x')
+
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0)
+        try:
+            with self.assertRaisesRegex(RuntimeError, "never set up"):
+                parity.checkpoint()
+        finally:
+            parity.cleanup()
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+
+from helpers import write_parity
+
+
+def option(cmd, name):
+    """returns the value following `name` in `cmd`, or None"""
+    if name not in cmd:
+        return None
+    return cmd[cmd.index(name) + 1]
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def server(self, version, **kwargs):
+        binary = os.path.join(self.tmpdir, version, 'parity')
+        if not os.path.exists(binary):
+            write_parity(os.path.dirname(binary), version=version)
+        server = testing.parity.ParityServer(parity_server=binary, auto_start=0, **kwargs)
+        self.servers.append(server)
+        server.prestart()
+        return server
+
+    def commandline(self, version, **kwargs):
+        return self.server(version, **kwargs).get_server_commandline()
+
+    def test_sealing(self):
+        cmd = self.commandline('2.5.8')
+        self.assertEqual(option(cmd, '--reseal-min-period'), '0')
+        self.assertEqual(option(cmd, '--reseal-max-period'), '0')
+        self.assertNotIn('--gas-floor-target', cmd)
+        self.assertNotIn('--reseal-min-period', self.commandline('2.5.7'))
+
+        server = self.server('2.5.8', reseal_min_period=1000, reseal_max_period=60000, gas_limit=100000000)
+        cmd = server.get_server_commandline()
+        self.assertEqual(option(cmd, '--reseal-min-period'), '1000')
+        self.assertEqual(option(cmd, '--reseal-max-period'), '60000')
+        self.assertEqual(option(cmd, '--gas-floor-target'), '100000000')
+        self.assertEqual(option(cmd, '--gas-cap'), '100000000')
+        with open(server.chainfile) as f:
+            self.assertEqual(json.load(f)['genesis']['gasLimit'], hex(100000000))
+
+        cmd = self.commandline('2.5.7', reseal_min_period=1000)
+        self.assertEqual(option(cmd, '--reseal-min-period'), '1000')
+        self.assertNotIn('--reseal-max-period', cmd)
+
+    def test_throughput(self):
+        cmd = self.commandline('2.5.8', tx_queue_size=100000, tx_queue_per_sender=50000, tx_queue_mem_limit=0,
+                               jsonrpc_threads=4, jsonrpc_server_threads=8)
+        self.assertEqual(option(cmd, '--tx-queue-size'), '100000')
+        self.assertEqual(option(cmd, '--tx-queue-per-sender'), '50000')
+        self.assertEqual(option(cmd, '--tx-queue-mem-limit'), '0')
+        self.assertEqual(option(cmd, '--jsonrpc-threads'), '4')
+        self.assertEqual(option(cmd, '--jsonrpc-server-threads'), '8')
+
+        with self.assertRaises(Exception):
+            self.commandline('1.10.0', tx_queue_mem_limit=0)
+        with self.assertRaises(Exception):
+            self.commandline('1.8.0', jsonrpc_server_threads=8)
+        with self.assertRaises(Exception):
+            self.commandline('1.6.0', jsonrpc_threads=4)
+
+    def test_versions(self):
+        cmd = self.commandline('1.6.10')
+        self.assertIsNotNone(option(cmd, '--rpcport'))
+        self.assertIsNotNone(option(cmd, '--datadir'))
+        self.assertIn('--no-ui', cmd)
+        self.assertNotIn('--jsonrpc-port', cmd)
+        self.assertIsNotNone(option(cmd, '--dapps-port'))
+        self.assertNotIn('--dapps-port', self.commandline('1.6.10', no_dapps=True))
+
+        cmd = self.commandline('1.6.10', dapps_port=8180)
+        self.assertEqual(option(cmd, '--dapps-port'), '8180')
+
+        cmd = self.commandline('1.8.0')
+        self.assertIsNotNone(option(cmd, '--jsonrpc-port'))
+        self.assertIsNotNone(option(cmd, '--datadir'))
+        self.assertIn('--no-ws', cmd)
+        self.assertNotIn('--rpcport', cmd)
+
+        cmd = self.commandline('2.2.0', min_gas_price=1)
+        self.assertIsNotNone(option(cmd, '--base-path'))
+        self.assertNotIn('--datadir', cmd)
+        self.assertEqual(option(cmd, '--min-gas-price'), '1')
+        self.assertEqual(option(self.commandline('2.1.0', min_gas_price=1), '--gasprice'), '1')
+
+    def test_unknown_setting(self):
+        with self.assertRaises(ValueError):
+            self.commandline('2.5.8', tx_queue_sise=10)
+
+    def test_compile_flags(self):
+        from testing.parity.commandline import INSTANCE_OPTIONS, compile_flags
+        self.assertIs(compile_flags((2, 5, 8)), compile_flags((2, 5, 8)))
+        self.assertEqual(INSTANCE_OPTIONS, {'--port', '--chain', '--node-key', '--base-path', '--datadir',
+                                            '--jsonrpc-port', '--rpcport', '--ws-port', '--dapps-port',
+                                            '--bootnodes'})
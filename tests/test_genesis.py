@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import testing.parity
+from benchmarks import fakeparity
+from testing.parity import genesis
+from testing.parity.chain import ACCOUNT_NONCE
+from testing.parity.crypto import privtoaddr
+from testing.parity.metrics import Aggregator
+
+TOKEN = '0x' + 'aa' * 20
+CODE = bytes.fromhex('6080604052')
+
+
+class TestGenesisAccounts(unittest.TestCase):
+    def test_contract_address(self):
+        sender = '0x6ac7ea33f8831ea9dcc53393aaa88b25a785dbf0'
+        self.assertEqual(genesis.contract_address(sender, 0).hex(), 'cd234a471b72ba2f1ccf0a70fcaba648a5eecd8d')
+        self.assertEqual(genesis.contract_address(sender, 1).hex(), '343c43a37d37dff08ae8c4a11544c718abb4fcf8')
+
+    def test_genesis_accounts(self):
+        accounts = genesis.genesis_accounts({TOKEN: {'code': CODE, 'storage': {0: 1, '0x01': b'\x02'},
+                                                     'balance': 5}}, 7)
+        self.assertEqual(accounts, {'aa' * 20: {
+            "balance": "5", "nonce": "7", "code": "0x6080604052",
+            "storage": {'0x' + '00' * 32: '0x' + '00' * 31 + '01', '0x' + '00' * 31 + '01': '0x' + '00' * 31 + '02'}}})
+
+    def test_apply_state_diff(self):
+        author = '01' * 20
+        accounts = {}
+        genesis.apply_state_diff(accounts, {
+            '0x' + 'dd' * 20: {'balance': {'*': {'from': '0x10', 'to': '0xf'}},
+                               'nonce': {'*': {'from': '0x0', 'to': '0x1'}}, 'code': '=', 'storage': {}},
+            '0x' + 'AA' * 20: {'balance': {'+': '0x0'}, 'nonce': {'+': '0x1'}, 'code': {'+': '0x60'},
+                               'storage': {'0x0': {'+': '0x2a'}, '0x1': {'+': '0x0'}}},
+            '0x' + author: {'balance': {'+': '0x1'}, 'nonce': {'+': '0x0'}, 'code': {'+': '0x'}, 'storage': {}},
+            '0x' + '00' * 19 + '01': {'balance': '=', 'nonce': '=', 'code': '=', 'storage': {}},
+        }, exclude={author})
+        # the deployer only once it is known
+        self.assertEqual(sorted(accounts), ['aa' * 20])
+        self.assertEqual(accounts['aa' * 20], {"balance": "0", "nonce": "1", "code": "0x60",
+                                               "storage": {'0x' + '00' * 32: '0x' + '00' * 31 + '2a'}})
+
+        genesis.apply_state_diff(accounts, {
+            '0x' + 'aa' * 20: {'balance': '=', 'nonce': '=', 'code': '=',
+                               'storage': {'0x0': {'*': {'from': '0x2a', 'to': '0x0'}},
+                                           '0x2': {'+': '0x3'}}},
+        })
+        self.assertEqual(accounts['aa' * 20]["storage"], {'0x' + '00' * 31 + '02': '0x' + '00' * 31 + '03'})
+
+
+class TestGenesisContracts(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity_server = fakeparity.install(self.tmpdir)
+        self.cache_dir = os.environ.get('TESTING_PARITY_CACHE_DIR')
+        os.environ['TESTING_PARITY_CACHE_DIR'] = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        if self.cache_dir is None:
+            del os.environ['TESTING_PARITY_CACHE_DIR']
+        else:
+            os.environ['TESTING_PARITY_CACHE_DIR'] = self.cache_dir
+        shutil.rmtree(self.tmpdir)
+
+    def test_accounts(self):
+        parity = testing.parity.ParityServer(parity_server=self.parity_server, genesis_contracts={
+            TOKEN: {'code': CODE, 'storage': {0: 42}}})
+        try:
+            self.assertEqual(parity.genesis_contract_addresses, [bytes.fromhex('aa' * 20)])
+            client = parity.client()
+            self.assertEqual(client.get_code(TOKEN), '0x6080604052')
+            self.assertEqual(int(client.get_storage_at(TOKEN, 0), 16), 42)
+            self.assertEqual(client.block_number(), 0)
+        finally:
+            parity.stop()
+
+    def test_init_code(self):
+        metrics = Aggregator()
+        init_codes = [CODE, '0x60016000']
+        deployer = privtoaddr(genesis.DEPLOYER_KEY)
+        for _ in range(2):
+            parity = testing.parity.ParityServer(parity_server=self.parity_server, genesis_contracts=init_codes,
+                                                 metrics=metrics)
+            try:
+                addresses = parity.genesis_contract_addresses
+                nonce = int(ACCOUNT_NONCE)
+                self.assertEqual(addresses, [genesis.contract_address(deployer, nonce),
+                                             genesis.contract_address(deployer, nonce + 1)])
+                client = parity.client()
+                self.assertEqual(client.block_number(), 0)
+                self.assertEqual(client.get_code(addresses[0]), '0x6080604052')
+                self.assertEqual(client.get_code(addresses[1]), '0x60016000')
+                self.assertEqual(client.get_transaction_count(deployer), nonce + 2)
+                with open(parity.chainfile) as f:
+                    self.assertNotIn(parity.author[2:], json.load(f)['accounts'])
+            finally:
+                parity.stop()
+        # deployed only once
+        self.assertEqual(metrics.as_dict()['parity.genesis_contracts']['count'], 1)
+
+        cached = [name for name in os.listdir(os.path.join(self.tmpdir, 'cache', 'genesis'))
+                  if name.endswith('.json')]
+        self.assertEqual(len(cached), 1)
+        genesis._cache.clear()
+        parity = testing.parity.ParityServer(parity_server=self.parity_server, genesis_contracts=init_codes,
+                                             metrics=metrics, auto_start=0)
+        self.assertEqual(parity.genesis_contract_addresses, addresses)
+        self.assertEqual(metrics.as_dict()['parity.genesis_contracts']['count'], 1)
+
+    def test_concurrent_init_code(self):
+        genesis._cache.clear()
+        metrics = Aggregator()
+        servers = []
+        errors = []
+
+        def start():
+            try:
+                servers.append(testing.parity.ParityServer(parity_server=self.parity_server,
+                                                           genesis_contracts=[CODE], metrics=metrics))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=start) for _ in range(3)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(len(set(tuple(parity.genesis_contract_addresses) for parity in servers)), 1)
+        finally:
+            for parity in servers:
+                parity.stop()
+        # the cold cache was filled only once
+        self.assertEqual(metrics.as_dict()['parity.genesis_contracts']['count'], 1)
@@ -0,0 +1,79 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+from benchmarks import fakeparity
+from testing.parity.history import BlockCounter, _subcommand
+from testing.parity.load import LoadGenerator
+from testing.parity.transactions import rlp_encode
+
+
+class TestBlockCounter(unittest.TestCase):
+    def test_count(self):
+        items = [b'\x01', b'', b'abc', b'x' * 100, [b'a', [b'b' * 60]], [b'y' * 70000] * 2]
+        data = b''.join(rlp_encode(item) for item in items)
+        for size in (1, 2, 7, len(data)):
+            counter = BlockCounter()
+            for i in range(0, len(data), size):
+                counter.feed(data[i:i + size])
+            self.assertEqual(counter.count, len(items))
+
+    def test_subcommand(self):
+        self.assertEqual(_subcommand((2, 5, 8), 'export'), ['export', 'blocks'])
+        self.assertEqual(_subcommand((1, 4, 0), 'export'), ['export'])
+        self.assertEqual(_subcommand((2, 5, 8), 'import'), ['import'])
+
+
+class TestHistoryFixture(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity_server = fakeparity.install(self.tmpdir)
+        self.faucet_private_key = os.urandom(32)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_export_import(self):
+        fixture = os.path.join(self.tmpdir, 'history.rlp.gz')
+        parity = testing.parity.ParityServer(parity_server=self.parity_server,
+                                             faucet_private_key=self.faucet_private_key)
+        try:
+            load = LoadGenerator(parity)
+            load.run(load.sign(20, processes=0))
+            self.assertEqual(parity.export_history(fixture), 20)
+            # still running
+            self.assertEqual(parity.client().block_number(), 20)
+            balance = parity.client().get_balance(load.addresses[0])
+        finally:
+            parity.stop()
+        with gzip.open(fixture) as f:
+            self.assertTrue(f.read())
+
+        parity = testing.parity.ParityServer(parity_server=self.parity_server,
+                                             faucet_private_key=self.faucet_private_key,
+                                             history_fixture=fixture)
+        try:
+            self.assertEqual(parity.history_timings['blocks'], 20)
+            self.assertGreater(parity.history_timings['blocks_per_second'], 0)
+            self.assertEqual(parity.client().block_number(), 20)
+            self.assertEqual(parity.client().get_balance(load.addresses[0]), balance)
+            # not imported again on restart
+            parity.pause()
+            parity.history_timings = {}
+            parity.start()
+            self.assertEqual(parity.history_timings, {})
+            with self.assertRaises(RuntimeError):
+                parity.import_history(fixture)
+        finally:
+            parity.stop()
+
+    def test_failure(self):
+        fixture = os.path.join(self.tmpdir, 'broken.rlp.gz')
+        with gzip.open(fixture, 'wb') as f:
+            f.write(rlp_encode([b'not json', []]))
+        with self.assertRaises(RuntimeError) as cm:
+            testing.parity.ParityServer(parity_server=self.parity_server, history_fixture=fixture)
+        self.assertIn("failed to import blocks", str(cm.exception))
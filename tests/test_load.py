@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+import testing.parity
+from benchmarks import fakeparity
+from testing.parity.load import LoadGenerator
+from testing.parity.rpc import JSONRPCClient
+from testing.parity.transactions import decode_transaction
+
+
+class NoReceiptsClient(JSONRPCClient):
+    """a client that fails to fetch receipts"""
+
+    def _call(self, method, params, convert=None):
+        if method == 'eth_getTransactionReceipt':
+            raise ConnectionResetError("receipts unavailable")
+        return super(NoReceiptsClient, self)._call(method, params, convert)
+
+    def batch(self):
+        batch = super(NoReceiptsClient, self).batch()
+        batch.get_receipt = lambda tx_hash: self.get_receipt(tx_hash)
+        return batch
+
+
+class UnreachableClient(JSONRPCClient):
+    """a client whose transactions never reach the node"""
+
+    def _send_batch(self, calls):
+        if calls[0].method == 'eth_sendRawTransaction':
+            for call in calls:
+                call.future.set_exception(ConnectionRefusedError("node is down"))
+        else:
+            super(UnreachableClient, self)._send_batch(calls)
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity = testing.parity.ParityServer(parity_server=fakeparity.install(self.tmpdir),
+                                                  prefunded_accounts=3)
+
+    def tearDown(self):
+        self.parity.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_sign(self):
+        keys = self.parity.get_prefunded_private_keys()
+        load = LoadGenerator(self.parity, keys)
+        start = dict(load.nonces)
+        for processes in (0, 2):
+            raw_txs = load.sign(100, processes=processes)
+            self.assertEqual(len(raw_txs), 100)
+            txs = [decode_transaction(raw_tx) for raw_tx in raw_txs]
+            self.assertEqual(['0x' + tx['sender'].hex() for tx in txs[:3]], load.addresses)
+            for address in load.addresses:
+                nonces = [tx['nonce'] for tx in txs if '0x' + tx['sender'].hex() == address]
+                self.assertEqual(nonces, list(range(nonces[0], nonces[0] + len(nonces))))
+            self.assertTrue(all(tx['network_id'] == self.parity.network_id for tx in txs))
+        self.assertEqual(sum(load.nonces.values()) - sum(start.values()), 200)
+
+    def test_run(self):
+        load = LoadGenerator(self.parity)
+        raw_txs = load.sign(50, processes=0)
+        # signed again with the same nonce
+        duplicate = LoadGenerator(self.parity).sign(1, value=2, processes=0)
+        report = load.run(raw_txs + duplicate, rate=1000, batch_size=10)
+        self.assertEqual(report['transactions'], 51)
+        self.assertEqual(report['submitted'], 50)
+        self.assertEqual(report['included'], 50)
+        self.assertEqual(report['rejected'], 1)
+        self.assertEqual(list(report['rejections'].values()), [1])
+        self.assertEqual(report['inclusion_latency']['count'], 50)
+        self.assertGreaterEqual(report['submit_seconds'], 0.045)
+        self.assertGreater(report['tps'], 0)
+        self.assertEqual(self.parity.client().block_number(), 50)
+
+    def test_poll_error(self):
+        load = LoadGenerator(self.parity, client=NoReceiptsClient(self.parity.url()))
+        raw_txs = load.sign(20, processes=0)
+        with self.assertRaises(ConnectionResetError):
+            load.run(raw_txs, batch_size=5, timeout=5)
+
+    def test_submit_error(self):
+        load = LoadGenerator(self.parity, client=UnreachableClient(self.parity.url()))
+        raw_txs = load.sign(20, processes=0)
+        started_at = time.time()
+        with self.assertRaises(ConnectionRefusedError):
+            load.run(raw_txs, batch_size=5, timeout=30)
+        self.assertLess(time.time() - started_at, 5)
@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import testing.parity
+from testing.parity.logs import LogCapture
+
+from helpers import write_parity
+
+# prints numbered lines as told on stdin, until stdin is closed
+ECHO = """
+import sys
+for line in sys.stdin:
+    for i in range(int(line)):
+        print("Imported #{}".format(i), flush=True)
+"""
+
+FAILING_PARITY = """#!/bin/sh
+if [ "$1" = "-v" ]; then
+    echo "  version Parity-Ethereum/v{version}-stable-0000000-20191001/x86_64-linux-gnu/rustc1.37.0" >&2
+    exit 0
+fi
+echo "Starting Parity-Ethereum"
+echo "Error: boom" >&2
+exit 1
+"""
+
+
+class TestLogCapture(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.process = subprocess.Popen([sys.executable, '-c', ECHO], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, universal_newlines=False)
+
+    def tearDown(self):
+        if self.process.stdin:
+            self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+        shutil.rmtree(self.tmpdir)
+
+    def emit(self, n):
+        self.process.stdin.write('{}\n'.format(n).encode('ascii'))
+        self.process.stdin.flush()
+
+    def test_ring_buffer(self):
+        log = LogCapture(self.process.stdout, max_lines=5).start()
+        self.emit(20)
+        self.assertEqual(log.wait_for(r'#19').group(0), '#19')
+        self.assertEqual(log.tail(), ['Imported #{}'.format(i) for i in range(15, 20)])
+        self.assertEqual(log.tail(2), ['Imported #18', 'Imported #19'])
+        self.assertEqual(log.position, 20)
+        self.assertEqual(list(log.iter_log(position=18)), ['Imported #18', 'Imported #19'])
+        # lines that were dropped are skipped
+        self.assertEqual(len(list(log.iter_log())), 5)
+
+    def test_wait_for(self):
+        log = LogCapture(self.process.stdout).start()
+        self.emit(3)
+        log.wait_for(r'Imported #2')
+        with self.assertRaises(TimeoutError):
+            log.wait_for(r'Imported #2', timeout=0.1, position=log.position)
+        self.emit(3)
+        self.assertEqual(log.wait_for(r'Imported #(\d+)', position=3).group(1), '0')
+        self.process.stdin.close()
+        with self.assertRaises(TimeoutError):
+            log.wait_for(r'Imported #5', timeout=10)
+        log.close()
+        self.assertTrue(log.closed)
+
+    def test_follow(self):
+        log = LogCapture(self.process.stdout).start()
+        self.emit(2)
+        lines = log.iter_log(follow=True)
+        self.assertEqual([next(lines), next(lines)], ['Imported #0', 'Imported #1'])
+        self.emit(1)
+        self.assertEqual(next(lines), 'Imported #0')
+        self.process.stdin.close()
+        self.assertEqual(list(lines), [])
+        self.assertEqual(list(log.iter_log(follow=True, timeout=0.01)), ['Imported #0', 'Imported #1', 'Imported #0'])
+
+    def test_rotation(self):
+        path = os.path.join(self.tmpdir, 'parity.log')
+        log = LogCapture(self.process.stdout, path=path, max_bytes=100, backup_count=2).start()
+        self.emit(30)
+        self.process.stdin.close()
+        log.close()
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['parity.log', 'parity.log.1', 'parity.log.2'])
+        for name in os.listdir(self.tmpdir):
+            self.assertLessEqual(os.path.getsize(os.path.join(self.tmpdir, name)), 100)
+        with open(path) as f:
+            self.assertTrue(f.read().endswith('Imported #29\n'))
+
+
+class TestParityLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binary = write_parity(self.tmpdir, FAILING_PARITY)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_failed_boot(self):
+        with self.assertRaises(RuntimeError) as cm:
+            testing.parity.ParityServer(parity_server=self.binary)
+        self.assertIn("Starting Parity-Ethereum\nError: boom", str(cm.exception))
@@ -0,0 +1,86 @@
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+from benchmarks import fakeparity
+from testing.parity import ParityNetwork
+from testing.parity.ports import PortAllocator
+from testing.parity.teardown import wait_for_removals
+
+from helpers import TakenPortAllocator
+
+
+def processes_using(path):
+    """returns the pids of the processes with `path` in their command line"""
+    pids = []
+    for pid in os.listdir('/proc'):
+        try:
+            with open(os.path.join('/proc', pid, 'cmdline'), 'rb') as f:
+                if path.encode() in f.read():
+                    pids.append(int(pid))
+        except (OSError, ValueError):
+            pass
+    return pids
+
+
+class TestParityNetwork(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity_server = fakeparity.install(self.tmpdir)
+        self.ports = os.path.join(self.tmpdir, 'ports')
+        # the nodes' base directories go here as well
+        self.tempdir, tempfile.tempdir = tempfile.tempdir, self.tmpdir
+
+    def tearDown(self):
+        tempfile.tempdir = self.tempdir
+        wait_for_removals()
+        shutil.rmtree(self.tmpdir)
+
+    def test_start_stop(self):
+        network = ParityNetwork(n=3, peer_timeout=10, parity_server=self.parity_server,
+                                port_allocator=PortAllocator(self.ports))
+        try:
+            self.assertEqual(len(network), 3)
+            self.assertEqual(len(set(network.enodes)), 3)
+            self.assertEqual(len(set(node.settings['jsonrpc_port'] for node in network)), 3)
+            for node in network:
+                self.assertTrue(node.is_alive())
+                self.assertEqual(node.client().peer_count(), 2)
+                self.assertEqual(node.client().net_version(), network[0].client().net_version())
+            nodes = list(network)
+        finally:
+            network.stop()
+        self.assertEqual(len(network), 0)
+        wait_for_removals()
+        for node in nodes:
+            self.assertFalse(node.is_alive())
+            self.assertFalse(os.path.exists(node.base_dir))
+        self.assertTrue(all(block.released for block in network.port_blocks))
+
+    def test_failed_node(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind(('127.0.0.1', 0))
+            sock.listen(1)
+            # the second node fails to boot
+            allocator = TakenPortAllocator(self.ports, sock.getsockname()[1], index=1)
+            with self.assertRaises(RuntimeError):
+                ParityNetwork(n=3, peer_timeout=10, parity_server=self.parity_server, port_allocator=allocator)
+        finally:
+            sock.close()
+        self.assertEqual(len(allocator.blocks), 3)
+        self.assertTrue(all(block.released for block in allocator.blocks))
+        # the nodes that did boot were stopped and cleaned up
+        self.assertEqual(processes_using(self.tmpdir), [])
+        wait_for_removals()
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['parity', 'ports', 'testing.parity'])
+        with ParityNetwork(n=1, parity_server=self.parity_server, port_allocator=PortAllocator(self.ports)) as network:
+            self.assertEqual(network[0].client().peer_count(), 0)
+
+    def test_settings(self):
+        with self.assertRaises(ValueError):
+            ParityNetwork(n=0, parity_server=self.parity_server)
+        with self.assertRaises(ValueError):
+            ParityNetwork(n=2, parity_server=self.parity_server, jsonrpc_port=8545)
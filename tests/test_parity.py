@@ -1,9 +1,12 @@
 import testing.parity
 import unittest
-import json
-import urllib.request
 import time
 import os
+import shutil
+import tempfile
+
+from helpers import write_parity
+
 
 class TestParity(unittest.TestCase):
     def test_basic(self):
@@ -15,31 +18,9 @@ class TestParity(unittest.TestCase):
             self.assertEqual('http://localhost:{}'.format(parity.settings['jsonrpc_port']), params['url'])
             self.assertEqual('http://localhost:{}'.format(parity.settings['jsonrpc_port']), parity.url())
             self.assertEqual(42, params['network_id'])
-            result = urllib.request.urlopen(
-                urllib.request.Request(
-                    parity.url(),
-                    headers={'Content-Type': "application/json"},
-                    data=json.dumps({
-                        "jsonrpc": "2.0",
-                        "id": "1234",
-                        "method": "eth_blockNumber",
-                        "params": []
-                    }).encode('utf-8')
-                ))
-            self.assertEqual(json.load(result)['result'], '0x0')
-
-            result = urllib.request.urlopen(
-                urllib.request.Request(
-                    parity.url(),
-                    headers={'Content-Type': "application/json"},
-                    data=json.dumps({
-                        "jsonrpc": "2.0",
-                        "id": "1234",
-                        "method": "net_version",
-                        "params": []
-                    }).encode('utf-8')
-                ))
-            self.assertEqual(json.load(result)['result'], str(42))
+            client = parity.client()
+            self.assertEqual(client.request('eth_blockNumber'), '0x0')
+            self.assertEqual(client.net_version(), str(42))
 
         finally:
             # shutting down
@@ -47,7 +28,6 @@ class TestParity(unittest.TestCase):
             self.assertTrue(parity.is_alive())
 
             parity.stop()
-            time.sleep(1)
 
             self.assertFalse(parity.is_alive())
             with self.assertRaises(OSError):
@@ -75,64 +55,21 @@ class TestParity(unittest.TestCase):
                 ("0xb9491f2876689953c08f62d5f9e56a4ee4fe56db140df285a6da9166f051f992", "0xf8718310000985028fa6ae0082520894000000000000000000000000000000000000000089056bc75e2d631000008081a7a02d2c4480889a5afc0cdf671bd3eee85c2a8553cb9ce45e48e5b380098c20f515a068cc79a5b6a0d097364b8faa21280a5fb6b07af2e4073d28360e666c78a7bbff")
             ]
 
+            client = parity.client()
             for i, tx in enumerate(txs):
                 expected_hash, raw_tx = tx
 
-                result = urllib.request.urlopen(
-                    urllib.request.Request(
-                        parity.url(),
-                        headers={'Content-Type': "application/json"},
-                        data=json.dumps({
-                            "jsonrpc": "2.0",
-                            "id": "1234",
-                            "method": "eth_blockNumber",
-                            "params": []
-                        }).encode('utf-8')
-                    ))
-                block_number = int(json.load(result)['result'], 16)
+                block_number = client.block_number()
                 assert block_number == i
 
-                result = urllib.request.urlopen(
-                    urllib.request.Request(
-                        parity.url(),
-                        headers={'Content-Type': "application/json"},
-                        data=json.dumps({
-                            "jsonrpc": "2.0",
-                            "id": "1234",
-                            "method": "eth_getTransactionCount",
-                            "params": [address]
-                        }).encode('utf-8')
-                    ))
-                nonce = int(json.load(result)['result'], 16)
+                nonce = client.get_transaction_count(address)
                 assert nonce == 0x100000 + i
 
-                result = urllib.request.urlopen(
-                    urllib.request.Request(
-                        parity.url(),
-                        headers={'Content-Type': "application/json"},
-                        data=json.dumps({
-                            "jsonrpc": "2.0",
-                            "id": "1234",
-                            "method": "eth_sendRawTransaction",
-                            "params": [raw_tx]
-                        }).encode('utf-8')
-                    ))
-                tx_hash = json.load(result)['result']
+                tx_hash = client.send_raw_transaction(raw_tx)
                 assert tx_hash == expected_hash
                 start = time.time()
                 while True:
-                    result = urllib.request.urlopen(
-                        urllib.request.Request(
-                            parity.url(),
-                            headers={'Content-Type': "application/json"},
-                            data=json.dumps({
-                                "jsonrpc": "2.0",
-                                "id": "1234",
-                                "method": "eth_getTransactionByHash",
-                                "params": [tx_hash]
-                            }).encode('utf-8')
-                        ))
-                    receipt = json.load(result)['result']
+                    receipt = client.get_transaction(tx_hash)
                     if receipt is not None and receipt['blockNumber'] is not None:
                         assert int(receipt['blockNumber'], 16) == block_number + 1
                         break
@@ -144,3 +81,71 @@ class TestParity(unittest.TestCase):
                     time.sleep(0.5)
         finally:
             parity.stop()
+
+
+COUNTING_PARITY = """#!/bin/sh
+echo probed >> "{counter}"
+echo "Parity-Ethereum
+  version Parity-Ethereum/v{version}-stable-0000000-20191001/x86_64-linux-gnu/rustc1.37.0
+Copyright 2015-2019 Parity Technologies (UK) Ltd." >&2
+"""
+
+
+class TestVersionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.counter = os.path.join(self.tmpdir, 'counter')
+        self.binary = os.path.join(self.tmpdir, 'parity')
+        self.write_binary('2.5.8')
+        self._environ = os.environ.get('TESTING_PARITY_CACHE_DIR')
+        os.environ['TESTING_PARITY_CACHE_DIR'] = os.path.join(self.tmpdir, 'cache')
+        testing.parity.clear_version_cache()
+
+    def tearDown(self):
+        testing.parity.clear_version_cache()
+        if self._environ is None:
+            del os.environ['TESTING_PARITY_CACHE_DIR']
+        else:
+            os.environ['TESTING_PARITY_CACHE_DIR'] = self._environ
+        shutil.rmtree(self.tmpdir)
+
+    def write_binary(self, version):
+        write_parity(self.tmpdir, COUNTING_PARITY, version=version, counter=self.counter)
+
+    def probes(self):
+        if not os.path.exists(self.counter):
+            return 0
+        with open(self.counter) as f:
+            return len(f.readlines())
+
+    def test_probe_once(self):
+        self.assertEqual(testing.parity.get_parity_version(self.binary), (2, 5, 8))
+        self.assertEqual(testing.parity.get_parity_version(self.binary), (2, 5, 8))
+        self.assertEqual(self.probes(), 1)
+
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0)
+        self.assertEqual(parity.version, (2, 5, 8))
+        self.assertEqual(self.probes(), 1)
+
+    def test_disk_cache(self):
+        testing.parity.get_parity_version(self.binary)
+        testing.parity.clear_version_cache(disk=False)
+        self.assertEqual(testing.parity.get_parity_version(self.binary), (2, 5, 8))
+        self.assertEqual(self.probes(), 1)
+
+    def test_invalidated_when_binary_changes(self):
+        testing.parity.get_parity_version(self.binary)
+        self.write_binary('2.2.11')
+        os.utime(self.binary, ns=(0, 0))
+        self.assertEqual(testing.parity.get_parity_version(self.binary), (2, 2, 11))
+        self.assertEqual(self.probes(), 2)
+
+
+class TestNodeKey(unittest.TestCase):
+    def test_node_public_key(self):
+        # the public key for private key 1 is the secp256k1 generator point
+        self.assertEqual(
+            testing.parity.server.get_node_public_key("{:0>64}".format(1)),
+            "79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798"
+            "483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8")
+        self.assertEqual(len(testing.parity.server.generate_node_key()), 64)
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from benchmarks import fakeparity
+from testing.common.database import Database, DatabaseFactory
+from testing.parity import ParityServerFactory, ParityServerPool
+
+
+class SleepServer(Database):
+    """stands in for parity: a process that boots instantly"""
+    DEFAULT_SETTINGS = dict(auto_start=2,
+                            base_dir=None,
+                            port=None,
+                            copy_data_from=None,
+                            broken_rollback=False)
+
+    subdirectories = ['data']
+
+    def get_data_directory(self):
+        return os.path.join(self.base_dir, 'data')
+
+    def get_server_commandline(self):
+        return ['sleep', '60']
+
+    def is_server_available(self):
+        return True
+
+    def pause(self):
+        self.terminate()
+
+    def checkpoint(self, name):
+        pass
+
+    def rollback(self, name):
+        if self.settings['broken_rollback']:
+            raise RuntimeError("rollback failed")
+
+
+class SleepServerFactory(DatabaseFactory):
+    target_class = SleepServer
+
+
+class FailingFactory(object):
+    def __call__(self):
+        raise OSError("no parity here")
+
+
+class SlowFactory(SleepServerFactory):
+    def __call__(self):
+        time.sleep(0.5)
+        return super(SlowFactory, self).__call__()
+
+
+def wait_for(predicate, timeout=10.0):
+    start = time.time()
+    while not predicate():
+        if time.time() - start > timeout:
+            raise AssertionError("timeout")
+        time.sleep(0.01)
+
+
+class TestParityServerPool(unittest.TestCase):
+    def test_checkout(self):
+        with ParityServerPool(size=2, factory=SleepServerFactory()) as pool:
+            wait_for(lambda: pool.stats()['idle'] == 2)
+            servers = [pool.checkout(), pool.checkout(), pool.checkout(timeout=10)]
+            for server in servers:
+                self.assertTrue(server.is_alive())
+            stats = pool.stats()
+            self.assertEqual(stats['hits'], 2)
+            self.assertEqual(stats['misses'], 1)
+            self.assertGreaterEqual(stats['spawn_latency']['count'], 3)
+
+            for server in servers:
+                pool.checkin(server)
+            wait_for(lambda: not any(server.is_alive() for server in servers))
+            wait_for(lambda: pool.stats()['idle'] == 2)
+
+    def test_snapshot_reset(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            factory = ParityServerFactory(parity_server=fakeparity.install(tmpdir))
+            with ParityServerPool(size=1, reset='snapshot', factory=factory) as pool:
+                with pool.node(timeout=10) as server:
+                    pid = server.server_pid
+                    marker = os.path.join(server.get_data_directory(), 'marker')
+                    open(marker, 'w').close()
+                wait_for(lambda: pool.stats()['resets'] == 1)
+                self.assertTrue(server.is_alive())
+                self.assertNotEqual(server.server_pid, pid)
+                self.assertFalse(os.path.exists(marker))
+                self.assertEqual(server.client().block_number(), 0)
+            self.assertFalse(server.is_alive())
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_failed_reset(self):
+        with ParityServerPool(size=1, reset='snapshot', factory=SleepServerFactory(broken_rollback=True)) as pool:
+            server = pool.checkout(timeout=10)
+            pool.checkin(server)
+            wait_for(lambda: pool.stats()['failures'] == 1)
+            self.assertFalse(server.is_alive())
+            self.assertIsInstance(pool.last_error, RuntimeError)
+            # refilled right away, without another checkout
+            wait_for(lambda: pool.stats()['idle'] == 1)
+            self.assertEqual(pool.stats()['spawn_latency']['count'], 2)
+
+    def test_invalid_reset(self):
+        with self.assertRaises(ValueError):
+            ParityServerPool(reset='bogus', factory=SleepServerFactory())
+
+    def test_reuse_keeps_size(self):
+        with ParityServerPool(size=2, reset='reuse', factory=SleepServerFactory()) as pool:
+            wait_for(lambda: pool.stats()['idle'] == 2)
+            for _ in range(3):
+                with pool.node(timeout=10) as server:
+                    pid = server.server_pid
+                wait_for(lambda: pool.stats()['idle'] == 2)
+                self.assertEqual(server.server_pid, pid)
+            # three nodes in use at once, one more than the pool keeps
+            servers = [pool.checkout(timeout=10) for _ in range(3)]
+            for server in servers:
+                pool.checkin(server)
+            wait_for(lambda: pool.stats()['resets'] == 6)
+            stats = pool.stats()
+            self.assertEqual((stats['idle'], stats['pending'], stats['misses']), (2, 0, 1))
+            self.assertEqual(sum(server.is_alive() for server in servers), 2)
+
+    def test_failures(self):
+        with ParityServerPool(size=1, factory=FailingFactory()) as pool:
+            wait_for(lambda: pool.stats()['failures'] == 1)
+            stats = pool.stats()
+            self.assertEqual((stats['idle'], stats['pending'], stats['hits']), (0, 0, 0))
+            self.assertIsInstance(pool.last_error, OSError)
+            with self.assertRaises(RuntimeError):
+                pool.checkout(timeout=10)
+            self.assertEqual(pool.stats()['failures'], 2)
+            self.assertEqual(pool.stats()['hits'], 0)
+
+    def test_checkout_timeout(self):
+        with ParityServerPool(size=1, factory=SlowFactory()) as pool:
+            with self.assertRaisesRegex(RuntimeError, "no node ready"):
+                pool.checkout(timeout=0.05)
+            server = pool.checkout(timeout=10)
+        self.assertTrue(server.is_alive())
+        # returned after close
+        pool.checkin(server)
+        self.assertFalse(server.is_alive())
@@ -0,0 +1,169 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import testing.parity
+from benchmarks import fakeparity
+from testing.parity import ports
+from testing.parity.ports import PortAllocator, is_port_free
+
+from helpers import TakenPortAllocator
+
+# reserves a block and holds it until stdin is closed
+HOLDER = """
+import sys
+from testing.parity.ports import PortAllocator
+block = PortAllocator(sys.argv[1], int(sys.argv[2]), int(sys.argv[3])).reserve()
+print(block.ports[0], flush=True)
+sys.stdin.read()
+"""
+
+
+def free_range(size):
+    """returns the first port of `size` free ports in the default range"""
+    allocator = PortAllocator(tempfile.mkdtemp(), block_size=size)
+    with allocator.reserve() as block:
+        shutil.rmtree(allocator.directory)
+        return block.ports[0]
+
+
+class TestPortAllocator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_reserve(self):
+        first = free_range(8)
+        allocator = PortAllocator(self.directory, first, first + 7, block_size=4)
+        other = PortAllocator(self.directory, first, first + 7, block_size=4)
+        a = allocator.reserve()
+        b = other.reserve()
+        self.assertEqual(len(a.ports), 4)
+        self.assertEqual(list(a.ports), list(range(a.ports[0], a.ports[0] + 4)))
+        self.assertEqual(sorted([a.ports[0], b.ports[0]]), [first, first + 4])
+        with self.assertRaises(RuntimeError):
+            allocator.reserve()
+
+        a.release()
+        a.release()
+        self.assertTrue(a.released)
+        c = other.reserve()
+        self.assertEqual(c.ports, a.ports)
+        b.release()
+        c.release()
+
+    def test_ports_in_use(self):
+        first = free_range(2)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind(('127.0.0.1', first + 1))
+            sock.listen(1)
+            self.assertFalse(is_port_free(first + 1))
+            with self.assertRaises(RuntimeError):
+                PortAllocator(self.directory, first, first + 1, block_size=2).reserve()
+        finally:
+            sock.close()
+
+    def test_other_process(self):
+        first = free_range(4)
+        holder = subprocess.Popen([sys.executable, '-c', HOLDER, self.directory, str(first), str(first + 3)],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            self.assertEqual(int(holder.stdout.readline()), first)
+            with self.assertRaises(RuntimeError):
+                PortAllocator(self.directory, first, first + 3).reserve()
+        finally:
+            holder.communicate()
+        # released when the holder exited
+        with PortAllocator(self.directory, first, first + 3).reserve() as block:
+            self.assertEqual(block.ports[0], first)
+
+
+class TestWithoutFlock(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fcntl, ports.fcntl = ports.fcntl, None
+        self.allocator = ports.set_port_allocator(None)
+
+    def tearDown(self):
+        ports.fcntl = self.fcntl
+        ports.set_port_allocator(self.allocator)
+        shutil.rmtree(self.tmpdir)
+
+    def test_import(self):
+        # as on windows
+        subprocess.check_call([sys.executable, '-c', "import sys; sys.modules['fcntl'] = None; import testing.parity"])
+
+    def test_unused_ports(self):
+        self.assertIsNone(ports.get_port_allocator())
+        with self.assertRaises(RuntimeError):
+            PortAllocator(self.tmpdir)
+        parity = testing.parity.ParityServer(parity_server=fakeparity.install(self.tmpdir))
+        try:
+            self.assertIsNone(parity.port_block)
+            self.assertEqual(parity.client().block_number(), 0)
+        finally:
+            parity.stop()
+
+
+class TestParityPorts(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.parity_server = fakeparity.install(self.tmpdir)
+        self.allocator = PortAllocator(os.path.join(self.tmpdir, 'ports'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_block(self):
+        parity = testing.parity.ParityServer(parity_server=self.parity_server, port_allocator=self.allocator,
+                                             enable_ws=True)
+        try:
+            block = parity.port_block
+            self.assertEqual([parity.settings['port'], parity.settings['jsonrpc_port'], parity.settings['ws_port']],
+                             list(block.ports[:3]))
+            self.assertEqual(parity.client().block_number(), 0)
+        finally:
+            parity.stop()
+        self.assertTrue(block.released)
+        self.assertIsNone(parity.port_block)
+
+        parity = testing.parity.ParityServer(parity_server=self.parity_server, port_allocator=False)
+        try:
+            self.assertIsNone(parity.port_block)
+            self.assertIsNotNone(parity.settings['jsonrpc_port'])
+        finally:
+            parity.stop()
+
+    def test_retry(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind(('127.0.0.1', 0))
+            sock.listen(1)
+            taken = sock.getsockname()[1]
+
+            for log_capture in (True, False):
+                allocator = TakenPortAllocator(self.allocator.directory, taken)
+                parity = testing.parity.ParityServer(parity_server=self.parity_server, port_allocator=allocator,
+                                                     log_capture=log_capture)
+                try:
+                    self.assertEqual(len(allocator.blocks), 2)
+                    self.assertTrue(allocator.blocks[0].released)
+                    self.assertEqual(parity.settings['jsonrpc_port'], allocator.blocks[1].ports[1])
+                    self.assertEqual(parity.client().block_number(), 0)
+                finally:
+                    parity.stop()
+
+            allocator = TakenPortAllocator(self.allocator.directory, taken)
+            with self.assertRaises(RuntimeError):
+                testing.parity.ParityServer(parity_server=self.parity_server, port_allocator=allocator,
+                                            port_retries=0)
+            self.assertTrue(allocator.blocks[0].released)
+        finally:
+            sock.close()
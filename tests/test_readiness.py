@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from testing.parity.readiness import Backoff, LogWatcher, is_port_open, rpc_ping
+
+
+class JSONRPCHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        body = json.dumps({"jsonrpc": "2.0", "id": request['id'], "result": "66"}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestReadiness(unittest.TestCase):
+    def test_backoff(self):
+        backoff = Backoff(0.01, 0.05)
+        self.assertEqual([next(backoff) for _ in range(4)], [0.01, 0.02, 0.04, 0.05])
+        backoff.reset()
+        self.assertEqual(next(backoff), 0.01)
+
+    def test_log_watcher(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'parity.log')
+            watcher = LogWatcher(path, r"Public node URL: (enode://\S+)")
+            self.assertFalse(watcher.poll())
+            with open(path, 'w') as f:
+                f.write("Starting Parity-Ethereum\nPublic node URL: enode://")
+            self.assertFalse(watcher.poll())
+            with open(path, 'a') as f:
+                f.write("abc@127.0.0.1:30303\n")
+            self.assertTrue(watcher.poll())
+            self.assertEqual(watcher.match.group(1), "enode://abc@127.0.0.1:30303")
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_port_and_rpc(self):
+        server = HTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            self.assertTrue(is_port_open(port))
+            self.assertIsNone(rpc_ping('http://127.0.0.1:{}'.format(port)))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertFalse(is_port_open(port))
+        self.assertIsInstance(rpc_ping('http://127.0.0.1:{}'.format(port)), Exception)
@@ -0,0 +1,153 @@
+import base64
+import hashlib
+import json
+import socketserver
+import struct
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from testing.parity.receipts import ReceiptWatcher, poll_receipts
+from testing.parity.rpc import JSONRPCClient
+
+TX_HASH = "0xc337816fd40c6a54f77a1445fa1ea6ab5101294974515312052b670650e2aca9"
+
+
+class Chain(object):
+    """pretends a transaction gets mined in block 1 once `mine()` is called"""
+
+    def __init__(self):
+        self.mined = False
+        self.subscribers = []
+        self.receipt_requests = 0
+
+    def mine(self):
+        self.mined = True
+        for subscriber in self.subscribers:
+            subscriber({"number": "0x1", "hash": "0x" + "11" * 32})
+
+    def respond(self, request):
+        method, params = request['method'], request['params']
+        result = None
+        if method == 'eth_getTransactionReceipt':
+            self.receipt_requests += 1
+            if self.mined:
+                result = {"transactionHash": params[0], "blockNumber": "0x1"}
+        elif method == 'eth_getBlockByNumber':
+            result = {"number": params[0], "transactions": [TX_HASH] if self.mined else []}
+        return {"jsonrpc": "2.0", "id": request['id'], "result": result}
+
+
+class JSONRPCHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        if isinstance(request, list):
+            response = [self.server.chain.respond(r) for r in request]
+        else:
+            response = self.server.chain.respond(request)
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class WebSocketHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data = b''
+        while b'\r\n\r\n' not in data:
+            data += self.request.recv(4096)
+        key = [line.split(b':', 1)[1].strip() for line in data.split(b'\r\n')
+               if line.lower().startswith(b'sec-websocket-key')][0]
+        accept = base64.b64encode(hashlib.sha1(key + b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11").digest())
+        self.request.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                             b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        lock = threading.Lock()
+
+        def send(message):
+            payload = json.dumps(message).encode('utf-8')
+            with lock:
+                self.request.sendall(bytes([0x81, len(payload)]) + payload
+                                     if len(payload) < 126 else
+                                     bytes([0x81, 126]) + struct.pack('>H', len(payload)) + payload)
+
+        b1, b2 = self.request.recv(2)
+        length = b2 & 0x7F
+        mask = self.request.recv(4)
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.request.recv(length)))
+        request = json.loads(payload.decode('utf-8'))
+        send({"jsonrpc": "2.0", "id": request['id'], "result": "0x1234"})
+        self.server.chain.subscribers.append(
+            lambda header: send({"jsonrpc": "2.0", "method": "eth_subscription",
+                                 "params": {"subscription": "0x1234", "result": header}}))
+        # wait for the client to close the connection
+        while self.request.recv(4096):
+            pass
+
+
+class TestReceipts(unittest.TestCase):
+    def setUp(self):
+        self.chain = Chain()
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+        self.ws = socketserver.ThreadingTCPServer(('127.0.0.1', 0), WebSocketHandler)
+        self.ws.daemon_threads = True
+        self.http.chain = self.ws.chain = self.chain
+        self.threads = [threading.Thread(target=server.serve_forever) for server in (self.http, self.ws)]
+        for thread in self.threads:
+            thread.start()
+        self.client = JSONRPCClient('http://127.0.0.1:{}'.format(self.http.server_address[1]))
+
+    def tearDown(self):
+        self.client.close()
+        for server in (self.http, self.ws):
+            server.shutdown()
+            server.server_close()
+        for thread in self.threads:
+            thread.join()
+
+    def test_poll(self):
+        threading.Timer(0.1, self.chain.mine).start()
+        receipts = poll_receipts(self.client, [TX_HASH], timeout=5)
+        self.assertEqual(receipts[0]['transactionHash'], TX_HASH)
+
+        self.chain.mined = False
+        with self.assertRaises(TimeoutError):
+            poll_receipts(self.client, [TX_HASH], timeout=0.1)
+
+    def test_subscription(self):
+        watcher = ReceiptWatcher(self.client, 'ws://127.0.0.1:{}'.format(self.ws.server_address[1]))
+        try:
+            threading.Timer(0.2, self.chain.mine).start()
+            started_at = time.time()
+            receipts = watcher.wait([TX_HASH, TX_HASH.upper().replace('0X', '0x')], timeout=5)
+            self.assertLess(time.time() - started_at, 2)
+            self.assertEqual([r['transactionHash'] for r in receipts], [TX_HASH, TX_HASH])
+            # one lookup when waiting started, one for the new block
+            self.assertEqual(self.chain.receipt_requests, 2)
+        finally:
+            watcher.close()
+
+    def test_subscription_timeout(self):
+        watcher = ReceiptWatcher(self.client, 'ws://127.0.0.1:{}'.format(self.ws.server_address[1]))
+        try:
+            waiting = threading.Thread(target=lambda: self.assertEqual(len(watcher.wait([TX_HASH], timeout=5)), 1))
+            waiting.start()
+            while TX_HASH not in watcher._waiters:
+                time.sleep(0.01)
+            with self.assertRaises(TimeoutError):
+                watcher.wait([TX_HASH, '0x' + '11' * 32], timeout=0.1)
+            # still waited for by the other thread
+            self.assertEqual(list(watcher._pending), [TX_HASH])
+            self.chain.mine()
+            waiting.join()
+            self.assertEqual(watcher._pending, {})
+            self.assertEqual(watcher._waiters, {})
+        finally:
+            watcher.close()
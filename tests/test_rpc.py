@@ -0,0 +1,206 @@
+import copy
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from testing.parity.metrics import Aggregator, CallbackSink, Histogram, MetricsSink, set_metrics_sink
+from testing.parity.rpc import JSONRPCClient, JSONRPCError
+
+RESULTS = {
+    "eth_blockNumber": "0x2a",
+    "eth_getTransactionCount": "0x100000",
+    "eth_sendRawTransaction": "0xc337816fd40c6a54f77a1445fa1ea6ab5101294974515312052b670650e2aca9",
+    "eth_getTransactionReceipt": None,
+}
+
+
+class JSONRPCHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.requests.append(request)
+        if isinstance(request, list):
+            response = [self.respond(r) for r in reversed(request)]
+        else:
+            response = self.respond(request)
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, request):
+        response = {"jsonrpc": "2.0", "id": request['id']}
+        if request['method'] in RESULTS:
+            response['result'] = RESULTS[request['method']]
+        else:
+            response['error'] = {"code": -32601, "message": "Method not found"}
+        return response
+
+    def log_message(self, *args):
+        pass
+
+
+class TestJSONRPCClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+        self.server.connections = set()
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = JSONRPCClient('http://127.0.0.1:{}'.format(self.server.server_address[1]))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_helpers(self):
+        self.assertEqual(self.client.block_number(), 42)
+        self.assertEqual(self.client.get_transaction_count("0xf0fd3db9396b084d26d4f838eade9f111a715a29"), 0x100000)
+        self.assertEqual(self.client.send_raw_transaction(b'\xf8\x71'), RESULTS["eth_sendRawTransaction"])
+        self.assertEqual(self.server.requests[-1]['params'], ["0xf871"])
+        self.assertIsNone(self.client.get_receipt(RESULTS["eth_sendRawTransaction"]))
+        ids = [request['id'] for request in self.server.requests]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_keep_alive(self):
+        for _ in range(10):
+            self.client.block_number()
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.client.latency_stats()['eth_blockNumber']['count'], 10)
+
+    def test_threads(self):
+        threads = [threading.Thread(target=lambda: [self.client.block_number() for _ in range(20)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.server.requests), 80)
+        self.assertLessEqual(len(self.server.connections), 4)
+
+    def test_error(self):
+        with self.assertRaises(JSONRPCError) as cm:
+            self.client.request('eth_unknown')
+        self.assertEqual(cm.exception.code, -32601)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for i in range(1, 101):
+            histogram.record(i / 1000.0)
+        stats = histogram.as_dict()
+        self.assertEqual(stats['count'], 100)
+        self.assertEqual(stats['min'], 0.001)
+        self.assertEqual(stats['max'], 0.1)
+        self.assertTrue(0.05 <= stats['p50'] <= 0.1)
+        self.assertTrue(stats['p50'] <= stats['p95'] <= stats['p99'] <= 0.1)
+
+
+class TestMetricsSink(unittest.TestCase):
+    def test_aggregator(self):
+        sink = Aggregator()
+        for i in range(10):
+            sink.timing('parity.start', i / 10.0)
+        sink.timing('rpc.eth_blockNumber', 0.001)
+        stats = json.loads(sink.dump())
+        self.assertEqual(stats['parity.start']['count'], 10)
+        self.assertEqual(stats['rpc.eth_blockNumber']['max'], 0.001)
+        self.assertIs(copy.deepcopy({'metrics': sink})['metrics'], sink)
+        sink.reset()
+        self.assertEqual(sink.as_dict(), {})
+
+    def test_default(self):
+        timings = []
+        previous = set_metrics_sink(CallbackSink(lambda name, seconds: timings.append(name)))
+        try:
+            self.assertIsInstance(previous, MetricsSink)
+            server = ThreadingHTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+            server.connections = set()
+            server.requests = []
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                with JSONRPCClient('http://127.0.0.1:{}'.format(server.server_address[1])) as client:
+                    client.block_number()
+                    with client.batch() as batch:
+                        batch.get_receipt('0x00')
+                own = Aggregator()
+                with JSONRPCClient('http://127.0.0.1:{}'.format(server.server_address[1]), metrics=own) as client:
+                    client.block_number()
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+        finally:
+            set_metrics_sink(previous)
+        self.assertEqual(timings, ['rpc.eth_blockNumber', 'rpc.eth_getTransactionReceipt'])
+        self.assertEqual(list(own.as_dict()), ['rpc.eth_blockNumber'])
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), JSONRPCHandler)
+        self.server.connections = set()
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_batch(self):
+        with JSONRPCClient(self.url, max_batch_size=3) as client:
+            with client.batch() as batch:
+                numbers = [batch.block_number() for _ in range(4)]
+                unknown = batch.request('eth_unknown')
+            self.assertEqual([n.result() for n in numbers], [42] * 4)
+            with self.assertRaises(JSONRPCError):
+                unknown.result()
+        self.assertEqual([len(request) for request in self.server.requests], [3, 2])
+
+    def test_coalesce(self):
+        results = []
+        with JSONRPCClient(self.url, coalesce_window=0.2) as client:
+            threads = [threading.Thread(target=lambda: results.append(client.block_number()))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(self.server.requests[0]), 5)
+
+    def test_coalesce_errors(self):
+        with JSONRPCClient(self.url, coalesce_window=0.05) as client:
+            with self.assertRaises(TypeError):
+                client.request('eth_blockNumber', object())
+            self.assertEqual(client.block_number(), 42)
+
+            coalescer = client._coalescer
+            client.close()
+            with self.assertRaises(RuntimeError):
+                coalescer.put(client._new_call('eth_blockNumber', (), None))
+
+    def test_close_fails_queued_calls(self):
+        client = JSONRPCClient(self.url, coalesce_window=0.05)
+        coalescer = client._coalescer
+        # stop the coalescing thread first, as if the call raced with close()
+        coalescer.queue.put(None)
+        coalescer.thread.join()
+        call = client._new_call('eth_blockNumber', (), None)
+        coalescer.queue.put(call)
+        client.close()
+        with self.assertRaises(RuntimeError):
+            call.future.result(timeout=1)
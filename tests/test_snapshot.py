@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import testing.parity
+from testing.parity.snapshot import SnapshotCache, clone_tree
+
+from helpers import write_parity
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmpdir, 'data')
+        db = os.path.join(self.data_dir, 'chains', 'dev', 'db')
+        os.makedirs(db)
+        os.makedirs(os.path.join(self.data_dir, 'network'))
+        for name, content in [('000001.sst', b'x' * 1000), ('CURRENT', b'MANIFEST-000001\n'), ('LOCK', b'')]:
+            with open(os.path.join(db, name), 'wb') as f:
+                f.write(content)
+        with open(os.path.join(self.data_dir, 'network', 'nodes.json'), 'w') as f:
+            f.write('{}')
+        self.cache = SnapshotCache(os.path.join(self.tmpdir, 'cache'), max_size=1500)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_clone_tree(self):
+        dst = os.path.join(self.tmpdir, 'clone')
+        clone_tree(self.data_dir, dst)
+        src_db = os.path.join(self.data_dir, 'chains', 'dev', 'db')
+        dst_db = os.path.join(dst, 'chains', 'dev', 'db')
+        self.assertEqual(sorted(os.listdir(dst_db)), ['000001.sst', 'CURRENT'])
+        self.assertEqual(os.stat(os.path.join(src_db, '000001.sst')).st_ino,
+                         os.stat(os.path.join(dst_db, '000001.sst')).st_ino)
+        self.assertNotEqual(os.stat(os.path.join(src_db, 'CURRENT')).st_ino,
+                            os.stat(os.path.join(dst_db, 'CURRENT')).st_ino)
+        self.assertFalse(os.path.exists(os.path.join(dst, 'network')))
+
+    def test_store_and_restore(self):
+        key = SnapshotCache.key(b'{}', (2, 5, 8), ['--tracing', 'on'])
+        self.assertNotEqual(key, SnapshotCache.key(b'{}', (2, 5, 9), ['--tracing', 'on']))
+        dst = os.path.join(self.tmpdir, 'restored')
+        self.assertFalse(self.cache.restore(key, dst))
+
+        self.cache.store(key, self.data_dir)
+        self.assertIn(key, self.cache)
+        self.assertTrue(self.cache.restore(key, dst))
+        with open(os.path.join(dst, 'chains', 'dev', 'db', 'CURRENT')) as f:
+            self.assertEqual(f.read(), 'MANIFEST-000001\n')
+        self.assertFalse(os.path.exists(os.path.join(dst, '.last_used')))
+
+    def test_evict(self):
+        self.cache.store('a', self.data_dir)
+        self.cache.store('b', self.data_dir)
+        self.assertNotIn('a', self.cache)
+        self.assertIn('b', self.cache)
+
+
+class TestSnapshotKey(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.binary = write_parity(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def snapshot_key(self, **kwargs):
+        parity = testing.parity.ParityServer(parity_server=self.binary, auto_start=0,
+                                             faucet_private_key=b'\x01' * 32, **kwargs)
+        parity.prestart()
+        try:
+            return parity.snapshot_key()
+        finally:
+            parity.stop()
+
+    def test_ignores_instance_options(self):
+        self.assertEqual(self.snapshot_key(), self.snapshot_key())
+        self.assertNotEqual(self.snapshot_key(), self.snapshot_key(network_id=1))
+        self.assertNotEqual(self.snapshot_key(), self.snapshot_key(min_gas_price=1))
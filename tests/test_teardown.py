@@ -0,0 +1,97 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import testing.parity
+from benchmarks import fakeparity
+from testing.common.database import Database
+from testing.parity.metrics import Aggregator
+from testing.parity.teardown import ShutdownError, stop_all, wait_for_removals
+
+# ignores SIGTERM once it created its ready file
+STUBBORN = """
+import os, signal, sys, time
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+open(sys.argv[1], 'w').close()
+time.sleep(60)
+"""
+
+
+class SleepServer(Database):
+    DEFAULT_SETTINGS = dict(auto_start=2,
+                            base_dir=None,
+                            port=None,
+                            copy_data_from=None,
+                            stubborn=False)
+
+    def get_server_commandline(self):
+        if self.settings['stubborn']:
+            return [sys.executable, '-c', STUBBORN, os.path.join(self.base_dir, 'ready')]
+        return ['sleep', '60']
+
+    def is_server_available(self):
+        return not self.settings['stubborn'] or os.path.exists(os.path.join(self.base_dir, 'ready'))
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+class TestStopAll(unittest.TestCase):
+    def test_stop_all(self):
+        servers = [SleepServer() for _ in range(5)]
+        pids = [server.server_pid for server in servers]
+        started_at = time.time()
+        stop_all(servers)
+        self.assertLess(time.time() - started_at, 2.0)
+        for server, pid in zip(servers, pids):
+            self.assertFalse(server.is_alive())
+            self.assertFalse(is_running(pid))
+        wait_for_removals()
+        for server in servers:
+            self.assertFalse(os.path.exists(server.base_dir))
+        # stopping again does nothing
+        stop_all(servers)
+
+    def test_kill(self):
+        servers = [SleepServer(), SleepServer(stubborn=True)]
+        stubborn_pid = servers[1].server_pid
+        with self.assertRaises(ShutdownError) as cm:
+            stop_all(servers, timeout=0.5)
+        self.assertEqual(cm.exception.failed, [(servers[1], stubborn_pid)])
+        self.assertFalse(is_running(stubborn_pid))
+        wait_for_removals()
+        for server in servers:
+            self.assertFalse(server.is_alive())
+            self.assertFalse(os.path.exists(server.base_dir))
+
+    def test_synchronous_cleanup(self):
+        server = SleepServer()
+        stop_all([server], background_cleanup=False)
+        self.assertFalse(os.path.exists(server.base_dir))
+
+    def test_parity_servers(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            parity_server = fakeparity.install(tmpdir)
+            metrics = [Aggregator(), Aggregator()]
+            servers = [testing.parity.ParityServer(parity_server=parity_server, metrics=sink) for sink in metrics]
+            logs = [server.log for server in servers]
+            blocks = [server.port_block for server in servers]
+            stop_all(servers)
+            for server, log, block in zip(servers, logs, blocks):
+                self.assertFalse(server.is_alive())
+                self.assertTrue(log.closed)
+                self.assertTrue(block.released)
+            for sink in metrics:
+                self.assertEqual(sink.as_dict()['parity.stop_all']['count'], 1)
+        finally:
+            wait_for_removals()
+            shutil.rmtree(tmpdir)